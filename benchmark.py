@@ -0,0 +1,248 @@
+import argparse, os, sys, gc, json, math, logging
+
+from src.analex import LexicalAnalyser
+from src.anasyn import SyntaxAnalyser
+from src.symboltable import SymbolTable
+from src.timereport import TimeReport
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+
+# Générateurs de programmes : chacun donne le source d'un programme valide dont la taille croît avec size
+
+def functions(size):
+    """size functions with a loop and a condition, all called from the main program."""
+    lines = ["Programme Fonctions", "    Prototypes :"]
+    for i in range(size):
+        lines.append(f"        Fonction f{i}(n : entree entier) -> entier")
+    lines.append("    Definitions :")
+    for i in range(size):
+        lines += [
+            f"        Fonction f{i}(n : entree entier) -> entier :",
+            "            Variables :",
+            "                s : entier",
+            "            Debut",
+            "                s = 0",
+            "                Tant que n sup 0 Faire",
+            f"                    Si n modulo 2 egal 0 Alors",
+            f"                        s = s + n * {i + 1}",
+            "                    Fin Si",
+            "                    n = n - 1",
+            "                Fin Tant que",
+            "                Renvoyer s",
+            "            Fin"
+        ]
+    lines += ["    Variables :", "        x : entier", "Debut Programme", "    x = 0"]
+    for i in range(size):
+        lines.append(f"    x = x + f{i}(10)")
+    lines += ["    afficher(x)", "Fin Programme"]
+    return "\n".join(lines)
+
+
+def nesting(size):
+    """size levels of "Si" and "Tant que" nested in each other, with a few instructions at each level."""
+    lines = ["Programme Imbrication", "    Variables :", "        x, y : entier", "Debut Programme", "    x = 0", "    y = 0"]
+    closings = []
+    for level in range(size):
+        indent = "    " * (level + 1)
+        if level % 2 == 0:
+            lines.append(f"{indent}Si x inf {level + 1} Alors")
+            closings.append(f"{indent}Fin Si")
+        else:
+            lines.append(f"{indent}Tant que x inf {level + 1} Faire")
+            closings.append(f"{indent}Fin Tant que")
+        lines += [f"{indent}    x = x + 1", f"{indent}    y = y * 2 - x", f"{indent}    afficher(x + y)"]
+    lines += reversed(closings)
+    lines += ["    afficher(x)", "Fin Programme"]
+    return "\n".join(lines)
+
+
+def expression(size):
+    """One assignment whose expression has size terms."""
+    operators = ("+", "-", "*")
+    terms = ["x"]
+    for i in range(1, size):
+        operand = "y" if i % 2 else str(i)
+        terms.append(f"{operators[i % 3]} {operand}")
+    return "\n".join([
+        "Programme Expression",
+        "    Variables :",
+        "        x, y : entier",
+        "Debut Programme",
+        "    x = 1",
+        "    y = 2",
+        f"    x = {' '.join(terms)}",
+        "    afficher(x)",
+        "Fin Programme"
+    ])
+
+
+def variables(size):
+    """A "Variables :" block declaring size variables, ten per line, each one computed from the previous one."""
+    names = [f"v{i}" for i in range(size)]
+    lines = ["Programme Declarations", "    Variables :"]
+    for i in range(0, size, 10):
+        lines.append(f"        {', '.join(names[i:i + 10])} : entier")
+    lines.append("Debut Programme")
+    lines.append(f"    {names[0]} = 0")
+    lines += [f"    {names[i]} = {names[i - 1]} + {i}" for i in range(1, size)]
+    lines += [f"    afficher({names[-1]})", "Fin Programme"]
+    return "\n".join(lines)
+
+
+# Nom du banc d'essai -> (générateur, tailles mesurées)
+BENCHMARKS = {
+    "functions": (functions, (50, 100, 200, 400)),
+    "nesting": (nesting, (25, 50, 100, 200)),
+    "expression": (expression, (250, 500, 1000, 2000)),
+    "variables": (variables, (250, 500, 1000, 2000))
+}
+
+
+def run_once(source, gcc=False):
+    """Compile a source in memory and return its TimeReport (the generated program is not run)."""
+    report = TimeReport("<benchmark>")
+    lexical_analyser = LexicalAnalyser()
+    with report.phase("lexing"):
+        for lineIndex, line in enumerate(source.split("\n")):
+            lexical_analyser.analyse_line(lineIndex, line)
+    report.count("tokens", len(lexical_analyser.lexical_units))
+
+    syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable(), output_file=os.devnull)
+    with report.phase("parsing"):
+        syntax_analyser.parse()
+    with report.phase("emission"):
+        syntax_analyser.generate()
+    if gcc:
+        syntax_analyser.code_generator.output_file = os.path.join(os.environ.get("TMPDIR", "/tmp"), f"pcode-benchmark-{os.getpid()}")
+        with report.phase("gcc", children=True):
+            syntax_analyser.code_generator.compile_file()
+        os.remove(f"{syntax_analyser.code_generator.output_file}.out")
+    return report
+
+
+def measure(source, repeat, gcc=False):
+    """Lowest CPU time of each phase over repeat compilations, and the number of tokens of the source.
+    The CPU time does not depend on the other processes of the machine. Like timeit,
+    the garbage collector is disabled while the compilations run."""
+    best = {}
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            report = run_once(source, gcc)
+        finally:
+            gc.enable()
+        for phase, values in report.phases.items():
+            best[phase] = min(best.get(phase, math.inf), values["cpu"])
+    return best, report.counts["tokens"]
+
+
+def scaling_exponent(points):
+    """Slope of log(time) against log(tokens): 1 when the time grows linearly with the size of the source."""
+    xs = [math.log(tokens) for tokens, seconds in points]
+    ys = [math.log(seconds) for tokens, seconds in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+
+
+def run_benchmarks(names, repeat=5, gcc=False):
+    """Measure every size of the given benchmarks. Returns {benchmark: [result of each size]}."""
+    results = {}
+    for name in names:
+        generator, sizes = BENCHMARKS[name]
+        results[name] = []
+        for size in sizes:
+            phases, tokens = measure(generator(size), repeat, gcc)
+            # Le débit ne compte que les phases du compilateur, pas gcc
+            seconds = phases["lexing"] + phases["parsing"] + phases["emission"]
+            results[name].append({"size": size, "tokens": tokens, "phases": phases, "tokens_per_second": tokens / seconds})
+    return results
+
+
+def throughput(measures, tokens_per_second=None):
+    """Tokens per second over all the sizes of a benchmark, with the given throughput of each size if any."""
+    tokens_per_second = tokens_per_second or [measure["tokens_per_second"] for measure in measures]
+    tokens = [measure["tokens"] for measure in measures]
+    return sum(tokens) / sum(count / speed for count, speed in zip(tokens, tokens_per_second))
+
+
+def compare(results, baseline, threshold):
+    """List the benchmarks whose throughput dropped by more than threshold (0.2 for 20%) from the baseline.
+    The sizes of a benchmark are compared together, a single small measure is too noisy."""
+    regressions = []
+    for name, measures in results.items():
+        reference = baseline.get(name, {})
+        if not all(str(measure["size"]) in reference for measure in measures):
+            continue
+        expected = throughput(measures, [reference[str(measure["size"])] for measure in measures])
+        measured = throughput(measures)
+        if measured < expected * (1 - threshold):
+            regressions.append((name, measured, expected))
+    return regressions
+
+
+def as_baseline(results):
+    return {name: {str(measure["size"]): round(measure["tokens_per_second"]) for measure in measures} for name, measures in results.items()}
+
+
+def print_results(results, baseline):
+    for name, measures in results.items():
+        print(name)
+        print(f"{'size':>8}{'tokens':>9}{'lexing (ms)':>13}{'parsing (ms)':>14}{'emission (ms)':>15}{'gcc (ms)':>10}{'tokens/s':>11}{'baseline':>10}  (CPU time)")
+        for measure in measures:
+            phases = measure["phases"]
+            gcc = f"{phases['gcc'] * 1000:.2f}" if "gcc" in phases else "-"
+            reference = baseline.get(name, {}).get(str(measure["size"]))
+            print(f"{measure['size']:>8}{measure['tokens']:>9}{phases['lexing'] * 1000:>13.2f}{phases['parsing'] * 1000:>14.2f}"
+                  f"{phases['emission'] * 1000:>15.2f}{gcc:>10}{measure['tokens_per_second']:>11.0f}{reference or '-':>10}")
+        exponent = scaling_exponent([(measure["tokens"], measure["tokens"] / measure["tokens_per_second"]) for measure in measures])
+        print(f"  {throughput(measures):.0f} tokens/s over all sizes")
+        if exponent is not None:
+            print(f"  time ~ tokens^{exponent:.2f}")
+        print()
+
+
+parser = argparse.ArgumentParser(description="Benchmark of the pseudo-code compiler on generated programs")
+parser.add_argument("benchmarks", nargs="*", metavar="benchmark", help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+parser.add_argument("-r", "--repeat", type=int, default=5, help="Compilations of each program, the fastest is kept (default: 5)")
+parser.add_argument("--gcc", action="store_true", help="Also measure the compilation of the C code", default=False)
+parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file (default: benchmark_baseline.json)")
+parser.add_argument("--save-baseline", action="store_true", help="Write the measures as the new baseline", default=False)
+parser.add_argument("--threshold", type=float, default=0.25, help="Throughput drop from the baseline reported as a regression (default: 0.25)")
+parser.add_argument("--json", action="store_true", help="Print the measures as JSON", default=False)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark '{name}' (choose from {', '.join(BENCHMARKS)})")
+
+    results = run_benchmarks(args.benchmarks or list(BENCHMARKS), args.repeat, args.gcc)
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print_results(results, baseline)
+
+    if args.save_baseline:
+        baseline.update(as_baseline(results))
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=4)
+        print(f"Baseline written to '{args.baseline}'", file=sys.stderr)
+        sys.exit(0)
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, measured, expected in regressions:
+        print(f"REGRESSION {name}: {measured:.0f} tokens/s, baseline {expected:.0f} tokens/s", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
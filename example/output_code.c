@@ -0,0 +1,44 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdbool.h>
+void test();
+int addition(int a, int b);
+void test() {
+	printf("%d\n",4);
+}
+int addition(int a, int b) {
+	return a+b;
+}
+	int main() {
+	int a;
+	int b;
+	int c;
+	float x;
+	char* s;
+	char* ss;
+	a = 10;
+	b = 20;
+	c = addition(a, b);
+	x = 1.25;
+	s = "test";
+	ss = "test2";
+	printf("%s\n",s);
+	printf("%s\n",ss);
+	printf("%f\n",x);
+	printf("%d\n",c);
+	test();
+	printf("%d\n",123+45);
+	while (b<=40) {
+		b = b+10;
+	}
+	if (b<=60) {
+		test();
+	}
+		else {
+		a = 10;
+	}
+	scanf("%d", &c);
+	printf("%d\n",c);
+	return 0;
+}
@@ -1,113 +1,525 @@
-import argparse, os, logging
+import os, sys, logging
 
+from src import cli
 
-from src.analex import LexicalAnalyser
+# --connect n'a besoin d'aucun module du compilateur : le client est lancé avant de les importer
+if __name__ == "__main__":
+    args = cli.parse_arguments()
+    if args.connect:
+        sys.exit(cli.main_connect(args))
+
+import io, time, json, socketserver, tempfile, shutil, contextlib, atexit, cProfile
+from concurrent.futures import ProcessPoolExecutor
+
+
+from src.analex import LexicalAnalyser, StreamingLexicalAnalyser, TokenStreamLexicalAnalyser
+from src import tokenstream
+from src import anasyn
 from src.anasyn import SyntaxAnalyser
 from src.symboltable import SymbolTable
+from src.syntaxtree import count_instructions
+from src.codegenerator import CodeGenerator, CompilerOptions
+from src.cache import CompilationCache, C_CODE_FILE, SYMBOL_TABLE_FILE, BINARY_FILE
+from src.timereport import TimeReport
+from src.interpreter import Interpreter
+from src.bytecode import Bytecode
+from src.vm import VirtualMachine
 
-def main(input_file, symbol_table_file=None, lexical_analysis_file=None, c_code_file=None, output_file=None):
+def measure(report, phase, children=False):
+    """Context measuring a phase in the TimeReport report, or doing nothing if there is no report."""
+    if report is None:
+        return contextlib.nullcontext()
+    return report.phase(phase, children)
+
+
+def main(input_file, symbol_table_file=None, lexical_analysis_file=None, c_code_file=None, output_file=None, stream=False, work_file="output_code.c", execute=True, cache=None, compiler_options=None, report=None, interpret=False, vm=False, bytecode_file=None):
+    """Compile one pseudo-code file. Returns True if the compilation succeeded and, when it is run, the program exited with code 0.
+    work_file is the path of the intermediate C file, its binary is work_file + ".out".
+    cache is an optional CompilationCache used to skip the compilation of an already compiled source.
+    compiler_options is the CompilerOptions used to build the C code (gcc with its default settings if None).
+    report is an optional TimeReport in which the duration of each phase and the size of the program are recorded.
+    interpret runs the program with the Interpreter instead of building it with the C compiler,
+    vm with the VirtualMachine. bytecode_file is the optional .pcb file where the bytecode of the program is written.
+    A .pcb input file is run by the VirtualMachine without any analysis, a .pct token stream input file is parsed without lexing."""
 
     input_filename = os.path.abspath(input_file)
-    if symbol_table_file:
-        symbol_table_filename = os.path.abspath(symbol_table_file)
+    if input_filename.endswith(".pcb"):
+        return run_bytecode(input_filename, execute, report)
     if lexical_analysis_file:
         lexical_analysis_filename = os.path.abspath(lexical_analysis_file)
-    if c_code_file:
-        c_code_filename = os.path.abspath(c_code_file)
-    if output_file:
-        output_filename = os.path.abspath(output_file)
 
     try:
         f = open(input_filename, 'r')
     except FileNotFoundError:
-        logging.error(f"Error: can't open input file '{input_filename}'!")
-        return
+        logging.error("Error: can't open input file '%s'!", input_filename)
+        return False
+
+    cache_key = None
+    if cache is not None and not (interpret or vm):
+        cache_key = cache.key(input_filename, (compiler_options or CompilerOptions()).as_dict())
+        # Le bytecode n'est pas dans le cache : le programme doit être analysé pour l'écrire
+        entry = cache.get(cache_key) if not bytecode_file else None
+        if entry is not None:
+            logging.info("Compilation of '%s' found in cache.", input_filename)
+            try:
+                return run_cached(entry, f, symbol_table_file, lexical_analysis_file, c_code_file, output_file, work_file, execute, report)
+            except Exception as e:
+                logging.error("Error: %s", e)
+                return False
+            finally:
+                f.close()
     
-    lexical_analyser = LexicalAnalyser()
+    # Un fichier d'unités lexicales est lu sans analyse lexicale, et n'est pas écrit au fil de l'analyse
+    if stream and not is_token_stream(input_filename) and not is_token_stream(lexical_analysis_file or ""):
+        return main_stream(f, symbol_table_file, lexical_analysis_file, c_code_file, output_file, work_file, execute, cache, cache_key, compiler_options, report, interpret, vm, bytecode_file)
 
     try:
-        lineIndex = 0
-        for line in f:
-            line = line.rstrip('\r\n')
-            lexical_analyser.analyse_line(lineIndex, line)
-            lineIndex = lineIndex + 1
+        with measure(report, "lexing"):
+            lexical_analyser = analyse_lexically(f)
         f.close()
     except Exception as e:
         f.close()
-        logging.error(f"Error: {e}")
-        return
+        logging.error("Error: %s", e)
+        return False
 
-    logging.info(f"Lexical analysis completed. {lineIndex} lines processed.")
+    logging.info("Lexical analysis completed. %s lexical units.", len(lexical_analyser.lexical_units))
+    if report is not None:
+        report.count("tokens", len(lexical_analyser.lexical_units))
 
     if lexical_analysis_file:
-        lexical_analyser.save_to_file(lexical_analysis_filename)
+        save_lexical_units(lexical_analyser, lexical_analysis_filename)
         
     symbol_table = SymbolTable()
-    syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=symbol_table)
+    syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=symbol_table, output_file=work_file, fragment_cache=cache)
 
     try:
-        syntax_analyser.analyse()
+        with measure(report, "parsing"):
+            syntax_analyser.parse()
+        with measure(report, "emission"):
+            syntax_analyser.generate()
         logging.info("Syntax analysis completed.")
-        
-        if symbol_table_file:
-            with open(symbol_table_filename, 'w') as output_file:
-                output_file.write(str(symbol_table))
 
-        if c_code_file:
-            syntax_analyser.code_generator.copy_c_file(c_code_filename)
+        return build(syntax_analyser, symbol_table_file, c_code_file, output_file, execute, cache, cache_key, compiler_options, report, interpret, vm, bytecode_file)
 
-        syntax_analyser.code_generator.compile_file()
-        
-        if output_file:
-            syntax_analyser.code_generator.copy_bin_file(output_filename)
-        
-        syntax_analyser.code_generator.execute_file()
+    except Exception as e:
+        logging.error("Error: %s", e)
+        return False
+
+
+def is_token_stream(filename):
+    return filename.endswith(tokenstream.EXTENSION)
+
+
+def analyse_lexically(f):
+    """Lexical analyser of an open input file. A token stream file (.pct) is loaded instead of being lexed."""
+    if is_token_stream(f.name):
+        return TokenStreamLexicalAnalyser(f.name)
+    lexical_analyser = LexicalAnalyser()
+    for lineIndex, line in enumerate(f):
+        lexical_analyser.analyse_line(lineIndex, line.rstrip('\r\n'))
+    return lexical_analyser
+
+
+def save_lexical_units(lexical_analyser, filename):
+    """Write the lexical units as text, or as a token stream that can be compiled again without lexing if filename ends with .pct."""
+    if is_token_stream(filename):
+        lexical_analyser.save_binary(filename)
+    else:
+        lexical_analyser.save_to_file(filename)
 
+
+def main_stream(f, symbol_table_file=None, lexical_analysis_file=None, c_code_file=None, output_file=None, work_file="output_code.c", execute=True, cache=None, cache_key=None, compiler_options=None, report=None, interpret=False, vm=False, bytecode_file=None):
+    """Lexical and syntax analyses run together: the lexer reads the file only when the parser needs more units.
+    The time report has no lexing phase, it is part of the parsing."""
+
+    dump_file = None
+    if lexical_analysis_file:
+        dump_file = open(os.path.abspath(lexical_analysis_file), 'w')
+
+    lexical_analyser = StreamingLexicalAnalyser(f, dump_file=dump_file)
+    symbol_table = SymbolTable()
+    syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=symbol_table, output_file=work_file, fragment_cache=cache)
+
+    try:
+        with measure(report, "parsing"):
+            syntax_analyser.parse()
+            units_read = lexical_analyser.drain()
+        with measure(report, "emission"):
+            syntax_analyser.generate()
+        logging.info("Lexical and syntax analysis completed. %s lexical units processed.", units_read)
+        if report is not None:
+            report.count("tokens", units_read)
     except Exception as e:
-        logging.error(f"Error: {e}")
-        return
+        logging.error("Error: %s", e)
+        return False
+    finally:
+        f.close()
+        if dump_file:
+            dump_file.close()
+
+    try:
+        return build(syntax_analyser, symbol_table_file, c_code_file, output_file, execute, cache, cache_key, compiler_options, report, interpret, vm, bytecode_file)
+    except Exception as e:
+        logging.error("Error: %s", e)
+        return False
+
+
+def build(syntax_analyser, symbol_table_file=None, c_code_file=None, output_file=None, execute=True, cache=None, cache_key=None, compiler_options=None, report=None, interpret=False, vm=False, bytecode_file=None):
+    """Write the requested outputs of an analysed program, then compile it and, if asked, run it.
+    Returns False if the program was run and exited with a non-zero code.
+    With interpret or vm, the program is run by the Interpreter or the VirtualMachine: there is no C compilation and no binary."""
+
+    symbol_table = syntax_analyser.symbol_table
+    if report is not None:
+        report.count("symbols", len(symbol_table.entries))
+        report.count("statements", count_instructions(syntax_analyser.program))
+        report.count("bytes", len(syntax_analyser.code_generator.get_code().encode()))
+    if symbol_table_file:
+        symbol_table_filename = os.path.abspath(symbol_table_file)
+    if c_code_file:
+        c_code_filename = os.path.abspath(c_code_file)
+    if output_file:
+        output_filename = os.path.abspath(output_file)
+
+    if symbol_table_file:
+        with open(symbol_table_filename, 'w') as symbol_table_output:
+            symbol_table_output.write(str(symbol_table))
+
+    if c_code_file:
+        syntax_analyser.code_generator.copy_c_file(c_code_filename)
+
+    if vm or bytecode_file:
+        with measure(report, "bytecode"):
+            bytecode = syntax_analyser.generate_bytecode()
+        if bytecode_file:
+            bytecode.save(os.path.abspath(bytecode_file))
+
+    if interpret or vm:
+        if output_file:
+            logging.warning("No binary is built by the interpreter, '%s' is not written.", output_filename)
+        if execute:
+            with measure(report, "execution"):
+                if vm:
+                    exit_code = VirtualMachine(bytecode).run()
+                else:
+                    exit_code = Interpreter(syntax_analyser.program).run()
+            return cli.check_exit_code(exit_code)
+        return True
+
+    if compiler_options is not None:
+        syntax_analyser.code_generator.compiler_options = compiler_options
+    with measure(report, "gcc", children=True):
+        syntax_analyser.code_generator.compile_file()
+
+    binary_filename = f"{syntax_analyser.code_generator.output_file}.out"
+    if cache is not None and os.path.isfile(binary_filename):
+        cache.put(cache_key, syntax_analyser.code_generator.get_code(), str(symbol_table), binary_filename)
     
+    if output_file:
+        syntax_analyser.code_generator.copy_bin_file(output_filename)
+    
+    if execute:
+        with measure(report, "execution", children=True):
+            exit_code = syntax_analyser.code_generator.execute_file()
+        return cli.check_exit_code(exit_code)
+    return True
+
 
+def run_cached(entry, f, symbol_table_file=None, lexical_analysis_file=None, c_code_file=None, output_file=None, work_file="output_code.c", execute=True, report=None):
+    """Write the requested outputs of a compilation found in the cache, then run its binary.
+    Only the lexical analysis dump, which is not cached, needs to analyse the source again.
+    The time report has only the execution phase. Returns False if the program exited with a non-zero code."""
 
-parser = argparse.ArgumentParser(description="Pseudo-code compiler")
-parser.add_argument("input_file", help="Input file containing pseudo code")
+    if lexical_analysis_file:
+        save_lexical_units(analyse_lexically(f), os.path.abspath(lexical_analysis_file))
 
-# -al to choose the output file for the lexical analyser
-parser.add_argument("-al", "--lexical_analysis", help="Output file for the lexical analyser")
+    if symbol_table_file:
+        shutil.copyfile(os.path.join(entry, SYMBOL_TABLE_FILE), os.path.abspath(symbol_table_file))
 
-# -st to choose the output file for the symbol table
-parser.add_argument("-st", "--symbol_table", help="Output file for the symbol table")
+    if c_code_file:
+        shutil.copyfile(os.path.join(entry, C_CODE_FILE), os.path.abspath(c_code_file))
 
-# -c to choose the output file for the c code
-parser.add_argument("-c", "--c_code", help="Output file for the C code")
+    code_generator = CodeGenerator(work_file)
+    shutil.copy2(os.path.join(entry, BINARY_FILE), f"{code_generator.output_file}.out")
 
-# -o to choose output file
-parser.add_argument("-o", "--output_file", help="Output file for the compiled code")
+    if output_file:
+        code_generator.copy_bin_file(os.path.abspath(output_file))
 
-# -v for verbose output
-parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose output", default=False)
+    if execute:
+        with measure(report, "execution", children=True):
+            exit_code = code_generator.execute_file()
+        return cli.check_exit_code(exit_code)
+    return True
 
-# -d for debug output
-parser.add_argument("-d", "--debug", action="store_true", help="Enable debug output", default=False)
 
-args = parser.parse_args()
+def run_bytecode(input_filename, execute=True, report=None):
+    """Run a .pcb file written with --bytecode. The program is neither analysed nor compiled again.
+    The time report has the loading of the bytecode and the execution phases."""
 
-if __name__ == "__main__":
+    try:
+        with measure(report, "bytecode"):
+            bytecode = Bytecode.load(input_filename)
+    except FileNotFoundError:
+        logging.error("Error: can't open input file '%s'!", input_filename)
+        return False
+    except Exception as e:
+        logging.error("Error: %s", e)
+        return False
 
-    if args.verbose:
-        logging.getLogger().setLevel(logging.INFO)
+    if execute:
+        try:
+            with measure(report, "execution"):
+                exit_code = VirtualMachine(bytecode).run()
+        except Exception as e:
+            logging.error("Error: %s", e)
+            return False
+        return cli.check_exit_code(exit_code)
+    return True
+
+
+def main_batch(input_files, symbol_table_dir=None, lexical_analysis_dir=None, c_code_dir=None, output_dir=None, stream=False, jobs=1, cache=None, compiler_options=None, time_report=None, interpret=False, vm=False, bytecode_dir=None):
+    """Compile several files in the same process, or in jobs worker processes.
+    The output options are directories. Returns the list of the files whose compilation failed.
+    The interpreted programs are all run in this process, one after the other.
+    time_report is the format ("table" or "json") of the time report printed for each file, None for no report."""
+
+    for directory in (symbol_table_dir, lexical_analysis_dir, c_code_dir, output_dir, bytecode_dir):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    root = cli.input_root(input_files) if input_files else None
+
+    def options(input_file):
+        return dict(
+            symbol_table_file=cli.batch_output(symbol_table_dir, input_file, ".st.txt", root),
+            lexical_analysis_file=cli.batch_output(lexical_analysis_dir, input_file, ".al.txt", root),
+            c_code_file=cli.batch_output(c_code_dir, input_file, ".c", root),
+            output_file=cli.batch_output(output_dir, input_file, ".out", root),
+            stream=stream,
+            cache=cache,
+            compiler_options=compiler_options,
+            interpret=interpret,
+            vm=vm,
+            bytecode_file=cli.batch_output(bytecode_dir, input_file, ".pcb", root)
+        )
+
+    failures = []
+    start = time.perf_counter()
+    if jobs > 1 and not (interpret or vm):
+        # Every compilation gets its own intermediate files, the programs are then run here in input order
+        with tempfile.TemporaryDirectory(prefix="pcode") as work_dir, ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = []
+            for index, input_file in enumerate(input_files):
+                work_file = os.path.join(work_dir, f"{index}.c")
+                report = TimeReport(input_file) if time_report else None
+                futures.append((input_file, work_file, pool.submit(compile_worker, input_file, work_file, options(input_file), report)))
+            for input_file, work_file, future in futures:
+                success, records, report = future.result()
+                cli.replay_records(records)
+                if success:
+                    try:
+                        with measure(report, "execution", children=True):
+                            success = cli.check_exit_code(CodeGenerator(work_file).execute_file())
+                    except Exception as e:
+                        logging.error("Error: %s", e)
+                        success = False
+                if not success:
+                    failures.append(input_file)
+                if report is not None:
+                    print(report.format(time_report), file=sys.stderr)
     else:
-        logging.getLogger().setLevel(logging.WARNING)
+        for input_file in input_files:
+            logging.info("Compiling '%s'", input_file)
+            report = TimeReport(input_file) if time_report else None
+            if not main(input_file=input_file, report=report, **options(input_file)):
+                failures.append(input_file)
+            if report is not None:
+                print(report.format(time_report), file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    print_summary(input_files, failures, elapsed)
+    return failures
+
+
+class RecordCollector(logging.Handler):
+    """Logging handler keeping the messages of a worker so that the parent process can replay them."""
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record.levelno, record.name, record.getMessage()))
+
+
+@contextlib.contextmanager
+def collect_records():
+    """Replace the handlers of the root logger by a RecordCollector while the block runs."""
+    root = logging.getLogger()
+    handlers = root.handlers
+    collector = RecordCollector()
+    root.handlers = [collector]
+    try:
+        yield collector
+    finally:
+        root.handlers = handlers
+
 
+def compile_worker(input_file, work_file, options, report=None):
+    """Compile one file in a worker process without running it.
+    Returns whether the compilation succeeded, the logged messages and the filled time report."""
+    with collect_records() as collector:
+        collector.records.append((logging.INFO, "root", f"Compiling '{input_file}'"))
+        success = main(input_file=input_file, work_file=work_file, execute=False, report=report, **options)
+    return success, [record for record in collector.records if record[0] >= logging.getLogger().getEffectiveLevel()], report
+
+
+def print_summary(input_files, failures, elapsed):
+    """Print the result of a batch compilation and its throughput."""
+    count = len(input_files)
+    print(f"{count - len(failures)}/{count} files compiled, {len(failures)} failed in {elapsed:.3f}s", file=sys.stderr)
+    if count:
+        print(f"{elapsed / count * 1000:.2f} ms per file, {count / elapsed:.1f} files/s", file=sys.stderr)
+    for input_file in failures:
+        print(f"FAILED {input_file}", file=sys.stderr)
+
+
+def compile_source(request, cache=None):
+    """Compile the source text of a server request, without running it.
+
+    The request holds the source text, the wanted outputs ("lexical_analysis", "binary") and
+    optionally the "compiler_options" (fields of CompilerOptions) used to build the binary.
+    The response holds the generated C code, the symbol table, the lexical analysis if asked,
+    the diagnostics and the path of the binary if asked (the caller removes it once used)."""
+    response = {"success": False, "c_code": None, "symbol_table": None, "lexical_analysis": None, "binary": None}
+    work_dir = tempfile.mkdtemp(prefix="pcode")
+    with collect_records() as collector:
+        try:
+            lexical_analyser = LexicalAnalyser()
+            for lineIndex, line in enumerate(io.StringIO(request["source"])):
+                lexical_analyser.analyse_line(lineIndex, line.rstrip('\r\n'))
+            if request.get("lexical_analysis"):
+                response["lexical_analysis"] = "".join("%s" % lexical_unit for lexical_unit in lexical_analyser.lexical_units)
+
+            symbol_table = SymbolTable()
+            syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=symbol_table, output_file=os.path.join(work_dir, "program.c"), fragment_cache=cache)
+            syntax_analyser.analyse()
+            response["c_code"] = syntax_analyser.code_generator.get_code()
+            response["symbol_table"] = str(symbol_table)
+
+            if request.get("binary"):
+                syntax_analyser.code_generator.compiler_options = CompilerOptions(**request.get("compiler_options", {}))
+                syntax_analyser.code_generator.compile_file()
+                response["binary"] = f"{syntax_analyser.code_generator.output_file}.out"
+            response["success"] = True
+        except Exception as e:
+            logging.error("Error: %s", e)
+    if response["binary"] is None:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    response["diagnostics"] = [record for record in collector.records if record[0] >= logging.getLogger().getEffectiveLevel()]
+    return response
+
+
+class CompileRequestHandler(socketserver.StreamRequestHandler):
+    """A request is a JSON object sent before the client shuts down its side of the connection."""
+    def handle(self):
+        start = time.perf_counter()
+        try:
+            request = json.loads(self.rfile.read())
+            response = compile_source(request, self.server.cache)
+        except ValueError as e:
+            response = {"success": False, "diagnostics": [(logging.ERROR, "root", f"Error: invalid request: {e}")]}
+        self.wfile.write(json.dumps(response).encode())
+        logging.info("Request handled in %.2f ms", (time.perf_counter() - start) * 1000)
+
+
+class CompileServer(socketserver.UnixStreamServer):
+    def __init__(self, socket_path, cache=None):
+        self.cache = cache
+        super().__init__(socket_path, CompileRequestHandler)
+
+
+def serve(socket_path, cache=None):
+    """Stay resident and compile the requests received on a Unix domain socket."""
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    with CompileServer(socket_path, cache) as server:
+        logging.warning("Compile server listening on '%s'", socket_path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(socket_path)
+
+
+def dump_profile(profiler, filename):
+    """Stop the profiler and write its statistics, to be read with pstats or snakeviz."""
+    profiler.disable()
+    profiler.dump_stats(filename)
+    logging.warning("Profile written to '%s'", filename)
+
+
+if __name__ == "__main__":
     if args.debug:
-        logging.getLogger().setLevel(logging.DEBUG)
-
-    main(
-        input_file=args.input_file,
-        symbol_table_file=args.symbol_table,
-        lexical_analysis_file=args.lexical_analysis,
-        c_code_file=args.c_code,
-        output_file=args.output_file
-    )
+        anasyn.TRACE = True
+
+    if args.profile:
+        profiler = cProfile.Profile()
+        atexit.register(dump_profile, profiler, args.profile)
+        profiler.enable()
+
+    if args.release:
+        compiler_options = CompilerOptions.release(args.cc)
+    else:
+        compiler_options = CompilerOptions(args.cc, args.optimisation, args.march_native, args.lto)
+
+    cache = None
+    if not args.no_cache:
+        cache = CompilationCache(args.cache_dir)
+
+    if args.serve:
+        serve(args.serve, cache)
+        sys.exit(0)
+
+    input_files = cli.expand_inputs(args.input_files)
+
+    single_input = len(args.input_files) == 1 and input_files == args.input_files
+
+    if single_input:
+        report = TimeReport(input_files[0]) if args.time_report else None
+        success = main(
+            input_file=input_files[0],
+            symbol_table_file=args.symbol_table,
+            lexical_analysis_file=args.lexical_analysis,
+            c_code_file=args.c_code,
+            output_file=args.output_file,
+            stream=args.stream,
+            cache=cache,
+            compiler_options=compiler_options,
+            report=report,
+            interpret=args.interpret,
+            vm=args.vm,
+            bytecode_file=args.bytecode
+        )
+        if report is not None:
+            print(report.format(args.time_report), file=sys.stderr)
+        sys.exit(0 if success else 1)
+    else:
+        failures = main_batch(
+            input_files,
+            symbol_table_dir=args.symbol_table,
+            lexical_analysis_dir=args.lexical_analysis,
+            c_code_dir=args.c_code,
+            output_dir=args.output_file,
+            stream=args.stream,
+            jobs=args.jobs,
+            cache=cache,
+            compiler_options=compiler_options,
+            time_report=args.time_report,
+            interpret=args.interpret,
+            vm=args.vm,
+            bytecode_dir=args.bytecode
+        )
+        sys.exit(1 if failures else 0)
     
 # pcComp code.pcode -al analex.txt -st symboltabl.txt -c output.c -o output
\ No newline at end of file
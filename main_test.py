@@ -1,8 +1,21 @@
-from src.analex import LexicalAnalyser
+from src.analex import LexicalAnalyser, StreamingLexicalAnalyser, TokenStreamLexicalAnalyser, tokenize_line, iter_lexical_units
+from src.lexicalunit import Integer
 from src.anasyn import SyntaxAnalyser
-from src.symboltable import SymbolTable
+from src.symboltable import SymbolTable, SymbolTableError
+from src.cache import CompilationCache
+from src.codegenerator import CodeGenerator, CompilerOptions, CompilationError
+from src.interpreter import Interpreter
+from src.bytecode import Bytecode
+from src.vm import VirtualMachine
+from src import timereport
+import benchmark
 
+import io
+import os
+import sys
+import subprocess
 import logging
+import pytest
 
 def main():
     filename = "example/input.pcode"
@@ -42,9 +55,577 @@ def main():
         print(f"Error: {e}")
         return
     
-    
-    
-    
+
+def analyse_source(lexical_analyser, source):
+    lineIndex = 0
+    for line in source.split("\n"):
+        lexical_analyser.analyse_line(lineIndex, line)
+        lineIndex = lineIndex + 1
+
+
+def tree_values(node):
+    # Contenu d'un arbre syntaxique, pour comparer deux arbres construits séparément
+    if isinstance(node, list):
+        return [tree_values(child) for child in node]
+    slots = [slot for node_class in type(node).__mro__ for slot in getattr(node_class, "__slots__", ())]
+    if not slots:
+        return node
+    return (type(node).__name__,) + tuple(tree_values(getattr(node, slot)) for slot in slots)
+
+
+def test_generated_code(tmp_path):
+    """The C code of the example, buffered in memory, is the one of example/output_code.c (baseline generator, no folding)."""
+    with open("example/input.pcode", 'r') as f:
+        source = f.read()
+    lexical_analyser = LexicalAnalyser()
+    analyse_source(lexical_analyser, source)
+    syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable(), fold_constants=False)
+    syntax_analyser.analyse()
+    code = syntax_analyser.code_generator.get_code()
+
+    with open("example/output_code.c", 'r') as f:
+        assert code == f.read()
+    syntax_analyser.code_generator.copy_c_file(tmp_path / "input.c")
+    assert (tmp_path / "input.c").read_text() == code
+
+
+def test_peek():
+    """peek() and the is_*_at() helpers look at the next units without moving the current one."""
+    lexical_analyser = LexicalAnalyser()
+    analyse_source(lexical_analyser, "f(x) = 1.5\ny = 2")
+    lexical_analyser.init_analyser()
+    lexical_analyser.acceptIdentifier()
+
+    assert lexical_analyser.peek().get_value() == "("
+    assert lexical_analyser.is_identifier_at(1) and lexical_analyser.is_symbol_at(2, ")")
+    assert lexical_analyser.is_integer_at(4) and not lexical_analyser.is_keyword_at(4, "Vrai")
+    assert lexical_analyser.peek(-1).get_value() == "f" and lexical_analyser.peek(-2) is None
+    assert lexical_analyser.peek(100) is None and not lexical_analyser.is_symbol_at(100, ")")
+    assert lexical_analyser.get_value() == "("
+
+    # Un entier en fin d'entrée n'est pas le début d'un flottant
+    lexical_analyser.skip(9)
+    assert lexical_analyser.isInteger() and not lexical_analyser.isFloat2()
+
+
+def test_tokenizer():
+    """The lexical units of a line are the ones of the character by character lexer it replaced."""
+    with open("example/input.pcode", 'r') as f:
+        dump = "".join(str(unit) for unit in iter_lexical_units(f))
+    with open("example/output.txt", 'r') as f:
+        assert dump == f.read()
+
+    # Chaîne non terminée, identifiants commençant par un mot-clé, symboles de deux caractères
+    lines = ['s = "abc', "Sinonx Fin2 entierement Vrai1 entree", "f(a)->b = c-d // fin", "x = y->z-1.25;"]
+    dump = "".join(str(unit) for index, line in enumerate(lines) for unit in tokenize_line(index, line))
+    assert dump == "".join(line + "\n" for line in [
+        "Identifier\t0\t0\t1\ts",
+        "Symbol\t0\t2\t1\t=",
+        "String\t0\t4\t4\t\"abc",
+        "Identifier\t1\t0\t6\tSinonx",
+        "Identifier\t1\t7\t4\tFin2",
+        "Identifier\t1\t12\t11\tentierement",
+        "Identifier\t1\t24\t5\tVrai1",
+        "Keyword\t1\t30\t6\tentree",
+        "Identifier\t2\t0\t1\tf",
+        "Symbol\t2\t1\t1\t(",
+        "Identifier\t2\t2\t1\ta",
+        "Symbol\t2\t3\t1\t)",
+        "Symbol\t2\t4\t2\t->",
+        "Identifier\t2\t6\t1\tb",
+        "Symbol\t2\t8\t1\t=",
+        "Identifier\t2\t10\t1\tc",
+        "Symbol\t2\t11\t1\t-",
+        "Identifier\t2\t12\t1\td",
+        "Identifier\t3\t0\t1\tx",
+        "Symbol\t3\t2\t1\t=",
+        "Identifier\t3\t4\t1\ty",
+        "Symbol\t3\t5\t2\t->",
+        "Identifier\t3\t7\t1\tz",
+        "Symbol\t3\t8\t1\t-",
+        "Integer\t3\t9\t1\t1",
+        "Symbol\t3\t10\t1\t.",
+        "Integer\t3\t11\t2\t25",
+        "Symbol\t3\t13\t1\t;"
+    ])
+
+
+def test_streaming(tmp_path):
+    """The streaming lexer gives the same units, syntax tree and C code as lexing the whole file first."""
+    sources = []
+    for filename in ("example/input.pcode", "example/boucles.pcode"):
+        with open(filename, 'r') as f:
+            sources.append(f.read())
+    # Définition bien plus longue que la fenêtre d'unités gardée par le lexer
+    sources.append("\n".join(
+        ["Programme Fenetre", "    Prototypes :", "        Procedure p(n : entree entier)", "    Definitions :",
+         "        Procedure p(n : entree entier) :", "            Variables :", "                x : entier", "            Debut"]
+        + ["                x = n * 2 + x"] * 600
+        + ["            Fin", "Debut Programme", "    p(1)", "Fin Programme"]
+    ))
+
+    # Avec le cache de fragments, la définition est lue jusqu'au bout avant d'être analysée, puis sautée
+    for fragment_cache in (None, CompilationCache(tmp_path), CompilationCache(tmp_path)):
+        for source in sources:
+            lexical_analyser = LexicalAnalyser()
+            analyse_source(lexical_analyser, source)
+            eager = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable())
+            eager.analyse()
+
+            dump = io.StringIO()
+            streaming_analyser = StreamingLexicalAnalyser(io.StringIO(source), dump_file=dump)
+            streaming = SyntaxAnalyser(lexical_analyser=streaming_analyser, symbol_table=SymbolTable(), fragment_cache=fragment_cache)
+            streaming.analyse()
+            streaming_analyser.drain()
+
+            assert dump.getvalue() == "".join(str(unit) for unit in lexical_analyser.lexical_units)
+            assert tree_values(streaming.program) == tree_values(eager.program)
+            assert streaming.code_generator.get_code() == eager.code_generator.get_code()
+            assert len(streaming_analyser.window) < len(lexical_analyser.lexical_units)
+
+
+def test_lexical_unit_slots():
+    """Lexical units have no instance dictionary, and repeated names share one string."""
+    lexical_analyser = LexicalAnalyser()
+    analyse_source(lexical_analyser, "total = total + 1\ntotal = 2.5")
+    units = lexical_analyser.lexical_units
+
+    assert all(not hasattr(unit, "__dict__") for unit in units)
+    assert [unit.__class__.__name__ for unit in units[:5]] == ["Identifier", "Symbol", "Identifier", "Symbol", "Integer"]
+    assert units[0].get_value() is units[2].get_value() is units[5].get_value()
+    assert units[4].is_integer() and units[4].get_value() == 1 and units[5].get_line_index() == 1
+    assert "".join(str(unit) for unit in units) == "".join(line + "\n" for line in [
+        "Identifier\t0\t0\t5\ttotal", "Symbol\t0\t6\t1\t=", "Identifier\t0\t8\t5\ttotal", "Symbol\t0\t14\t1\t+",
+        "Integer\t0\t16\t1\t1", "Identifier\t1\t0\t5\ttotal", "Symbol\t1\t6\t1\t=", "Integer\t1\t8\t1\t2",
+        "Symbol\t1\t9\t1\t.", "Integer\t1\t10\t1\t5",
+    ])
+
+
+def test_print_formats():
+    """Each afficher() expression is written once, with the printf format of its type."""
+    source = """Programme Affichage
+    Prototypes :
+        Fonction f(n : entree entier) -> flottant
+    Definitions :
+        Fonction f(n : entree entier) -> flottant :
+            Debut
+                Renvoyer 1.5
+            Fin
+    Variables :
+        i : entier
+        s : chaine
+Debut Programme
+    afficher(i + 1)
+    afficher(f(i))
+    afficher(i inf 2 et i sup 0)
+    afficher(s)
+    afficher("texte")
+Fin Programme"""
+    lexical_analyser = LexicalAnalyser()
+    analyse_source(lexical_analyser, source)
+    syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable())
+    syntax_analyser.analyse()
+    code = syntax_analyser.code_generator.get_code()
+
+    assert 'printf("%d\\n",i+1);' in code
+    assert 'printf("%f\\n",f(i));' in code and code.count("f(i)") == 1
+    assert 'printf("%d\\n",i<2&&i>0);' in code
+    assert 'printf("%s\\n",s);' in code
+    assert 'printf("%s\\n","texte");' in code
+
+
+def test_symbol_table_scopes():
+    """Entries are looked up in the current scope of the scope stack, or in the one given."""
+    symbol_table = SymbolTable()
+    symbol_table.add_entry("x", "entier", "variable", None)
+    symbol_table.enter_scope("f")
+    symbol_table.add_entry("x", "flottant", "variable", None, "entree")
+    symbol_table.add_entry("y", "booleen", "variable", None)
+
+    assert symbol_table.current_scope == "f"
+    assert symbol_table.lookup("x").type == "flottant"
+    assert symbol_table.lookup("x", "global").type == "entier"
+    with pytest.raises(SymbolTableError):
+        symbol_table.add_entry("y", "entier", "variable", None)
+
+    symbol_table.leave_scope()
+    symbol_table.leave_scope() # la portée globale reste toujours au fond de la pile
+    assert symbol_table.current_scope == "global"
+    assert symbol_table.lookup("x").type == "entier" and symbol_table.lookup("y") is None
+
+    restored = SymbolTable()
+    restored.restore_entries(symbol_table.entries)
+    assert str(restored) == str(symbol_table)
+    assert restored.lookup("y", "f").type == "booleen"
+    with pytest.raises(SymbolTableError):
+        restored.restore_entries(symbol_table.entries[:1])
+
+
+def test_independent_compilations():
+    """Several programs compiled in the same process must not share any state."""
+    with open("example/input.pcode", 'r') as f:
+        sources = [f.read()]
+    for i in range(1, 5):
+        sources.append(f"""Programme P{i}
+    Variables :
+        v{i} : entier
+Debut Programme
+    v{i} = {i}
+    afficher(v{i} * {i})
+Fin Programme""")
+
+    # Each program compiled alone
+    expected = []
+    for source in sources:
+        lexical_analyser = LexicalAnalyser()
+        analyse_source(lexical_analyser, source)
+        syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable())
+        syntax_analyser.analyse()
+        expected.append((len(lexical_analyser.lexical_units), syntax_analyser.code_generator.get_code(), str(syntax_analyser.symbol_table)))
+
+    # All programs lexed first, then all parsed, in the same process
+    lexical_analysers = []
+    for source in sources:
+        lexical_analyser = LexicalAnalyser()
+        analyse_source(lexical_analyser, source)
+        lexical_analysers.append(lexical_analyser)
+    syntax_analysers = []
+    for i, lexical_analyser in enumerate(lexical_analysers):
+        syntax_analysers.append(SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable(), output_file=f"output_code_{i}.c"))
+    for syntax_analyser in syntax_analysers:
+        syntax_analyser.analyse()
+
+    results = [(len(s.lexical_analyser.lexical_units), s.code_generator.get_code(), str(s.symbol_table)) for s in syntax_analysers]
+    assert results == expected
+    assert len(set(code for _, code, _ in results)) == len(sources)
+    assert len(set(s.code_generator.output_file for s in syntax_analysers)) == len(sources)
+
+
+def test_compilation_cache(tmp_path):
+    """An unchanged source is taken from the cache, an edited one is compiled again, --no-cache skips the cache."""
+    source = tmp_path / "cache.pcode"
+    cache_dir = tmp_path / "cache"
+
+    def compile_source(*options):
+        result = subprocess.run([sys.executable, os.path.abspath("main.py"), "-v", "--cache-dir", str(cache_dir), *options, str(source)],
+                                cwd=tmp_path, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        return result.stdout, "found in cache" in result.stderr
+
+    source.write_text("Programme Cache\nDebut Programme\n    afficher(1)\nFin Programme\n")
+    assert compile_source() == ("1\n", False)
+    assert compile_source() == ("1\n", True)
+    entries = sorted(os.listdir(cache_dir))
+    assert compile_source("--no-cache") == ("1\n", False)
+    assert sorted(os.listdir(cache_dir)) == entries
+
+    source.write_text("Programme Cache\nDebut Programme\n    afficher(2)\nFin Programme\n")
+    assert compile_source() == ("2\n", False)
+    assert compile_source() == ("2\n", True)
+
+
+def test_batch_outputs(tmp_path):
+    """Files with the same name in different directories keep their relative path under the output directories."""
+    for directory, value in (("a", 1), ("b/c", 2)):
+        (tmp_path / directory).mkdir(parents=True)
+        (tmp_path / directory / "prog.pcode").write_text(f"Programme Prog\nDebut Programme\n    afficher({value})\nFin Programme\n")
+    result = subprocess.run([sys.executable, os.path.abspath("main.py"), "--no-cache", "-c", "c_code", str(tmp_path / "**" / "*.pcode")],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "printf(\"%d\\n\",1);" in (tmp_path / "c_code" / "a" / "prog.c").read_text()
+    assert "printf(\"%d\\n\",2);" in (tmp_path / "c_code" / "b" / "c" / "prog.c").read_text()
+
+
+def test_program_exit_code(tmp_path):
+    """A program ending with a non-zero exit code counts as a failure, alone or in a batch."""
+    (tmp_path / "pile.pcode").write_text(
+        "Programme Pile\n    Prototypes :\n        Fonction f(n : entree entier) -> entier\n"
+        "    Definitions :\n        Fonction f(n : entree entier) -> entier :\n            Debut\n                Renvoyer f(n + 1)\n            Fin\n"
+        "Debut Programme\n    afficher(f(0))\nFin Programme\n")
+    (tmp_path / "ok.pcode").write_text("Programme Ok\nDebut Programme\n    afficher(1)\nFin Programme\n")
+    for inputs in (["pile.pcode"], ["pile.pcode", "ok.pcode"], ["-j", "2", "pile.pcode", "ok.pcode"]):
+        result = subprocess.run([sys.executable, os.path.abspath("main.py"), "--no-cache", *inputs], cwd=tmp_path, capture_output=True, text=True)
+        assert result.returncode == 1
+        assert "the program exited with code" in result.stderr
+
+
+def test_cache_eviction(tmp_path):
+    """The least recently used entries are removed once the cache is larger than max_size."""
+    binary = tmp_path / "program.out"
+    binary.write_bytes(b"\0" * 1000)
+    cache = CompilationCache(tmp_path / "cache", max_size=2500)
+    cache.put("a", "", "", binary)
+    cache.put("b", "", "", binary)
+    os.utime(cache.entry_path("a"), (1000, 1000))
+    os.utime(cache.entry_path("b"), (2000, 2000))
+    assert cache.get("a") is not None   # "a" devient l'entrée la plus récemment utilisée
+
+    cache.put("c", "", "", binary)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+    # Les fragments des définitions comptent aussi dans la taille du cache
+    os.utime(cache.entry_path("a"), (1000, 1000))
+    cache.put_fragment("f", "\0" * 1000, [])
+    assert cache.get("a") is None
+    assert cache.get_fragment("f") is not None and cache.get("c") is not None
+
+
+def test_incremental_definitions(tmp_path):
+    """Unchanged definitions are reused from the cache and give the same result as a full compilation."""
+    with open("example/input.pcode", 'r') as f:
+        source = f.read()
+    modified_source = source.replace("Renvoyer a+b", "Renvoyer b+a")
+    assert modified_source != source
+
+    class RecordingCache(CompilationCache):
+        def get_fragment(self, key):
+            fragment = super().get_fragment(key)
+            reused.append(fragment is not None)
+            return fragment
+
+    cache = RecordingCache(tmp_path)
+    reused = []
+    for text in (source, modified_source):
+        lexical_analyser = LexicalAnalyser()
+        analyse_source(lexical_analyser, text)
+        syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable(), fragment_cache=cache)
+        syntax_analyser.analyse()
+
+        lexical_analyser = LexicalAnalyser()
+        analyse_source(lexical_analyser, text)
+        full_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable())
+        full_analyser.analyse()
+
+        assert syntax_analyser.code_generator.get_code() == full_analyser.code_generator.get_code()
+        assert str(syntax_analyser.symbol_table) == str(full_analyser.symbol_table)
+
+    # First compilation: nothing cached. Second one: only the modified function is compiled again
+    assert reused == [False, False, True, False]
+
+
+def test_compilation_error(tmp_path):
+    """A program rejected by the C compiler, or a missing compiler, raises CompilationError."""
+    code_generator = CodeGenerator(tmp_path / "error.c")
+    code_generator.write("int main() {")
+    code_generator.write("return inconnue;")
+    code_generator.write("}")
+    with pytest.raises(CompilationError) as error:
+        code_generator.compile_file()
+    assert "inconnue" in error.value.diagnostics
+    assert not os.path.exists(tmp_path / "error.c.out")
+
+    code_generator.compiler_options = CompilerOptions("compilateur-introuvable")
+    with pytest.raises(CompilationError):
+        code_generator.compile_file()
+
+
+def test_constant_folding():
+    """Constant expressions are computed like C would, and branches known at compile time are removed."""
+    source = """Programme Pliage
+    Variables :
+        x : entier
+Debut Programme
+    x = 2 * 3 + x * 1
+    afficher(0 - 7 / 2 modulo 3 - x)
+    Si Vrai ou x egal 1 Alors
+        afficher(x)
+    Fin Si
+    Sinon
+        afficher(0)
+    Fin Sinon
+    Tant que non Vrai Faire
+        x = x + 1
+    Fin Tant que
+Fin Programme"""
+    lexical_analyser = LexicalAnalyser()
+    analyse_source(lexical_analyser, source)
+    syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable())
+    syntax_analyser.analyse()
+    code = syntax_analyser.code_generator.get_code()
+
+    assert "x = 6+x;" in code
+    assert 'printf("%d\\n",0-x);' in code
+    assert "if" not in code and "else" not in code and "while" not in code
+    assert 'printf("%d\\n",x);' in code and 'printf("%d\\n",0);' not in code
+
+    # Dans l'exemple, seul afficher(123+45) est calculé à la compilation
+    with open("example/input.pcode", 'r') as f:
+        source = f.read()
+    lexical_analyser = LexicalAnalyser()
+    analyse_source(lexical_analyser, source)
+    syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable())
+    syntax_analyser.analyse()
+    with open("example/output_code.c", 'r') as f:
+        expected = f.read().replace('printf("%d\\n",123+45);', 'printf("%d\\n",168);')
+    assert syntax_analyser.code_generator.get_code() == expected
+
+
+def test_syntax_tree():
+    """The parser builds a typed tree; the C code is written from it once the whole program is checked."""
+    with open("example/input.pcode", 'r') as f:
+        source = f.read()
+    lexical_analyser = LexicalAnalyser()
+    analyse_source(lexical_analyser, source)
+    syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable())
+    syntax_analyser.analyse()
+    program = syntax_analyser.program
+
+    assert [prototype.name for prototype in program.prototypes] == [definition.name for definition in program.definitions]
+    assert all(definition.type in (None, "entier", "flottant", "booleen", "chaine") for definition in program.definitions)
+
+    code_generator = CodeGenerator("tree.c")
+    code_generator.write_program(program)
+    assert syntax_analyser.code_generator.get_code().endswith(code_generator.get_code())
+
+
+def test_long_lists():
+    """Instruction sequences and expression chains much longer than the recursion limit are parsed."""
+    count = 3 * sys.getrecursionlimit()
+    source = "\n".join(
+        ["Programme Long", "    Variables :", "        x : entier", "        b : booleen", "Debut Programme"]
+        + ["    x = x + 1"] * count
+        + ["    afficher(" + " + ".join(["x"] * count) + ")"]
+        + ["    afficher(" + " egal ".join(["b"] * count) + ")", "Fin Programme"]
+    )
+    # Les suites de comparaisons sont aussi simplifiées, puis écrites, sans récursion
+    for fold_constants in (True, False):
+        lexical_analyser = LexicalAnalyser()
+        analyse_source(lexical_analyser, source)
+        syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable(), fold_constants=fold_constants)
+        syntax_analyser.analyse()
+
+        assert len(syntax_analyser.program.body) == count + 2
+        assert syntax_analyser.code_generator.get_code().count("x = x+1;") == count
+        assert 'printf("%d\\n",' + "==".join(["b"] * count) + ");" in syntax_analyser.code_generator.get_code()
+
+
+def test_benchmark_programs():
+    """The programs of the benchmark generators are valid at every size."""
+    for name, (generator, sizes) in benchmark.BENCHMARKS.items():
+        for size in (1, 2, sizes[0]):
+            report = benchmark.run_once(generator(size))
+            assert report.counts["tokens"] > 0
+            assert set(report.phases) == {"lexing", "parsing", "emission"}
+
+
+@pytest.mark.parametrize("resettable", [True, False])
+def test_time_report_memory(monkeypatch, resettable):
+    """Each phase run in this process reports its own peak memory, not the peak of the earlier phases."""
+    if not resettable:
+        monkeypatch.setattr(timereport, "reset_max_rss", lambda: False)
+    report = timereport.TimeReport("memory")
+    with report.phase("parsing"):
+        data = b"x" * (100 * 2**20)
+        del data
+    with report.phase("emission"):
+        pass
+    assert report.phases["emission"]["max_rss"] < report.phases["parsing"]["max_rss"] - 50 * 2**20
+
+
+def test_interpreter():
+    """The interpreter prints what the C program would print."""
+    source = """Programme Interprete
+    Prototypes :
+        Fonction fact(n : entree entier) -> entier
+        Procedure moitie(x : entree flottant)
+    Definitions :
+        Fonction fact(n : entree entier) -> entier :
+            Debut
+                Si n infegal 1 Alors
+                    Renvoyer 1
+                Fin Si
+                Renvoyer n * fact(n - 1)
+            Fin
+        Procedure moitie(x : entree flottant) :
+            Debut
+                afficher(x / 2)
+            Fin
+    Variables :
+        i, n : entier
+Debut Programme
+    lire(n)
+    i = 0
+    Tant que i inf n Faire
+        afficher(0 - 7 / 2 + i modulo 2)
+        i = i + 1
+    Fin Tant que
+    afficher(fact(13))
+    afficher(Vrai inf Faux egal Faux)
+    moitie(n)
+    afficher("fin")
+Fin Programme"""
+    lexical_analyser = LexicalAnalyser()
+    analyse_source(lexical_analyser, source)
+    syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable())
+    syntax_analyser.parse()
+    output = io.StringIO()
+    assert Interpreter(syntax_analyser.program, io.StringIO("3\n"), output).run() == 0
+
+    # fact(13) dépasse un int de 32 bits ; Vrai inf Faux egal Faux se lit (true<false)==false en C
+    assert output.getvalue() == "-3\n-2\n-3\n1932053504\n1\n1.500000\nfin\n"
+
+
+def test_bytecode(tmp_path):
+    """The bytecode saved in a .pcb file runs like the interpreter, loops and recursion included."""
+    source = """Programme Octets
+    Prototypes :
+        Fonction somme(n : entree entier) -> entier
+    Definitions :
+        Fonction somme(n : entree entier) -> entier :
+            Debut
+                Si n egal 0 Alors
+                    Renvoyer 0
+                Fin Si
+                Renvoyer n + somme(n - 1)
+            Fin
+    Variables :
+        i, s : entier
+        x : flottant
+Debut Programme
+    s = 0
+    i = 0
+    Tant que i inf 10 ou s egal 0 Faire
+        Si i modulo 3 egal 0 Alors
+            s = s + i * 2
+        Fin Si
+        i = i + 1
+    Fin Tant que
+    afficher(s)
+    x = s / 4
+    afficher(x)
+    afficher(somme(5000))
+    afficher("fin\\tok")
+Fin Programme"""
+    lexical_analyser = LexicalAnalyser()
+    analyse_source(lexical_analyser, source)
+    syntax_analyser = SyntaxAnalyser(lexical_analyser=lexical_analyser, symbol_table=SymbolTable())
+    syntax_analyser.parse()
+    syntax_analyser.generate_bytecode().save(tmp_path / "octets.pcb")
+
+    output = io.StringIO()
+    assert VirtualMachine(Bytecode.load(tmp_path / "octets.pcb"), output=output).run() == 0
+    # somme(5000) est trop profond pour la pile de Python, pas pour la machine virtuelle
+    assert output.getvalue() == "36\n9.000000\n12502500\nfin\tok\n"
+
+
+def test_token_stream(tmp_path):
+    """The -al text dump and the binary token stream both load back the units of the source."""
+    lexical_analyser = LexicalAnalyser()
+    with open("example/input.pcode") as f:
+        analyse_source(lexical_analyser, f.read())
+    lexical_analyser.lexical_units.append(Integer(999, 0, 20, 2**70))   # hors des 64 bits d'un entier du flux
+    lexical_analyser.save_to_file(tmp_path / "input.al.txt")
+    lexical_analyser.save_binary(tmp_path / "input.pct")
+
+    text = LexicalAnalyser()
+    text.load_from_file(tmp_path / "input.al.txt")
+    binary = TokenStreamLexicalAnalyser(tmp_path / "input.pct")
+    expected = [(unit.__class__, str(unit), unit.value) for unit in lexical_analyser.lexical_units]
+    assert [(unit.__class__, str(unit), unit.value) for unit in text.lexical_units] == expected
+    assert [(unit.__class__, str(unit), unit.value) for unit in binary.lexical_units] == expected
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     # logging.getLogger().setLevel(logging.DEBUG)
@@ -1,6 +1,8 @@
-import sys, argparse, re, copy
+import sys, argparse, re, collections, hashlib
+from sys import intern
 
-from src.lexicalunit import LexicalUnit, Character, Keyword, Symbol, Identifier, Integer, Fel, String, Float
+from src.lexicalunit import LexicalUnit, Character, Keyword, Symbol, Identifier, Integer, String
+from src.tokenstream import TokenStream
 
 DEBUG = False
 
@@ -27,6 +29,22 @@ SYMBOLS = [
     "->", "=", "+", "-", "*", "/", "(", ")", ",", ";", ":", "."
 ]
 
+KEYWORD_SET = frozenset(KEYWORDS)
+SYMBOL_SET = frozenset(SYMBOLS)
+
+## Master regular expression of the tokenizer.
+# Each match skips the leading white spaces then recognizes one lexical unit;
+# the last alternative accepts any other character so only spaces are skipped.
+TOKEN_PATTERN = re.compile(r"""
+	\s*(?:
+	(?P<word>[a-zA-Z][a-zA-Z0-9]*)
+	|(?P<comment>//.*)
+	|(?P<symbol>->|[-=+*/(),;:.])
+	|(?P<integer>[0-9]+)
+	|(?P<string>"[^"]*"?|'[^']*'?)
+	|(?P<char>\S)
+	)""", re.VERBOSE | re.DOTALL)
+
 class AnaLexException(Exception):
 	def __init__(self, value):
 		self.value = value
@@ -37,121 +55,20 @@ class AnaLexException(Exception):
 ## Lexical analyser class
 #
 class LexicalAnalyser(object):	
-        ## Attribute to store the different lexical units
-	lexical_units = []
-
-        ## Index used to keep track of the lexical unit under treatment
-	lexical_unit_index = -1
-	
         ## The constructor
 	def __init__(self):
-		lexical_units = []
+		## Attribute to store the different lexical units
+		self.lexical_units = []
+
+		## Index used to keep track of the lexical unit under treatment
+		self.lexical_unit_index = -1
 	
         ## Analyse a line and extract the lexical units. 
         # The extracted lexical units are then added to the attribute lexical_units.
         # @param lineIndex index of the line in the original text
         # @param line the lien of text to analyse
 	def analyse_line(self, lineIndex, line):
-		space = re.compile("\s")
-		digit = re.compile("[0-9]")
-		char = re.compile("[a-zA-Z]")
-		beginColIndex = 0
-		c = ''
-		colIndex = 0
-		while colIndex < len(line):
-			c = line[colIndex]
-			unitValue = None
-			if c == '/': # begin of comment or /= ...
-				beginColIndex = colIndex
-				colIndex = colIndex + 1
-				c = line[colIndex]
-				if c == '/': # it is a comment => skip rest of line
-					return
-				else:
-					# record as character
-					unitValue = Symbol(lineIndex, colIndex-1, 1, "/")
-			elif digit.match(c):
-				# It is a number 
-				beginColIndex = colIndex
-				n = 0
-				while colIndex<len(line) and (digit.match(c)):
-					n = 10*n + int(c)
-					colIndex = colIndex + 1
-					if colIndex < len(line):
-						c = line[colIndex]
-				unitValue = Integer(lineIndex, beginColIndex, colIndex-beginColIndex, n)
-			elif space.match(c):
-				colIndex = colIndex + 1
-			elif char.match(c):
-				# It is either an identifier or a keyword
-				beginColIndex = colIndex
-				ident = ''
-				while colIndex<len(line) and (char.match(c) or digit.match(c)):
-					ident = ident + c
-					colIndex = colIndex + 1
-					if colIndex < len(line): 
-						c = line[colIndex]
-					
-				if string_is_keyword(ident): # Check if it is a keyword
-					unitValue = Keyword(lineIndex, beginColIndex, len(ident), ident)
-				else: # It is an identifier
-					unitValue = Identifier(lineIndex, beginColIndex, len(ident), ident)
-     
-			elif c == '"': # String literal
-				# It is either an identifier or a keyword
-				beginColIndex = colIndex
-				string = ''
-				is_escaped = False
-				while colIndex<len(line) and not is_escaped:
-					string = string + c
-					colIndex = colIndex + 1
-					if colIndex < len(line): 
-						c = line[colIndex]
-					if c == '"':
-						string += c
-						is_escaped = not is_escaped
-						colIndex = colIndex + 1 # Skip the closing quote
-
-				unitValue = String(lineIndex, beginColIndex, len(string), string)
-
-			elif c == "'": # String literal
-				# It is either an identifier or a keyword
-				beginColIndex = colIndex
-				string = ''
-				is_escaped = False
-				while colIndex<len(line) and not is_escaped:
-					string = string + c
-					colIndex = colIndex + 1
-					if colIndex < len(line): 
-						c = line[colIndex]
-					if c == "'":
-						string += c
-						is_escaped = not is_escaped
-						colIndex = colIndex + 1 # Skip the closing quote
-
-				unitValue = String(lineIndex, beginColIndex, len(string), string)
-
-			elif c == '-': # Subtraction
-				beginColIndex = colIndex
-				colIndex = colIndex + 1
-				c = line[colIndex]
-				if c == '>': # It is a symbol
-					unitValue = Symbol(lineIndex, colIndex-1, 2, "->")
-					colIndex = colIndex + 1
-				else: # It is a character
-					unitValue = Symbol(lineIndex, colIndex-1, 1, "-")
-
-			elif string_is_symbol(c): # It is a symbol
-				beginColIndex = colIndex
-				colIndex = colIndex + 1
-				unitValue = Symbol(lineIndex, beginColIndex, 1, c)
-
-			else:
-				colIndex = colIndex + 1
-				unitValue = Character(lineIndex, colIndex-1, 1, c)
-    
-			if unitValue != None:
-				self.lexical_units.append(unitValue)
+		self.lexical_units.extend(tokenize_line(lineIndex, line))
 		
         ## Saves the lexical units to a text file.
         # @param filename Name of the output file (if "" then output to stdout)
@@ -172,27 +89,31 @@ class LexicalAnalyser(object):
 		if filename != "":
 			output_file.close()
 	
-        ## Loads lexical units from a text file.
+        ## Loads lexical units from a text file written by save_to_file.
         # @param filename Name of the file to load (if "" then stdin is used)
 	def load_from_file(self, filename):
 		input_file = None
 		if filename != "":
 			try:
-				input_file = open(filename, 'w')
+				input_file = open(filename, 'r')
 			except:
-				print("Error: can\'t open output file!")
+				print("Error: can\'t open input file!")
 				return
 		else:
-			input_file = sys.stdint
+			input_file = sys.stdin
 		
-		lines = input_file.read_lines()
+		for line in input_file:
+			line = line.rstrip('\r\n')
+			if line:
+				self.lexical_units.append(LexicalUnit.extract_from_line(line))
 			
 		if filename != "":
 			input_file.close()
-		
-		for line in lines:
-			lexical_unit = LexicalUnit.extract_from_line(line)
-			self.lexical_units.append(lexical_unit)
+
+        ## Saves the lexical units to a binary token stream file (see src.tokenstream).
+        # @param filename Name of the output file
+	def save_binary(self, filename):
+		TokenStream.from_units(self.lexical_units).save(filename)
 
         ## Verifies that the current lexical unit index is not out of bounds
         # return True if lexical_unit_index < len(lexical_units)
@@ -205,10 +126,10 @@ class LexicalAnalyser(object):
 	def acceptKeyword(self, keyword):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while keyword "+keyword+" expected!")
-		if self.lexical_units[self.lexical_unit_index].is_keyword(keyword):
+		if self.get_current_unit().is_keyword(keyword):
 			self.lexical_unit_index += 1
 		else:
-			raise 	("Expecting keyword "+keyword+" <line "+str(self.lexical_units[self.lexical_unit_index].get_line_index())+", column "+str(self.lexical_units[self.lexical_unit_index].get_col_index())+"> !")
+			raise AnaLexException("Expecting keyword "+keyword+" <line "+str(self.get_current_unit().get_line_index())+", column "+str(self.get_current_unit().get_col_index())+"> !")
 
         ## Accepts an identifier if it corresponds to the current lexical unit.
         # @return identifier string value
@@ -216,12 +137,12 @@ class LexicalAnalyser(object):
 	def acceptIdentifier(self) -> str:
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while identifer expected!")
-		if self.lexical_units[self.lexical_unit_index].is_identifier():
-			value =  self.lexical_units[self.lexical_unit_index].get_value()
+		if self.get_current_unit().is_identifier():
+			value =  self.get_current_unit().get_value()
 			self.lexical_unit_index += 1
 			return value
 		else:
-			raise AnaLexException("Expecting identifier <line "+str(self.lexical_units[self.lexical_unit_index].get_line_index())+", column "+str(self.lexical_units[self.lexical_unit_index].get_col_index())+"> !")
+			raise AnaLexException("Expecting identifier <line "+str(self.get_current_unit().get_line_index())+", column "+str(self.get_current_unit().get_col_index())+"> !")
 	
         ## Accepts an integer if it corresponds to the current lexical unit.
         # @return integer value
@@ -229,12 +150,12 @@ class LexicalAnalyser(object):
 	def acceptInteger(self):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while integer value expected!")
-		if self.lexical_units[self.lexical_unit_index].is_integer():
-			value = self.lexical_units[self.lexical_unit_index].get_value()
+		if self.get_current_unit().is_integer():
+			value = self.get_current_unit().get_value()
 			self.lexical_unit_index += 1
 			return value
 		else:
-			raise AnaLexException("Expecting integer <line "+str(self.lexical_units[self.lexical_unit_index].get_line_index())+", column "+str(self.lexical_units[self.lexical_unit_index].get_col_index())+"> !")
+			raise AnaLexException("Expecting integer <line "+str(self.get_current_unit().get_line_index())+", column "+str(self.get_current_unit().get_col_index())+"> !")
 	
 
         ## Accepts a Fel instance if it corresponds to the current lexical unit.
@@ -242,10 +163,10 @@ class LexicalAnalyser(object):
 	def acceptFel(self):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while expecting .!")
-		if self.lexical_units[self.lexical_unit_index].is_fel():
+		if self.get_current_unit().is_fel():
 			self.lexical_unit_index += 1
 		else:
-			raise AnaLexException("Expecting end of program <line "+str(self.lexical_units[self.lexical_unit_index].get_line_index())+", column "+str(self.lexical_units[self.lexical_unit_index].get_col_index())+"> !")
+			raise AnaLexException("Expecting end of program <line "+str(self.get_current_unit().get_line_index())+", column "+str(self.get_current_unit().get_col_index())+"> !")
 
         ## Accepts a given character if it corresponds to the current lexical unit.
         # @param c string containing the character
@@ -253,10 +174,10 @@ class LexicalAnalyser(object):
 	def acceptCharacter(self, c):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while expecting character " + c + "!")
-		if self.lexical_units[self.lexical_unit_index].is_character(c):
+		if self.get_current_unit().is_character(c):
 			self.lexical_unit_index += 1
 		else:
-			raise AnaLexException("Expecting character " + c + " <line "+str(self.lexical_units[self.lexical_unit_index].get_line_index())+", column "+str(self.lexical_units[self.lexical_unit_index].get_col_index())+"> !")	
+			raise AnaLexException("Expecting character " + c + " <line "+str(self.get_current_unit().get_line_index())+", column "+str(self.get_current_unit().get_col_index())+"> !")	
 
         ## Accepts a given symbol if it corresponds to the current lexical unit.
         # @param s string containing the symbol
@@ -264,10 +185,10 @@ class LexicalAnalyser(object):
 	def acceptSymbol(self, s):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while expecting symbol " + s + "!")
-		if self.lexical_units[self.lexical_unit_index].is_symbol(s):
+		if self.get_current_unit().is_symbol(s):
 			self.lexical_unit_index += 1
 		else:
-			raise AnaLexException("Expecting symbol " + s + " <line "+str(self.lexical_units[self.lexical_unit_index].get_line_index())+", column "+str(self.lexical_units[self.lexical_unit_index].get_col_index())+"> !")	
+			raise AnaLexException("Expecting symbol " + s + " <line "+str(self.get_current_unit().get_line_index())+", column "+str(self.get_current_unit().get_col_index())+"> !")	
 	
 	    ## Accepts a given = if it corresponds to the current lexical unit.
         # @param s string containing the symbol
@@ -275,12 +196,12 @@ class LexicalAnalyser(object):
 	def acceptString(self):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while expecting a string !")
-		if self.lexical_units[self.lexical_unit_index].is_string():
-			value = self.lexical_units[self.lexical_unit_index].get_value()
+		if self.get_current_unit().is_string():
+			value = self.get_current_unit().get_value()
 			self.lexical_unit_index += 1
 			return value
 		else:
-			raise AnaLexException("Expecting string <line "+str(self.lexical_units[self.lexical_unit_index].get_line_index())+", column "+str(self.lexical_units[self.lexical_unit_index].get_col_index())+"> !")
+			raise AnaLexException("Expecting string <line "+str(self.get_current_unit().get_line_index())+", column "+str(self.get_current_unit().get_col_index())+"> !")
 
 
  
@@ -291,7 +212,7 @@ class LexicalAnalyser(object):
 	def isKeyword(self, keyword):
 		if not self.verify_index():
 			raise AnaLexException("Unexpected end of entry!")
-		if self.lexical_units[self.lexical_unit_index].is_keyword(keyword):
+		if self.get_current_unit().is_keyword(keyword):
 			return True
 		return False
 
@@ -301,7 +222,7 @@ class LexicalAnalyser(object):
 	def isIdentifier(self):
 		if not self.verify_index():
 			raise AnaLexException("Unexpected end of entry!")
-		if self.lexical_units[self.lexical_unit_index].is_identifier():
+		if self.get_current_unit().is_identifier():
 			return True
 		return False
 
@@ -311,7 +232,7 @@ class LexicalAnalyser(object):
 	def isCharacter(self, c):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while expecting character " + c + "!")
-		if self.lexical_units[self.lexical_unit_index].is_character(c):
+		if self.get_current_unit().is_character(c):
 			return True
 		return False			
 
@@ -321,7 +242,7 @@ class LexicalAnalyser(object):
 	def isInteger(self):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while expecting integer value!")
-		if self.lexical_units[self.lexical_unit_index].is_integer():
+		if self.get_current_unit().is_integer():
 			return True
 		return False			
 
@@ -331,7 +252,7 @@ class LexicalAnalyser(object):
 	def isSymbol(self, s):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while expecting symbol " + s + "!")
-		if self.lexical_units[self.lexical_unit_index].is_symbol(s):
+		if self.get_current_unit().is_symbol(s):
 			return True
 		return False
 
@@ -341,30 +262,26 @@ class LexicalAnalyser(object):
 	def isString(self):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while expecting string!")
-		if self.lexical_units[self.lexical_unit_index].is_string():
+		if self.get_current_unit().is_string():
 			return True
 		return False
 
 	def isFloat2(self):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while expecting float!")
-		if self.lexical_units[self.lexical_unit_index].is_integer():
-			if self.lexical_units[self.lexical_unit_index+1].is_symbol("."):
-				if self.lexical_units[self.lexical_unit_index+2].is_integer():
-					return True
-		return False
+		return self.is_integer_at(0) and self.is_symbol_at(1, ".") and self.is_integer_at(2)
 
 	def isBoolean(self):
 		if not self.verify_index():
 			raise AnaLexException("Found end of entry while expecting boolean!")
-		if self.lexical_units[self.lexical_unit_index].is_keyword("Vrai") or self.lexical_units[self.lexical_unit_index].is_keyword("Faux"):
+		if self.get_current_unit().is_keyword("Vrai") or self.get_current_unit().is_keyword("Faux"):
 			return True
 		return False
 
         ## Returns the value of the current lexical unit
         # @return value of the current unit
 	def get_value(self):
-		return self.lexical_units[self.lexical_unit_index].get_value()
+		return self.get_current_unit().get_value()
 
 		## Returns the current lexical unit
 		# @return current lexical unit
@@ -380,12 +297,159 @@ class LexicalAnalyser(object):
 		return self.get_current_unit()
 
 
-	def get_copy_scope_in_next(self, unit_value):
-		lexical_analyser_copy = copy.deepcopy(self)
-		while lexical_analyser_copy.lexical_unit_index < len(lexical_analyser_copy.lexical_units):
-			if lexical_analyser_copy.lexical_units[lexical_analyser_copy.lexical_unit_index].get_value() == unit_value:
-				return lexical_analyser_copy
-			lexical_analyser_copy.lexical_unit_index += 1
+        ## Returns the lexical unit located k units after the current one, without consuming anything
+        # @param k offset from the current lexical unit
+        # @return the lexical unit, or None when the offset is out of bounds
+	def peek(self, k=0):
+		index = self.lexical_unit_index + k
+		if 0 <= index < len(self.lexical_units):
+			return self.lexical_units[index]
+		return None
+
+        ## Tests if a given keyword is located k units after the current one.
+        # @return True if the keyword is found, False otherwise (including out of bounds)
+	def is_keyword_at(self, offset, keyword):
+		unit = self.peek(offset)
+		return unit is not None and unit.is_keyword(keyword)
+
+        ## Tests if an identifier is located k units after the current one.
+        # @return True if an identifier is found, False otherwise (including out of bounds)
+	def is_identifier_at(self, offset):
+		unit = self.peek(offset)
+		return unit is not None and unit.is_identifier()
+
+        ## Tests if a given symbol is located k units after the current one.
+        # @return True if the symbol is found, False otherwise (including out of bounds)
+	def is_symbol_at(self, offset, s):
+		unit = self.peek(offset)
+		return unit is not None and unit.is_symbol(s)
+
+        ## Tests if an integer is located k units after the current one.
+        # @return True if an integer is found, False otherwise (including out of bounds)
+	def is_integer_at(self, offset):
+		unit = self.peek(offset)
+		return unit is not None and unit.is_integer()
+
+        ## Counts the lexical units of the procedure or function definition starting at the current unit,
+        # up to the "Fin" closing its body. The "Fin" of nested blocks are followed by "Si", "Tant" or "Sinon".
+        # @return number of units of the definition, or None if its end is not found
+	def definition_length(self):
+		offset = 0
+		depth = 0
+		in_body = False
+		unit = self.peek(offset)
+		while unit is not None:
+			if unit.is_keyword("Debut"):
+				in_body = True
+			elif in_body and unit.is_keyword("Fin"):
+				if self.is_keyword_at(offset+1, "Si") or self.is_keyword_at(offset+1, "Tant") or self.is_keyword_at(offset+1, "Sinon"):
+					depth -= 1
+					offset += 1 # skip the keyword closing the block
+				elif depth == 0:
+					return offset + 1
+			elif in_body and (unit.is_keyword("Si") or unit.is_keyword("Tant") or unit.is_keyword("Sinon")):
+				depth += 1
+			offset += 1
+			unit = self.peek(offset)
+		return None
+
+        ## Computes a fingerprint of the values of the next lexical units
+        # @param length number of units to take into account
+        # @return hexadecimal digest of the units
+	def fingerprint(self, length):
+		digest = hashlib.sha256()
+		for offset in range(length):
+			unit = self.peek(offset)
+			digest.update(f"{unit.__class__.__name__}\t{unit.get_value()}\n".encode())
+		return digest.hexdigest()
+
+        ## Skips lexical units without analysing them
+        # @param length number of units to skip
+	def skip(self, length):
+		self.lexical_unit_index += length
+
+## Lexical analyser reading its lexical units on demand from a source text
+#
+# The units are produced line by line while the syntax analyser consumes them,
+# and only the units between the current one and the furthest one looked at
+# are kept in memory.
+class StreamingLexicalAnalyser(LexicalAnalyser):
+        ## The constructor
+        # @param lines iterable over the lines of the source text
+        # @param dump_file optional file where each unit is written as soon as it is read
+	def __init__(self, lines, dump_file=None):
+		super(StreamingLexicalAnalyser, self).__init__()
+		self.units = iter_lexical_units(lines)
+		self.window = collections.deque()
+		self.window_start = 0 # index of the first unit of the window
+		self.dump_file = dump_file
+		self.units_read = 0
+
+        ## Reads units from the source until the given index is available.
+        # Units located before the current one are dropped.
+        # @return True if the unit at the given index exists
+	def fill(self, index):
+		while self.window_start < self.lexical_unit_index and self.window:
+			self.window.popleft()
+			self.window_start += 1
+		while self.window_start + len(self.window) <= index:
+			unit = next(self.units, None)
+			if unit is None:
+				return False
+			self.units_read += 1
+			if self.dump_file is not None:
+				self.dump_file.write("%s" % unit)
+			self.window.append(unit)
+		return True
+
+	def analyse_line(self, lineIndex, line):
+		raise AnaLexException("A streaming lexical analyser reads its lines from its source!")
+
+	def verify_index(self):
+		return self.lexical_unit_index >= self.window_start and self.fill(self.lexical_unit_index)
+
+	def get_current_unit(self) -> LexicalUnit:
+		self.fill(self.lexical_unit_index)
+		return self.window[self.lexical_unit_index - self.window_start]
+
+	def peek(self, k=0):
+		index = self.lexical_unit_index + k
+		if index >= self.window_start and self.fill(index):
+			return self.window[index - self.window_start]
+		return None
+
+        ## Reads the rest of the source, so that the dump file is complete
+        # @return the total number of units read
+	def drain(self):
+		while self.fill(self.window_start + len(self.window)):
+			pass
+		return self.units_read
+
+## Lexical analyser reading its lexical units from a binary token stream file written by save_binary
+#
+# The file is mapped in memory without lexing the source again, and each unit is
+# only built when the syntax analyser first reads it (see src.tokenstream).
+class TokenStreamLexicalAnalyser(LexicalAnalyser):
+        ## The constructor
+        # @param filename name of the token stream file
+	def __init__(self, filename):
+		super(TokenStreamLexicalAnalyser, self).__init__()
+		self.lexical_units = TokenStream.load(filename)
+		self.units = self.lexical_units.units # units already built, None for the others
+
+	def analyse_line(self, lineIndex, line):
+		raise AnaLexException("A token stream lexical analyser reads its units from its file!")
+
+	def verify_index(self):
+		return self.lexical_unit_index < len(self.units)
+
+	def get_current_unit(self) -> LexicalUnit:
+		return self.units[self.lexical_unit_index] or self.lexical_units[self.lexical_unit_index]
+
+	def peek(self, k=0):
+		index = self.lexical_unit_index + k
+		if 0 <= index < len(self.units):
+			return self.units[index] or self.lexical_units[index]
 		return None
 
 ########################################################################				 		 
@@ -393,10 +457,45 @@ class LexicalAnalyser(object):
 ## Tests if a keyword is in the table of keywords
 # @return True if the keyword is found
 def string_is_keyword(s):
-	return KEYWORDS.count(s) != 0
+	return s in KEYWORD_SET
 
 def string_is_symbol(s):
-	return SYMBOLS.count(s) != 0
+	return s in SYMBOL_SET
+
+## Extracts the lexical units of a line.
+# @param lineIndex index of the line in the original text
+# @param line the line of text to analyse
+# @return generator over the lexical units of the line
+def tokenize_line(lineIndex, line):
+	for match in TOKEN_PATTERN.finditer(line):
+		kind = match.lastgroup
+		text = match.group(kind)
+		colIndex = match.start(kind)
+		if kind == "comment": # it is a comment => skip rest of line
+			return
+		elif kind == "integer":
+			yield Integer(lineIndex, colIndex, len(text), int(text))
+		elif kind == "word": # It is either an identifier or a keyword
+			text = intern(text) # identical names share one string
+			if text in KEYWORD_SET:
+				yield Keyword(lineIndex, colIndex, len(text), text)
+			else:
+				yield Identifier(lineIndex, colIndex, len(text), text)
+		elif kind == "string": # String literal
+			if len(text) == 1: # lone quote at the end of the line
+				text = text + text
+			yield String(lineIndex, colIndex, len(text), text)
+		elif kind == "symbol":
+			yield Symbol(lineIndex, colIndex, len(text), text)
+		else:
+			yield Character(lineIndex, colIndex, 1, text)
+
+## Extracts the lexical units of a source text, one line at a time.
+# @param lines iterable over the lines of the text (e.g. an open file)
+# @return generator over the lexical units of the text
+def iter_lexical_units(lines):
+	for lineIndex, line in enumerate(lines):
+		yield from tokenize_line(lineIndex, line.rstrip('\r\n'))
 
 		 
 ########################################################################				 	
@@ -1,13 +1,20 @@
 from src.analex import LexicalAnalyser
 from src.symboltable import SymbolTable
 from src.codegenerator import CodeGenerator
+from src.expression import Expression, Constant, Variable, Call, Unary, Binary, Parenthesis
+from src.syntaxtree import Program, Prototype, Parameter, Definition, VariableDeclaration, Assignment, ProcedureCall, Print, Read, Return, While, If
+from src.folding import fold_program
+from src.bytecode import BytecodeGenerator
 
 import logging
-import copy
+import hashlib
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Traces of the parser (main.py -d). Tested before each logger.debug call of the grammar methods:
+# when it is off, tracing costs one global lookup and no call or formatting.
+TRACE = False
+
 class SyntaxError(Exception):
 	"""Exception raised for syntax errors in the input."""
 	def __init__(self, message):
@@ -18,230 +25,243 @@ class SyntaxError(Exception):
 		return self.message
 
 class SyntaxAnalyser:
-	def __init__(self, lexical_analyser : LexicalAnalyser, symbol_table : SymbolTable):
+	def __init__(self, lexical_analyser : LexicalAnalyser, symbol_table : SymbolTable, output_file : str = "output_code.c", fragment_cache = None, fold_constants : bool = True):
 		self.lexical_analyser : LexicalAnalyser = lexical_analyser
 		self.symbol_table : SymbolTable = symbol_table
 
+		# Constant expressions are evaluated and dead branches removed before the C code is written
+		self.fold_constants = fold_constants
+
+		# Cache of the syntax trees and symbols of the definitions already analysed (see decla_op)
+		self.fragment_cache = fragment_cache
+		self.declarations_fingerprint = None
+
+		# Typed syntax tree of the program, built by analyse()
+		self.program : Program = None
+
 		self.code_generator = None
-		self.initialize_code_generator()
+		self.initialize_code_generator(output_file)
 
-	def programme(self):
+	def programme(self) -> Program:
 		"""Parse a program."""
-		logger.debug("programme()")
-		self.lexical_analyser.acceptKeyword("Programme")
-		self.specif_prog_princ()
-		self.corps_prog_princ()
+		if TRACE: logger.debug("programme()")
+		name = self.specif_prog_princ()
+		prototypes, definitions, variables, body = self.corps_prog_princ()
+		return Program(name, prototypes, definitions, variables, body)
   
-	def specif_prog_princ(self):
+	def specif_prog_princ(self) -> str:
 		"""Parse the main program specifications."""
-		logger.debug("specif_prog_princ()")
+		if TRACE: logger.debug("specif_prog_princ()")
 		self.lexical_analyser.acceptKeyword("Programme")
-		self.identifiant()
+		return self.identifiant()
 		  
 	def corps_prog_princ(self):
 		"""Parse the main program body."""
-		logger.debug("corps_prog_princ()")
-		self.partie_decla()
+		if TRACE: logger.debug("corps_prog_princ()")
+		prototypes, definitions, variables = self.partie_decla()
 		self.lexical_analyser.acceptKeyword("Debut")
 		self.lexical_analyser.acceptKeyword("Programme")
   
-		self.suite_instr()
-  
-		# Génération de code pour la fin du programme
-		self.code_generator.write("return 0;")
-		self.code_generator.write("}")
+		body = self.suite_instr()
   
 		self.lexical_analyser.acceptKeyword("Fin")
+		self.lexical_analyser.acceptKeyword("Programme")
+		return prototypes, definitions, variables, body
   
 	def partie_decla(self):
 		"""Parse the declaration part of the program."""
-		logger.debug("partie_decla()")
+		if TRACE: logger.debug("partie_decla()")
+		prototypes = []
+		definitions = []
+		variables = []
 		if self.lexical_analyser.isKeyword("Prototypes"):
-			logger.debug("Parsing procedures or functions")
+			if TRACE: logger.debug("Parsing procedures or functions")
 			self.symbol_table.mode_prototype = True
 			self.lexical_analyser.acceptKeyword("Prototypes")
 			self.lexical_analyser.acceptSymbol(":")
-			self.liste_prototype()
+			prototypes = self.liste_prototype()
 			self.symbol_table.mode_prototype = False
 			self.lexical_analyser.acceptKeyword("Definitions")
 			self.lexical_analyser.acceptSymbol(":")
-			self.liste_decla_op()
-   
-		# Génération du code pour le corps du programme
-		self.code_generator.write("int main() {")
+			if self.fragment_cache is not None:
+				# The definitions only depend on their own code and on the prototypes
+				self.declarations_fingerprint = hashlib.sha256(str(self.symbol_table).encode()).hexdigest()
+			definitions = self.liste_decla_op()
    
 		if self.lexical_analyser.isKeyword("Variables"):
-			logger.debug("Parsing variable declarations")
+			if TRACE: logger.debug("Parsing variable declarations")
 			self.lexical_analyser.acceptKeyword("Variables")
 			self.lexical_analyser.acceptSymbol(":")
-			self.liste_decla_var()
+			variables = self.liste_decla_var()
    
 		"""
 		if not self.lexical_analyser.isKeyword("Procedure") and \
-      		not self.lexical_analyser.isKeyword("Fonction") and \
-        	not self.lexical_analyser.isKeyword("Variables"):
+			  not self.lexical_analyser.isKeyword("Fonction") and \
+			not self.lexical_analyser.isKeyword("Variables"):
 			raise SyntaxError(message="Expected 'Procedure', 'Fonction', or 'Variables' at the beginning of the declaration part")
-  		"""
+		  """
+		return prototypes, definitions, variables
 
-	def liste_prototype(self):
+	def liste_prototype(self) -> list:
 		"""Parse a list of prototypes."""
-		logger.debug("liste_prototype()")
-		self.prototype()
-		if not self.lexical_analyser.isKeyword("Definitions"):
-			self.liste_prototype()
+		if TRACE: logger.debug("liste_prototype()")
+		t = [self.prototype()]
+		while not self.lexical_analyser.isKeyword("Definitions"):
+			t.append(self.prototype())
+		return t
 
-	def prototype(self):
+	def prototype(self) -> Prototype:
 		"""Parse a function or procedure prototype."""
-		logger.debug("prototype()")
+		if TRACE: logger.debug("prototype()")
 		if self.lexical_analyser.isKeyword("Fonction"):
-			self.prototype_fonction()
+			return self.prototype_fonction()
 		elif self.lexical_analyser.isKeyword("Procedure"):
-			self.prototype_procedure()
+			return self.prototype_procedure()
+		raise SyntaxError("Expected a prototype (Fonction or Procedure)")
    
-	def prototype_fonction(self):
+	def prototype_fonction(self) -> Prototype:
 		"""Parse a function prototype."""
-		logger.debug("prototype_fonction()")
+		if TRACE: logger.debug("prototype_fonction()")
 		self.lexical_analyser.acceptKeyword("Fonction")
 		ident = self.identifiant()
   
-		# Génération du code pour le prototype de fonction
-		lexical_analyser_copy = self.lexical_analyser.get_copy_scope_in_next("->")
-		# Récupération du type de retour grace à une copie
-		cg_type = lexical_analyser_copy.lexical_units[lexical_analyser_copy.lexical_unit_index+1].get_value()
-		cg_type = self.code_generator.association_keyword(cg_type)
-		self.code_generator.write(f"{cg_type} {ident}(")
-  
 		self.symbol_table.enter_scope(ident)
-		param = self.partie_formelle()
+		parameters = self.partie_formelle()
+		param = [self.symbol_table.lookup(parameter.name) for parameter in parameters]
 		self.symbol_table.leave_scope()
 		self.lexical_analyser.acceptSymbol("->")
 		type = self.type()
 		self.symbol_table.add_entry(ident, type, "function", param)
-		logger.debug(f"Function prototype: {ident}, return type: {type}, parameters: {param}")
+		if TRACE: logger.debug("Function prototype: %s, return type: %s, parameters: %s", ident, type, param)
+		return Prototype(ident, type, parameters)
 
-		# Génération du code pour la fin du prototype d'une fonction
-		self.code_generator.write(");")
-
-	def prototype_procedure(self):
-		logger.debug("prototype_procedure()")
+	def prototype_procedure(self) -> Prototype:
+		if TRACE: logger.debug("prototype_procedure()")
 		self.lexical_analyser.acceptKeyword("Procedure")
 		ident = self.identifiant()
   
-		# Génération du code pour le prototype de procédure
-		cg_type = self.code_generator.association_keyword("vide")
-		self.code_generator.write(f"{cg_type} {ident}(")
-  
 		self.symbol_table.enter_scope(ident)
-		param = self.partie_formelle()
+		parameters = self.partie_formelle()
+		param = [self.symbol_table.lookup(parameter.name) for parameter in parameters]
 		self.symbol_table.leave_scope()
 		self.symbol_table.add_entry(ident, None, "procedure", param)
-		logger.debug(f"Procedure prototype: {ident}, parameters: {param}")
-
-		# Génération du code pour la fin du prototype d'une procédure
-		self.code_generator.write(");")
+		if TRACE: logger.debug("Procedure prototype: %s, parameters: %s", ident, param)
+		return Prototype(ident, None, parameters)
 
 
-	def liste_decla_op(self):
+	def liste_decla_op(self) -> list:
 		"""Parse a list of operator declarations."""
-		logger.debug("liste_decla_op()")
-		self.decla_op()
-		if self.lexical_analyser.isKeyword("Procedure") or self.lexical_analyser.isKeyword("Fonction"):
-			self.liste_decla_op()
+		if TRACE: logger.debug("liste_decla_op()")
+		definition = self.decla_op()
+		t = [definition] if definition is not None else []
+		while self.lexical_analyser.isKeyword("Procedure") or self.lexical_analyser.isKeyword("Fonction"):
+			t.append(self.decla_op())
+		return t
 
-	def decla_op(self):
+	def decla_op(self) -> Definition:
 		"""Parse operator declarations."""
-		logger.debug("decla_op()")
+		if TRACE: logger.debug("decla_op()")
+		if self.fragment_cache is not None:
+			return self.decla_op_incremental()
+		return self.decla_op_parse()
+
+	def decla_op_incremental(self) -> Definition:
+		"""Reuse the syntax tree and symbols of a definition analysed before, or parse it and keep its result."""
+		if TRACE: logger.debug("decla_op_incremental()")
+		length = self.lexical_analyser.definition_length()
+		if length is None:
+			return self.decla_op_parse()
+		key = self.fragment_cache.fragment_key(self.declarations_fingerprint, self.lexical_analyser.fingerprint(length))
+		fragment = self.fragment_cache.get_fragment(key)
+		if fragment is not None:
+			definition, entries = fragment
+			if TRACE: logger.debug("Definition reused from cache: %s", definition.name)
+			self.lexical_analyser.skip(length)
+			self.symbol_table.restore_entries(entries)
+			return definition
+
+		first_entry = len(self.symbol_table.entries)
+		definition = self.decla_op_parse()
+		self.fragment_cache.put_fragment(key, definition, self.symbol_table.entries[first_entry:])
+		return definition
+
+	def decla_op_parse(self) -> Definition:
+		"""Parse a procedure or function definition. Returns None if there is none."""
 		if self.lexical_analyser.isKeyword("Procedure"):
-			self.procedure()
+			return self.procedure()
 		elif self.lexical_analyser.isKeyword("Fonction"):
-			self.fonction()
-    
-	def procedure(self):
+			return self.fonction()
+		return None
+	
+	def procedure(self) -> Definition:
 		"""Parse a procedure declaration."""
-		logger.debug("procedure()")
+		if TRACE: logger.debug("procedure()")
 		self.lexical_analyser.acceptKeyword("Procedure")
 		ident = self.identifiant()
-  
-		# Génération du code pour la déclaration de procédure
-		cg_type = self.code_generator.association_keyword("vide")
-		self.code_generator.write(f"{cg_type} {ident}(")
 
 		self.symbol_table.enter_scope(ident)
-		logger.debug(f"Entering scope: {ident}")
+		if TRACE: logger.debug("Entering scope: %s", ident)
   
-		param = self.partie_formelle()
+		parameters = self.partie_formelle()
 		self.lexical_analyser.acceptSymbol(":")
 
-		logger.debug(f"Procedure declaration: {ident}, parameters: {param}")
-
-		# Génération du code pour le debut du corps d'une procédure
-		self.code_generator.write(") {")
+		if TRACE: logger.debug("Procedure declaration: %s, parameters: %s", ident, [parameter.name for parameter in parameters])
   
-		self.corps_proc()
-
-		# Génération du code pour la fin d'une procédure
-		self.code_generator.write("}")
+		variables, body = self.corps_proc()
 
 		self.symbol_table.leave_scope()
+		return Definition(ident, None, parameters, variables, body)
 
-	def fonction(self):
+	def fonction(self) -> Definition:
 		"""Parse a function declaration."""
-		logger.debug("fonction()")
+		if TRACE: logger.debug("fonction()")
 		self.lexical_analyser.acceptKeyword("Fonction")
 		ident = self.identifiant()
 
-		# Génération du code pour la déclaration de procédure
-		lexical_analyser_copy = self.lexical_analyser.get_copy_scope_in_next("->")
-		# Récupération du type de retour grace à une copie
-		cg_type = lexical_analyser_copy.lexical_units[lexical_analyser_copy.lexical_unit_index+1].get_value()
-		cg_type = self.code_generator.association_keyword(cg_type)
-		self.code_generator.write(f"{cg_type} {ident}(")
-  
 		self.symbol_table.enter_scope(ident)
-		logger.debug(f"Entering scope: {ident}")
+		if TRACE: logger.debug("Entering scope: %s", ident)
 
-		param = self.partie_formelle()
+		parameters = self.partie_formelle()
 		self.lexical_analyser.acceptSymbol("->")
 		type = self.type()
-		logger.debug(f"Function type: {type}")
+		if TRACE: logger.debug("Function type: %s", type)
 		self.lexical_analyser.acceptSymbol(":")
 
-
-		self.code_generator.write(") {")
-
-		self.corps_fonction()
-
-		# Génération du code pour la fin d'une fonction
-		self.code_generator.write("}")
+		variables, body = self.corps_fonction()
   
-		logger.debug(f"Function declaration: {ident}, return type: {type}, parameters: {param}")
+		if TRACE: logger.debug("Function declaration: %s, return type: %s, parameters: %s", ident, type, [parameter.name for parameter in parameters])
 		self.symbol_table.leave_scope()
+		return Definition(ident, type, parameters, variables, body)
   
 	def corps_proc(self):
 		"""Parse the body of a procedure."""
-		logger.debug("corps_proc()")
+		if TRACE: logger.debug("corps_proc()")
+		variables = []
 		if not self.lexical_analyser.isKeyword("Debut"):
 			self.lexical_analyser.acceptKeyword("Variables")
 			self.lexical_analyser.acceptSymbol(":")
-			self.partie_decla_proc()
+			variables = self.partie_decla_proc()
 		self.lexical_analyser.acceptKeyword("Debut")
-		self.suite_instr()
+		body = self.suite_instr()
 		self.lexical_analyser.acceptKeyword("Fin")
+		return variables, body
   
 	def corps_fonction(self):
 		"""Parse the body of a function."""
-		logger.debug("corps_fonction()")
+		if TRACE: logger.debug("corps_fonction()")
+		variables = []
 		if not self.lexical_analyser.isKeyword("Debut"):
 			self.lexical_analyser.acceptKeyword("Variables")
 			self.lexical_analyser.acceptSymbol(":")
-			self.partie_decla_fonction()
+			variables = self.partie_decla_fonction()
 		self.lexical_analyser.acceptKeyword("Debut")
-		self.suite_instr()
+		body = self.suite_instr()
 		self.lexical_analyser.acceptKeyword("Fin")
+		return variables, body
   
 	def partie_formelle(self) -> list:
 		"""Parse the formal part of a procedure or function."""
-		logger.debug("partie_formelle()")
+		if TRACE: logger.debug("partie_formelle()")
 		self.lexical_analyser.acceptSymbol("(")
 		t = [] # List to store formal specifications
 		if not self.lexical_analyser.isSymbol(")"):
@@ -251,43 +271,30 @@ class SyntaxAnalyser:
 
 	def liste_specif_formelles(self) -> list:
 		"""Parse a list of formal specifications."""
-		logger.debug("liste_specif_formelles()")
-		t = self.specif()
-		q = [] # List to store formal specifications
-		if self.lexical_analyser.isSymbol(","):
+		if TRACE: logger.debug("liste_specif_formelles()")
+		t = [self.specif()] # List to store formal specifications
+		while self.lexical_analyser.isSymbol(","):
 			self.lexical_analyser.acceptSymbol(",")
-
-			# Génération du code "virgule"
-			self.code_generator.write(", ")
-
-			q = self.liste_specif_formelles()
-		return t+q
+			t.append(self.specif())
+		return t
    
-	def specif(self):
+	def specif(self) -> Parameter:
 		"""Parse a formal specification."""
-		logger.debug("specif()")
+		if TRACE: logger.debug("specif()")
 		name = self.identifiant()
 		self.lexical_analyser.acceptSymbol(":")
 		mode = ""
 		if self.lexical_analyser.isKeyword("entree"):
 			mode = self.mode()
 		type = self.type()
-		logger.debug(f"Formal specification: {name}, type: {type}, mode: {mode if 'mode' in locals() else 'None'}")
-		res = []
+		if TRACE: logger.debug("Formal specification: %s, type: %s, mode: %s", name, type, mode if 'mode' in locals() else 'None')
 		if self.symbol_table.mode_prototype:
 			self.symbol_table.add_entry(name, type, "variable", None, mode)
-			res.append(self.symbol_table.lookup(name))
-
-		# Génération du code pour la spécification formelle
-		cg_type = self.code_generator.association_keyword(type)
-		cg_mode = self.code_generator.association_keyword(mode)
-		self.code_generator.write(f"{cg_type}{cg_mode} {name}")
-
-		return res
+		return Parameter(name, type, mode)
 
 	def mode(self):
 		"""Parse the mode of a formal specification."""
-		logger.debug("mode()")
+		if TRACE: logger.debug("mode()")
 		if self.lexical_analyser.isKeyword("entree"):
 			self.lexical_analyser.acceptKeyword("entree")
 			if self.lexical_analyser.isKeyword("sortie"):
@@ -298,7 +305,7 @@ class SyntaxAnalyser:
     
 	def type(self):
 		"""Parse the type of a formal specification."""
-		logger.debug("type()")
+		if TRACE: logger.debug("type()")
 		type = ""
 		if self.lexical_analyser.isKeyword("entier"):
 			self.lexical_analyser.acceptKeyword("entier")
@@ -314,477 +321,384 @@ class SyntaxAnalyser:
 			type = "flottant"
 		else:
 			raise SyntaxError("Expected a type keyword (entier, booleen, chaine, flottant)")
-		logger.debug(f"Type: {type}")
+		if TRACE: logger.debug("Type: %s", type)
 		return type
 
-	def partie_decla_proc(self):
+	def partie_decla_proc(self) -> list:
 		"""Parse the declaration part of a procedure."""
-		logger.debug("partie_decla_proc()")
-		self.liste_decla_var()
+		if TRACE: logger.debug("partie_decla_proc()")
+		return self.liste_decla_var()
   
-	def partie_decla_fonction(self):
+	def partie_decla_fonction(self) -> list:
 		"""Parse the declaration part of a function."""
-		logger.debug("partie_decla_fonction()")
-		self.liste_decla_var()
+		if TRACE: logger.debug("partie_decla_fonction()")
+		return self.liste_decla_var()
   
-	def liste_decla_var(self):
+	def liste_decla_var(self) -> list:
 		"""Parse a list of variable declarations."""
-		logger.debug("liste_decla_var()")
-		self.decla_var()
-		if not self.lexical_analyser.isKeyword("Debut"):
-			self.liste_decla_var()
+		if TRACE: logger.debug("liste_decla_var()")
+		t = [self.decla_var()]
+		while not self.lexical_analyser.isKeyword("Debut"):
+			t.append(self.decla_var())
+		return t
 
-	def decla_var(self):
+	def decla_var(self) -> VariableDeclaration:
 		"""Parse a variable declaration."""
-		logger.debug("decla_var()")
+		if TRACE: logger.debug("decla_var()")
 		names = self.liste_identifiants()
 		self.lexical_analyser.acceptSymbol(":")
 		type = self.type()
 		for name in names:
 			self.symbol_table.add_entry(name, type, "variable", None)
-		logger.debug(f"Variable declaration: {names}, type: {type}")
-
-		# Génération du code pour la déclaration de variable
-		cg_type = self.code_generator.association_keyword(type)
-		for name in names:
-			self.code_generator.write(f"{cg_type} {name};")
+		if TRACE: logger.debug("Variable declaration: %s, type: %s", names, type)
+		return VariableDeclaration(names, type)
 
 	def liste_identifiants(self):
 		"""Parse a list of identifiers."""
-		logger.debug("liste_identifiants()")
-		names = []
-		ident = self.identifiant()
-		names.append(ident)
-		if self.lexical_analyser.isSymbol(","):
+		if TRACE: logger.debug("liste_identifiants()")
+		names = [self.identifiant()]
+		while self.lexical_analyser.isSymbol(","):
 			self.lexical_analyser.acceptSymbol(",")
-			names.extend(self.liste_identifiants())
+			names.append(self.identifiant())
 		return names
 
-	def suite_instr_non_vide(self):
+	def suite_instr_non_vide(self) -> list:
 		"""Parse a non-empty instruction sequence."""
-		logger.debug("suite_instr_non_vide()")
-		self.instr()
-		if not self.lexical_analyser.isKeyword("Fin"):
-			self.suite_instr_non_vide()
+		if TRACE: logger.debug("suite_instr_non_vide()")
+		t = [self.instr()]
+		while not self.lexical_analyser.isKeyword("Fin"):
+			t.append(self.instr())
+		return t
    
-	def suite_instr(self):
+	def suite_instr(self) -> list:
 		"""Parse an instruction sequence."""
-		logger.debug("suite_instr()")
+		if TRACE: logger.debug("suite_instr()")
 		if not self.lexical_analyser.isKeyword("Fin"):
-			self.suite_instr_non_vide()
+			return self.suite_instr_non_vide()
+		return []
   
 	def instr(self):
 		"""Parse an instruction."""
-		logger.debug("instr()")
-		lexical_analyser_copy : LexicalAnalyser = copy.deepcopy(self.lexical_analyser)
+		if TRACE: logger.debug("instr()")
 		if self.lexical_analyser.isKeyword("Tant"):
-			self.boucle()
+			return self.boucle()
 		elif self.lexical_analyser.isKeyword("Si"):
-			self.condition()
+			return self.condition()
 		elif self.lexical_analyser.isKeyword("afficher") or self.lexical_analyser.isKeyword("lire"):
-			value_type = self.ent_sort()
+			return self.ent_sort()
 		elif self.lexical_analyser.isKeyword("Renvoyer"):
-			self.retour()
-		elif lexical_analyser_copy.isIdentifier():
-			lexical_analyser_copy.acceptIdentifier()
-			if lexical_analyser_copy.isSymbol("("): # Check if it's a procedure
-				self.appel_proc()
-			elif lexical_analyser_copy.isSymbol("="): # Check if it's an assignment
-				self.affectation()
+			return self.retour()
+		elif self.lexical_analyser.isIdentifier():
+			if self.lexical_analyser.is_symbol_at(1, "("): # Check if it's a procedure
+				return self.appel_proc()
+			elif self.lexical_analyser.is_symbol_at(1, "="): # Check if it's an assignment
+				return self.affectation()
+			raise SyntaxError(f"Expected a procedure call or an assignment after '{self.lexical_analyser.get_value()}'")
 		else:
 			raise SyntaxError("Expected an instruction (loop, condition, input/output, return, procedure call, or assignment)")
 
-	def appel_proc(self):
+	def appel_proc(self) -> ProcedureCall:
 		"""Parse a procedure call."""
-		logger.debug("appel_proc()")
+		if TRACE: logger.debug("appel_proc()")
 		name = self.identifiant()
 		self.lexical_analyser.acceptSymbol("(")
-
-		# Génération du code pour l'appel de procédure
-		self.code_generator.write(f"{name}(")
-
+		arguments = []
 		if not self.lexical_analyser.isSymbol(")"):
-			self.liste_param()
+			arguments = self.liste_param()
 		self.lexical_analyser.acceptSymbol(")")
+		return ProcedureCall(name, arguments)
 
-		# Génération du code pour la fin de l'appel de procédure
-		self.code_generator.write(");")
-
-	def liste_param(self):
+	def liste_param(self) -> list:
 		"""Parse a list of parameters."""
-		logger.debug("liste_param()")
-		self.expression()
-		if self.lexical_analyser.isSymbol(","):
+		if TRACE: logger.debug("liste_param()")
+		t = [self.expression()]
+		while self.lexical_analyser.isSymbol(","):
 			self.lexical_analyser.acceptSymbol(",")
-   
-			# Génération du code pour la virgule
-			self.code_generator.write(", ")
-
-			self.liste_param()
+			t.append(self.expression())
+		return t
 
-	def affectation(self):
+	def affectation(self) -> Assignment:
 		"""Parse an assignment."""
-		logger.debug("affectation()")
+		if TRACE: logger.debug("affectation()")
 		name = self.identifiant()
 		self.lexical_analyser.acceptSymbol("=")
+		return Assignment(name, self.expression())
 
-		# Génération du code pour l'affectation
-		self.code_generator.write(f"{name} = ")
-  
-		self.expression()
-
-		# Génération du code pour la fin de l'affectation
-		self.code_generator.write(";")
-
-	def expression(self) -> str:
-		"""Parse an expression."""
-		logger.debug("expression()")
-		value_type = self.exp_ou()
-		# logger.debug(f"Expression type: {value_type}")
-		return value_type
+	def expression(self) -> Expression:
+		"""Parse an expression and return its typed tree."""
+		if TRACE: logger.debug("expression()")
+		expression = self.exp_ou()
+		# logger.debug(f"Expression type: {expression.type}")
+		return expression
 
-	def exp_ou(self) -> str:
+	def exp_ou(self) -> Expression:
 		"""Parse the or level of expressions."""
-		logger.debug("exp_ou()")
-		value_type = self.exp_et()
-		if self.lexical_analyser.isKeyword("ou"):
-			value_type_A = value_type
+		if TRACE: logger.debug("exp_ou()")
+		expression = self.exp_et()
+		# "ou" est associatif : la suite est lue en boucle, de gauche à droite comme en C
+		while self.lexical_analyser.isKeyword("ou"):
 			self.lexical_analyser.acceptKeyword("ou")
-			logger.debug("Found 'ou' keyword")
-   
-			# Génération du "ou" de l'expression
-			self.code_generator.write("||")
-   
-			value_type_B = self.exp_ou()
-			if value_type_A != "booleen" or value_type_B != "booleen":
-				logger.debug(f"exp_ou() found incompatible types")
-				raise TypeError(f"Incompatible types: {value_type_A} and {value_type_B}")
-			value_type = "booleen"
-		# logger.debug(f"exp_ou() returns type: {value_type}")
-		return value_type
-
-	def exp_et(self) -> str:
+			if TRACE: logger.debug("Found 'ou' keyword")
+			right = self.exp_et()
+			if expression.type != "booleen" or right.type != "booleen":
+				if TRACE: logger.debug("exp_ou() found incompatible types")
+				raise TypeError(f"Incompatible types: {expression.type} and {right.type}")
+			expression = Binary("booleen", "ou", expression, right)
+		# logger.debug(f"exp_ou() returns type: {expression.type}")
+		return expression
+
+	def exp_et(self) -> Expression:
 		"""Parse the and level of expressions."""
-		logger.debug("exp_et()")
-		value_type = self.exp_comp()
-		if self.lexical_analyser.isKeyword("et"):
-			value_type_A = value_type
+		if TRACE: logger.debug("exp_et()")
+		expression = self.exp_comp()
+		while self.lexical_analyser.isKeyword("et"):
 			self.lexical_analyser.acceptKeyword("et")
-			logger.debug("Found 'et' keyword")
-
-			# Génération du "et" de l'expression
-			self.code_generator.write("&&")
+			if TRACE: logger.debug("Found 'et' keyword")
+			right = self.exp_comp()
+			if expression.type != "booleen" or right.type != "booleen":
+				if TRACE: logger.debug("exp_et() found incompatible types")
+				raise TypeError(f"Incompatible types: {expression.type} and {right.type}")
+			expression = Binary("booleen", "et", expression, right)
+		# logger.debug(f"exp_et() returns type: {expression.type}")
+		return expression
+
+	def exp_comp(self) -> Expression:
+		"""Parse the comparison level of expressions."""
+		if TRACE: logger.debug("exp_comp()")
+		operands = [self.exp_ad()]
+		operators = []
+		while self.lexical_analyser.isKeyword("egal") or self.lexical_analyser.isKeyword("diff") or \
+		   self.lexical_analyser.isKeyword("inf") or self.lexical_analyser.isKeyword("infegal") or \
+		   self.lexical_analyser.isKeyword("sup") or self.lexical_analyser.isKeyword("supegal"):
+			operators.append(self.op_comp())
+			operands.append(self.exp_ad())
+
+		# Une suite de comparaisons a b c est typée de droite à gauche, comme a op (b op c)
+		type = operands[-1].type
+		for left in reversed(operands[:-1]):
+			if not self.type_compatible(left.type, type):
+				if TRACE: logger.debug("exp_comp() found incompatible types")
+				raise TypeError(f"Incompatible types: {left.type} and {type}")
+			type = "booleen"
 
-			value_type_B = self.exp_et()
-			if value_type_A != "booleen" or value_type_B != "booleen":
-				logger.debug(f"exp_et() found incompatible types")
-				raise TypeError(f"Incompatible types: {value_type_A} and {value_type_B}")
-			value_type = "booleen"
-		# logger.debug(f"exp_et() returns type: {value_type}")
-		return value_type
+		# L'arbre est profond à gauche, (a op b) op c, comme les autres suites : il est parcouru en boucle
+		expression = operands[0]
+		for operator, right in zip(operators, operands[1:]):
+			expression = Binary("booleen", operator, expression, right)
+		# logger.debug(f"exp_comp() returns type: {expression.type}")
+		return expression
 
-	def exp_comp(self) -> str:
-		"""Parse the comparison level of expressions."""
-		logger.debug("exp_comp()")
-		value_type = self.exp_ad()
-		if self.lexical_analyser.isKeyword("egal") or self.lexical_analyser.isKeyword("diff"):
-			value_type_A = value_type
-			self.op_comp()
-			value_type_B = self.exp_comp()
-			if not self.type_compatible(value_type_A, value_type_B):
-				logger.debug(f"exp_comp() found incompatible types")
-				raise TypeError(f"Incompatible types: {value_type_A} and {value_type_B}")
-			value_type = "booleen"
-   
-		elif self.lexical_analyser.isKeyword("inf") or self.lexical_analyser.isKeyword("infegal") or \
-      		 self.lexical_analyser.isKeyword("sup") or self.lexical_analyser.isKeyword("supegal"):
-			value_type_A = value_type
-			self.op_comp()
-			value_type_B = self.exp_comp()
-			if not self.type_compatible(value_type_A, value_type_B):
-				logger.debug(f"exp_comp() found incompatible types")
-				raise TypeError(f"Incompatible types: {value_type_A} and {value_type_B}")
-			value_type = "booleen"
-		# logger.debug(f"exp_comp() returns type: {value_type}")
-		return value_type
-
-	def op_comp(self):
+	def op_comp(self) -> str:
 		"""Parse a comparison operator."""
-		logger.debug("op_comp()")
+		if TRACE: logger.debug("op_comp()")
 		operateur = self.lexical_analyser.get_value()
 		if self.lexical_analyser.isKeyword("egal"):
 			self.lexical_analyser.acceptKeyword("egal")
-			logger.debug("Found 'egal' keyword")
+			if TRACE: logger.debug("Found 'egal' keyword")
 		elif self.lexical_analyser.isKeyword("diff"):
 			self.lexical_analyser.acceptKeyword("diff")
-			logger.debug("Found 'diff' keyword")
+			if TRACE: logger.debug("Found 'diff' keyword")
 		elif self.lexical_analyser.isKeyword("inf"):
 			self.lexical_analyser.acceptKeyword("inf")
-			logger.debug("Found 'inf' keyword")
+			if TRACE: logger.debug("Found 'inf' keyword")
 		elif self.lexical_analyser.isKeyword("infegal"):
 			self.lexical_analyser.acceptKeyword("infegal")
-			logger.debug("Found 'infegal' keyword")
+			if TRACE: logger.debug("Found 'infegal' keyword")
 		elif self.lexical_analyser.isKeyword("sup"):
 			self.lexical_analyser.acceptKeyword("sup")
-			logger.debug("Found 'sup' keyword")
+			if TRACE: logger.debug("Found 'sup' keyword")
 		elif self.lexical_analyser.isKeyword("supegal"):
 			self.lexical_analyser.acceptKeyword("supegal")
-			logger.debug("Found 'supegal' keyword")
+			if TRACE: logger.debug("Found 'supegal' keyword")
 		else:
 			raise SyntaxError("Expected a relational operator")
+		return operateur
 
-		# Génération du code pour l'opérateur de comparaison
-		code_operateur = self.code_generator.association_keyword(operateur)
-		self.code_generator.write(code_operateur)
-
-	def exp_ad(self) -> str:
+	def exp_ad(self) -> Expression:
 		"""Parse the addition level of expressions."""
-		logger.debug("exp_ad()")
-		value_type = self.exp_mult()
-		if self.lexical_analyser.isSymbol("+") or self.lexical_analyser.isSymbol("-"):
-			value_type_A = value_type
-			self.op_ad()
-			value_type_B = self.exp_ad()
-			if not self.verify_types(value_type_A, value_type_B, ["number"]):
-				logger.debug(f"exp_ad() found incompatible types")
-				raise TypeError(f"Incompatible types: {value_type_A} and {value_type_B}")
-			if value_type_A == "flottant" or value_type_B == "flottant":
-				value_type = "flottant"
-			else:
-				value_type = "entier"
-		# logger.debug(f"exp_ad() returns type: {value_type}")
-		return value_type
-
-	def op_ad(self):
+		if TRACE: logger.debug("exp_ad()")
+		expression = self.exp_mult()
+		# L'arbre est associatif à gauche comme en C : a - b - c se calcule (a - b) - c
+		while self.lexical_analyser.isSymbol("+") or self.lexical_analyser.isSymbol("-"):
+			operateur = self.op_ad()
+			right = self.exp_mult()
+			if not self.verify_types(expression.type, right.type, ["number"]):
+				if TRACE: logger.debug("exp_ad() found incompatible types")
+				raise TypeError(f"Incompatible types: {expression.type} and {right.type}")
+			expression = Binary(self.number_type(expression.type, right.type), operateur, expression, right)
+		# logger.debug(f"exp_ad() returns type: {expression.type}")
+		return expression
+
+	def op_ad(self) -> str:
 		"""Parse an additive operator."""
-		logger.debug("op_ad()")
+		if TRACE: logger.debug("op_ad()")
 		operateur = self.lexical_analyser.get_value()
 		if self.lexical_analyser.isSymbol("+"):
 			self.lexical_analyser.acceptSymbol("+")
-			logger.debug("Found '+' symbol")
+			if TRACE: logger.debug("Found '+' symbol")
 		elif self.lexical_analyser.isSymbol("-"):
 			self.lexical_analyser.acceptSymbol("-")
-			logger.debug("Found '-' symbol")
+			if TRACE: logger.debug("Found '-' symbol")
 		else:
 			raise SyntaxError("Expected an additive operator")
+		return operateur
 
-		# Génération du code pour l'opérateur d'addition
-		code_operateur = self.code_generator.association_keyword(operateur)
-		self.code_generator.write(code_operateur)
-
-	def exp_mult(self) -> str:
+	def exp_mult(self) -> Expression:
 		"""Parse the multiplication level of expressions."""
-		logger.debug("exp_mult()")
-		value_type = self.prim()
-		if self.lexical_analyser.isSymbol("*") or self.lexical_analyser.isSymbol("/") or self.lexical_analyser.isSymbol("//") or self.lexical_analyser.isKeyword("modulo"):
-			value_type_A = value_type
-			self.op_mult()
-			value_type_B = self.exp_mult()
-			if not self.verify_types(value_type_A, value_type_B, ["number"]):
-				logger.debug(f"exp_mult() found incompatible types")
-				raise TypeError(f"Incompatible types: {value_type_A} and {value_type_B}")
-			if value_type_A == "flottant" or value_type_B == "flottant":
-				value_type = "flottant"
-			else:
-				value_type = "entier"
-		# logger.debug(f"exp_mult() returns type: {value_type}")
-		return value_type
-
-	def op_mult(self):
+		if TRACE: logger.debug("exp_mult()")
+		expression = self.prim()
+		# Associatif à gauche comme exp_ad : a / b * c se calcule (a / b) * c
+		while self.lexical_analyser.isSymbol("*") or self.lexical_analyser.isSymbol("/") or self.lexical_analyser.isSymbol("//") or self.lexical_analyser.isKeyword("modulo"):
+			operateur = self.op_mult()
+			right = self.prim()
+			if not self.verify_types(expression.type, right.type, ["number"]):
+				if TRACE: logger.debug("exp_mult() found incompatible types")
+				raise TypeError(f"Incompatible types: {expression.type} and {right.type}")
+			expression = Binary(self.number_type(expression.type, right.type), operateur, expression, right)
+		# logger.debug(f"exp_mult() returns type: {expression.type}")
+		return expression
+
+	def op_mult(self) -> str:
 		"""Parse a multiplicative operator."""
-		logger.debug("op_mult()")
+		if TRACE: logger.debug("op_mult()")
 		operateur = self.lexical_analyser.get_value()
 		if self.lexical_analyser.isSymbol("*"):
 			self.lexical_analyser.acceptSymbol("*")
-			logger.debug("Found '*' symbol")
+			if TRACE: logger.debug("Found '*' symbol")
 		elif self.lexical_analyser.isSymbol("/"):
 			self.lexical_analyser.acceptSymbol("/")
-			logger.debug("Found '/' symbol")
+			if TRACE: logger.debug("Found '/' symbol")
 		elif self.lexical_analyser.isSymbol("//"):
 			self.lexical_analyser.acceptSymbol("//")
-			logger.debug("Found '//' symbol")
+			if TRACE: logger.debug("Found '//' symbol")
 		elif self.lexical_analyser.isKeyword("modulo"):
 			self.lexical_analyser.acceptKeyword("modulo")
-			logger.debug("Found 'modulo' keyword")
+			if TRACE: logger.debug("Found 'modulo' keyword")
 		else:
 			raise SyntaxError("Expected a multiplicative operator")
+		return operateur
 
-		# Génération du code pour l'opérateur de multiplication
-		code_operateur = self.code_generator.association_keyword(operateur)
-		self.code_generator.write(code_operateur)
-
-	def prim(self):
+	def prim(self) -> Expression:
 		"""Parse a primary expression."""
-		logger.debug("prim()")
+		if TRACE: logger.debug("prim()")
 		if self.lexical_analyser.isSymbol("+") or self.lexical_analyser.isSymbol("-") or self.lexical_analyser.isKeyword("non"):
-			self.op_unaire()
-		value_type = self.elem_prim()
-		# logger.debug(f"Primary expression type: {value_type}")
-		return value_type
+			operateur = self.op_unaire()
+			operand = self.elem_prim()
+			return Unary(operand.type, operateur, operand)
+		expression = self.elem_prim()
+		# logger.debug(f"Primary expression type: {expression.type}")
+		return expression
   
-	def op_unaire(self):
+	def op_unaire(self) -> str:
 		"""Parse a unary operator."""
-		logger.debug("op_unaire()")
+		if TRACE: logger.debug("op_unaire()")
 		operateur = self.lexical_analyser.get_value()
 		if self.lexical_analyser.isSymbol("+"):
 			self.lexical_analyser.acceptSymbol("+")
-			logger.debug("Found '+' symbol")
+			if TRACE: logger.debug("Found '+' symbol")
 		elif self.lexical_analyser.isSymbol("-"):
 			self.lexical_analyser.acceptSymbol("-")
-			logger.debug("Found '-' symbol")
+			if TRACE: logger.debug("Found '-' symbol")
 		elif self.lexical_analyser.isKeyword("non"):
 			self.lexical_analyser.acceptKeyword("non")
-			logger.debug("Found 'non' keyword")
+			if TRACE: logger.debug("Found 'non' keyword")
 		else:
 			raise SyntaxError("Expected a unary operator")
+		return operateur
 
-		# Génération du code pour l'opérateur unaire
-		code_operateur = self.code_generator.association_keyword(operateur)
-		self.code_generator.write(code_operateur)
-
-	def elem_prim(self) -> str:
+	def elem_prim(self) -> Expression:
 		"""Parse an elementary primary expression."""
-		logger.debug("elem_prim()")
-		lexical_analyser_copy : LexicalAnalyser = copy.deepcopy(self.lexical_analyser)
+		if TRACE: logger.debug("elem_prim()")
 		if self.lexical_analyser.isInteger() or \
-      		self.lexical_analyser.isBoolean() or \
-            self.lexical_analyser.isFloat2() or \
-            self.lexical_analyser.isString():
-			value_type = self.valeur()
+			  self.lexical_analyser.isBoolean() or \
+			self.lexical_analyser.isFloat2() or \
+			self.lexical_analyser.isString():
+			expression = self.valeur()
 		elif self.lexical_analyser.isSymbol("("):
 			self.lexical_analyser.acceptSymbol("(")
-
-			# Génération du code pour le cas d'un parenthèsage
-			self.code_generator.write("(")
-   
-			value_type = self.expression()
+			expression = Parenthesis(self.exp_ou())
 			self.lexical_analyser.acceptSymbol(")")
 
-			# Génération du code pour le cas d'un parenthèsage
-			self.code_generator.write(")")
-
-		elif lexical_analyser_copy.isIdentifier():
-			lexical_analyser_copy.acceptIdentifier()
-			if lexical_analyser_copy.isSymbol("("):
-				value_type = self.appel_fonct()
-				logger.debug(f"Function call type: {value_type}")
+		elif self.lexical_analyser.isIdentifier():
+			if self.lexical_analyser.is_symbol_at(1, "("):
+				expression = self.appel_fonct()
+				if TRACE: logger.debug("Function call type: %s", expression.type)
 			else:
 				name = self.identifiant()
 				entry = self.symbol_table.lookup(name)
-				logger.debug(f"Identifier lookup: {name}, found: {entry}")
+				if TRACE: logger.debug("Identifier lookup: %s, found: %s", name, entry)
 				if entry is None:
 					raise SyntaxError(f"Identifier '{name}' is not declared")
-				value_type = entry.type
-
-				# Génération du code pour l'identifiant
-				self.code_generator.write(name)
+				expression = Variable(entry.type, name)
 
 		else:
 			raise SyntaxError("Expected a primary expression (value, identifier, or function call)")
-		logger.debug(f"Elementary primary expression type: {value_type}")
-		return value_type
+		if TRACE: logger.debug("Elementary primary expression type: %s", expression.type)
+		return expression
 
-	def appel_fonct(self) -> str:
+	def appel_fonct(self) -> Expression:
 		"""Parse a function call."""
-		logger.debug("appel_fonct()")
+		if TRACE: logger.debug("appel_fonct()")
 		name = self.identifiant()
 		self.lexical_analyser.acceptSymbol("(")
 
-		# Génération du code pour l'appel de fonction
-		self.code_generator.write(f"{name}(")
-
+		arguments = []
 		if not self.lexical_analyser.isSymbol(")"):
-			self.liste_param()
+			arguments = self.liste_param()
 		self.lexical_analyser.acceptSymbol(")")
 
-		# Génération du code pour la fin de l'appel de fonction
-		self.code_generator.write(")")
-
 		entry = self.symbol_table.lookup(name, "global")
-		logger.debug(f"Function call: {name}, found: {entry}, scope: {self.symbol_table.current_scope}")
+		if TRACE: logger.debug("Function call: %s, found: %s, scope: %s", name, entry, self.symbol_table.current_scope)
 		if entry is None or entry.role != "function":
 			raise SyntaxError(f"Function '{name}' is not declared or is not a function")
 		else:
-			return entry.type
+			return Call(entry.type, name, arguments)
   
-	def valeur(self) -> str:
+	def valeur(self) -> Expression:
 		"""Parse a value."""
-		logger.debug("valeur()")
+		if TRACE: logger.debug("valeur()")
 		if self.lexical_analyser.isFloat2():
 			value = self.flottant()
-			logger.debug("Value: float")
-
-			# Génération du code pour le flottant
-			self.code_generator.write(str(value))
-
-			return "flottant"
+			if TRACE: logger.debug("Value: float")
+			return Constant("flottant", value)
 		elif self.lexical_analyser.isInteger():
 			value = self.entier()
-			logger.debug("Value: integer")
-
-			# Génération du code pour l'entier
-			self.code_generator.write(str(value))
-
-			return "entier"
+			if TRACE: logger.debug("Value: integer")
+			return Constant("entier", value)
 		elif self.lexical_analyser.isKeyword("Vrai") or self.lexical_analyser.isKeyword("Faux"):
 			value = self.val_bool()
-			logger.debug("Value: boolean")
-
-			# Génération du code pour le booléen
-			self.code_generator.write(self.code_generator.association_keyword(value))
-
-			return "booleen"
+			if TRACE: logger.debug("Value: boolean")
+			return Constant("booleen", value == "Vrai")
 		elif self.lexical_analyser.isString():
 			value = self.chaine()
-			logger.debug("Value: string")
-
-			# Génération du code pour la chaîne
-			self.code_generator.write(f'"{value[1:-1]}"') # Suppression des guillemets
-
-			return "chaine"
+			if TRACE: logger.debug("Value: string")
+			return Constant("chaine", value[1:-1]) # Suppression des guillemets
 		else:
 			raise SyntaxError("Expected a value (entier or booleen)")
 
 	def val_bool(self):
 		"""Parse a boolean value."""
-		logger.debug("val_bool()")
+		if TRACE: logger.debug("val_bool()")
 		value = None
 		if self.lexical_analyser.isKeyword("Vrai"):
 			self.lexical_analyser.acceptKeyword("Vrai")
-			logger.debug("Boolean value: Vrai")
+			if TRACE: logger.debug("Boolean value: Vrai")
 			value = "Vrai"
 		elif self.lexical_analyser.isKeyword("Faux"):
 			self.lexical_analyser.acceptKeyword("Faux")
-			logger.debug("Boolean value: Faux")
+			if TRACE: logger.debug("Boolean value: Faux")
 			value = "Faux"
 		else:
 			raise SyntaxError("Expected a boolean value (Vrai or Faux)")
 		return value
 
-	def ent_sort(self) -> str:
+	def ent_sort(self):
 		"""Parse an entry or exit."""
-		logger.debug("ent_sort()")
+		if TRACE: logger.debug("ent_sort()")
 		if self.lexical_analyser.isKeyword("afficher"):
 			self.lexical_analyser.acceptKeyword("afficher")
 			self.lexical_analyser.acceptSymbol("(")
-
-			# Génération du code pour l'affichage
-			self.code_generator.write("printf(")
-			syntax_analyser_copy : SyntaxAnalyser = copy.deepcopy(self)
-			syntax_analyser_copy.code_generator.set_output_file("tmp")
-			cg_type = syntax_analyser_copy.expression()
-			self.code_generator.write("\"")
-			self.code_generator.write(self.code_generator.association_keyword("print_" + cg_type))
-			self.code_generator.write("\\n")
-			self.code_generator.write("\",")
-			syntax_analyser_copy.code_generator.delete_file()
-			syntax_analyser_copy = None
-
-			value_type = self.expression()
-
-			# Génération du code pour la fin de l'affichage
-			self.code_generator.write(f");")
-
+			instruction = Print(self.expression())
 			self.lexical_analyser.acceptSymbol(")")
 		elif self.lexical_analyser.isKeyword("lire"):
 			self.lexical_analyser.acceptKeyword("lire")
@@ -793,85 +707,49 @@ class SyntaxAnalyser:
 			entry = self.symbol_table.lookup(name)
 			if entry is None or entry.role != "variable":
 				raise SyntaxError(f"Identifier '{name}' is not declared or is not a variable")
-			value_type = entry.type
-
-			# Génération du code pour la lecture
-			cg_type = self.code_generator.association_keyword("print_" + value_type)
-			self.code_generator.write(f"scanf(\"{cg_type}\", &{name});")
-
+			instruction = Read(name, entry.type)
 			self.lexical_analyser.acceptSymbol(")")
 		else:
 			raise SyntaxError("Expected an entry or exit (afficher or lire)")
-		return value_type
+		return instruction
 
-	def boucle(self):
+	def boucle(self) -> While:
 		"""Parse a loop."""
-		logger.debug("boucle()")
+		if TRACE: logger.debug("boucle()")
 		self.lexical_analyser.acceptKeyword("Tant")
 		self.lexical_analyser.acceptKeyword("que")
-
-		# Génération du code pour l'initialisation d'une boucle
-		self.code_generator.write("while (")
-  
-		self.expression()
-
-		# Génération du code pour la fin de la condition de la boucle
-		self.code_generator.write(") {")
-
+		condition = self.expression()
 		self.lexical_analyser.acceptKeyword("Faire")
-		self.suite_instr()
-
-		# Génération du code pour la fin du corps de la boucle
-		self.code_generator.write("}")
-
+		body = self.suite_instr()
 		self.lexical_analyser.acceptKeyword("Fin")
 		self.lexical_analyser.acceptKeyword("Tant")
 		self.lexical_analyser.acceptKeyword("que")
+		return While(condition, body)
   
-	def condition(self):
+	def condition(self) -> If:
 		"""Parse a condition."""
-		logger.debug("condition()")
+		if TRACE: logger.debug("condition()")
 		self.lexical_analyser.acceptKeyword("Si")
-
-		# Génération du code pour la condition
-		self.code_generator.write("if (")
-  
-		self.expression()
-
-		# Génération du code pour la fin de la condition
-		self.code_generator.write(") {")
-
+		condition = self.expression()
 		self.lexical_analyser.acceptKeyword("Alors")
-		self.suite_instr()
+		then_body = self.suite_instr()
 		self.lexical_analyser.acceptKeyword("Fin")
 		self.lexical_analyser.acceptKeyword("Si")
 
-		# Génération du code pour la fin de la condition
-		self.code_generator.write("}")
-
+		else_body = None
 		if self.lexical_analyser.isKeyword("Sinon"):
-
-			# Génération du code pour le cas "Sinon"
-			self.code_generator.write("else {")
-
 			self.lexical_analyser.acceptKeyword("Sinon")
-			self.suite_instr()   
+			else_body = self.suite_instr()   
 			self.lexical_analyser.acceptKeyword("Fin")
 			self.lexical_analyser.acceptKeyword("Sinon")
-
-			# Génération du code pour la fin du cas "Sinon"
-			self.code_generator.write("}")
-
-    
-	def retour(self):
+		return If(condition, then_body, else_body)
+	
+	def retour(self) -> Return:
 		"""Parse a return statement."""
-		logger.debug("retour()")
+		if TRACE: logger.debug("retour()")
 		self.lexical_analyser.acceptKeyword("Renvoyer")
-
-		# Génération du code pour l'instruction de retour
-		self.code_generator.write("return ")
-
-		value_type = self.expression()
+		expression = self.expression()
+		value_type = expression.type
 		function_name = self.symbol_table.current_scope
 		entry = self.symbol_table.lookup(function_name, "global")
 		type_function = entry.type
@@ -879,76 +757,90 @@ class SyntaxAnalyser:
 			raise SyntaxError(f"Function '{function_name}' is not declared or has no return type")
 		elif type_function != value_type:
 			raise TypeError(f"Return type '{value_type}' does not match function return type '{type_function}'")
-		logger.debug(f"Return statement in function '{function_name}': {value_type}")
-
-		# Génération du code pour la fin de l'instruction de retour
-		self.code_generator.write(";")
+		if TRACE: logger.debug("Return statement in function '%s': %s", function_name, value_type)
+		return Return(expression)
 
 	def identifiant(self) -> str:
 		"""Parse an identifier."""
-		logger.debug("identifiant()")
+		if TRACE: logger.debug("identifiant()")
 		ident = self.lexical_analyser.acceptIdentifier()
 		if not ident:
 			lexical_unit = self.lexical_analyser.get_current_unit()
    
 			raise SyntaxError(f"Expected an identifier <{self.lexical_analyser.get_value()}> ", lexical_unit.get_line_index(), lexical_unit.get_col_index())
-		logger.debug(f"Identifier: {ident}")
+		if TRACE: logger.debug("Identifier: %s", ident)
 		return ident
   
 	def entier(self):
 		"""Parse an integer."""
-		logger.debug("entier()")
+		if TRACE: logger.debug("entier()")
 		value = self.lexical_analyser.acceptInteger()
-		logger.debug(f"Integer value: {value}")
+		if TRACE: logger.debug("Integer value: %s", value)
 		if not value and value != 0:
-			logger.debug("No integer value found")
+			if TRACE: logger.debug("No integer value found")
 			raise SyntaxError("Expected an integer")
 		return value
 
 	def flottant(self) -> float:
 		"""Parse a float."""
-		logger.debug("flottant()")
+		if TRACE: logger.debug("flottant()")
 		integer_part = self.lexical_analyser.acceptInteger()
 		if not integer_part:
-			logger.debug("No integer part found")
+			if TRACE: logger.debug("No integer part found")
 			raise SyntaxError("Expected an integer part")
-		logger.debug(f"Integer part: {integer_part}")
+		if TRACE: logger.debug("Integer part: %s", integer_part)
 
 		if self.lexical_analyser.isSymbol("."):
 			self.lexical_analyser.acceptSymbol(".")
 			fractional_part = self.lexical_analyser.acceptInteger()
 			if not fractional_part:
-				logger.debug("No fractional part found")
+				if TRACE: logger.debug("No fractional part found")
 				raise SyntaxError("Expected a fractional part")
-			logger.debug(f"Fractional part: {fractional_part}")
+			if TRACE: logger.debug("Fractional part: %s", fractional_part)
 			return float(f"{integer_part}.{fractional_part}")
 		return float(integer_part)
 
 	def chaine(self) -> str:
 		"""Parse a string."""
-		logger.debug("chaine()")
+		if TRACE: logger.debug("chaine()")
 		value = self.lexical_analyser.acceptString()
-		logger.debug(f"String value: {value}")
+		if TRACE: logger.debug("String value: %s", value)
 		if not value:
-			logger.debug("No string value found")
+			if TRACE: logger.debug("No string value found")
 			raise SyntaxError("Expected a string")
 		return value
 
 	def analyse(self):
-		"""Start the syntax analysis."""
+		"""Start the syntax analysis, then write the C code of the program."""
+		self.parse()
+		self.generate()
+
+	def parse(self):
+		"""Build the syntax tree of the program, checked and folded, in self.program."""
 		try:
-			self.programme()
-			logger.debug("Syntax analysis completed successfully.")
+			self.lexical_analyser.init_analyser()
+			self.program = self.programme()
+			if TRACE: logger.debug("Syntax analysis completed successfully.")
+			if self.fold_constants:
+				fold_program(self.program)
 		except SyntaxError as e:
-			logger.error(f"Syntax error: {e}")
+			logger.error("Syntax error: %s", e)
 			raise e
 		except Exception as e:
-			logger.error(f"Unexpected error during syntax analysis: {e}")
+			logger.error("Unexpected error during syntax analysis: %s", e)
 			raise e
 
+	def generate(self):
+		"""Write the C code of the program built by parse()."""
+		self.code_generator.write_program(self.program)
+
+	def generate_bytecode(self):
+		"""Bytecode of the program built by parse(), for the virtual machine of src.vm."""
+		return BytecodeGenerator(self.symbol_table).generate(self.program)
+
 	def type_compatible(self, type_A: str, type_B: str) -> bool:
 		"""Check if two types are compatible."""
-		logger.debug(f"type_compatible(): {type_A} vs {type_B}")
+		if TRACE: logger.debug("type_compatible(): %s vs %s", type_A, type_B)
 		if type_A == type_B:
 			return True
 		if type_A == "entier" and type_B == "flottant":
@@ -957,6 +849,12 @@ class SyntaxAnalyser:
 			return True
 		return False
 
+	def number_type(self, type_A: str, type_B: str) -> str:
+		"""Type of an arithmetic operation between two numbers."""
+		if type_A == "flottant" or type_B == "flottant":
+			return "flottant"
+		return "entier"
+
 	def verify_types(self, type_A: str, type_B: str, wanted_type: list) -> bool:
 		"""Verify if two types are compatible. booleen, nombre->(entier, flottant), chaine"""
 		if type_A == "entier" or type_A == "flottant":
@@ -973,9 +871,9 @@ class SyntaxAnalyser:
 			return True
 		return False
 
-	def initialize_code_generator(self):
+	def initialize_code_generator(self, output_file="output_code.c"):
 		"""Initialize the code generator."""
-		self.code_generator = CodeGenerator("output_code.c")
+		self.code_generator = CodeGenerator(output_file)
 
 		str = """#include <stdio.h>
 #include <stdlib.h>
@@ -0,0 +1,445 @@
+import sys
+import array
+import struct
+import operator
+
+from src.expression import Constant, Variable, Call, Unary, Binary, Parenthesis, is_comparison
+from src.syntaxtree import Assignment, ProcedureCall, Print, Read, Return, While, If
+from src.interpreter import (InterpreterError, C_TYPES, c_precedence, converter, arithmetic_type,
+                             to_int, to_float, to_bool, int_division, int_modulo, float_division, float_modulo)
+
+# Format des fichiers .pcb : en-tête, puis tous les entiers et flottants en petit-boutiste
+MAGIC = b"PCB\x01"
+
+# Codes des instructions. Une instruction occupe dans le code son code puis ses ARGUMENTS[code] arguments
+LOAD = 0            # empile la variable d'indice arg du cadre
+LOAD_CONST = 1      # empile la constante d'indice arg
+STORE = 2           # dépile dans la variable d'indice arg
+BINARY_INT = 3      # opération BINARY_FUNCTIONS[arg] sur des int, ramenée dans les 32 bits
+BINARY = 4          # opération BINARY_FUNCTIONS[arg] sans conversion du résultat (flottants, comparaisons)
+UNARY = 5           # opération UNARY_FUNCTIONS[arg] sur le sommet de la pile
+JUMP = 6            # saut à la position arg du code
+JUMP_IF_FALSE = 7   # dépile, saute si la valeur est fausse
+JUMP_IF_TRUE = 8    # dépile, saute si la valeur est vraie
+CALL = 9            # appelle la fonction d'indice arg avec ses paramètres dépilés
+RETURN = 10         # retourne à l'appelant, la valeur renvoyée reste au sommet de la pile
+POP = 11            # dépile la valeur inutilisée (retour d'une procédure)
+PRINT = 12          # dépile et affiche avec le format arg (PRINT_INT, PRINT_FLOAT ou PRINT_STRING)
+READ = 13           # lit la variable d'indice arg du cadre
+UNARY_UNDER = 14    # opération UNARY_FUNCTIONS[arg] sur la valeur sous le sommet (opérande gauche d'une opération)
+
+# Superinstructions : une suite d'instructions fréquente dans les boucles en une seule (voir superinstructions())
+BINARY_INT_VC = 15      # op, a, k : empile variable a op constante k
+BINARY_INT_VV = 16      # op, a, b : empile variable a op variable b
+ASSIGN_INT_VC = 17      # op, a, k, d : variable d = variable a op constante k
+ASSIGN_INT_VV = 18      # op, a, b, d : variable d = variable a op variable b
+COMPARE_JUMP = 19       # op, cible : dépile deux valeurs, saute si leur comparaison est fausse
+COMPARE_JUMP_C = 20     # op, k, cible : dépile une valeur, saute si sa comparaison avec la constante k est fausse
+COMPARE_JUMP_VC = 21    # op, a, k, cible : saute si la comparaison de la variable a et de la constante k est fausse
+COMPARE_JUMP_VV = 22    # op, a, b, cible : saute si la comparaison des variables a et b est fausse
+BINARY_INT_C = 23       # op, k : sommet op constante k
+BINARY_INT_CV = 24      # op, k, a : empile constante k op variable a
+
+OPCODE_NAMES = ("LOAD", "LOAD_CONST", "STORE", "BINARY_INT", "BINARY", "UNARY", "JUMP", "JUMP_IF_FALSE",
+                "JUMP_IF_TRUE", "CALL", "RETURN", "POP", "PRINT", "READ", "UNARY_UNDER",
+                "BINARY_INT_VC", "BINARY_INT_VV", "ASSIGN_INT_VC", "ASSIGN_INT_VV",
+                "COMPARE_JUMP", "COMPARE_JUMP_C", "COMPARE_JUMP_VC", "COMPARE_JUMP_VV", "BINARY_INT_C", "BINARY_INT_CV")
+
+# Nature des arguments de chaque instruction : s emplacement du cadre, k constante, b opération de BINARY_FUNCTIONS,
+# u opération de UNARY_FUNCTIONS, t position de la cible d'un saut, f fonction, p format d'affichage, - inutilisé
+OPERANDS = ("s", "k", "s", "b", "b", "u", "t", "t", "t", "f", "-", "-", "p", "s", "u",
+            "bsk", "bss", "bsks", "bsss", "bt", "bkt", "bskt", "bsst", "bk", "bks")
+ARGUMENTS = tuple(len(operands) for operands in OPERANDS)
+JUMPS = {opcode for opcode, operands in enumerate(OPERANDS) if "t" in operands}
+
+# Suite d'instructions -> superinstruction. Ses arguments sont celui de l'opération, puis ceux des autres instructions dans l'ordre
+PATTERNS = (
+    ((LOAD, LOAD_CONST, BINARY_INT, STORE), ASSIGN_INT_VC),
+    ((LOAD, LOAD, BINARY_INT, STORE), ASSIGN_INT_VV),
+    ((LOAD, LOAD_CONST, BINARY, JUMP_IF_FALSE), COMPARE_JUMP_VC),
+    ((LOAD, LOAD, BINARY, JUMP_IF_FALSE), COMPARE_JUMP_VV),
+    ((LOAD, LOAD_CONST, BINARY_INT), BINARY_INT_VC),
+    ((LOAD, LOAD, BINARY_INT), BINARY_INT_VV),
+    ((LOAD_CONST, LOAD, BINARY_INT), BINARY_INT_CV),
+    ((LOAD_CONST, BINARY, JUMP_IF_FALSE), COMPARE_JUMP_C),
+    ((BINARY, JUMP_IF_FALSE), COMPARE_JUMP),
+    ((LOAD_CONST, BINARY_INT), BINARY_INT_C)
+)
+
+BINARY_FUNCTIONS = (operator.add, operator.sub, operator.mul, int_division, int_modulo, float_division, float_modulo,
+                    operator.eq, operator.ne, operator.lt, operator.le, operator.gt, operator.ge)
+INT_OPERATIONS = {"+": 0, "-": 1, "*": 2, "/": 3, "modulo": 4}
+FLOAT_OPERATIONS = {"+": 0, "-": 1, "*": 2, "/": 5, "modulo": 6}
+COMPARISON_OPERATIONS = {"egal": 7, "diff": 8, "inf": 9, "infegal": 10, "sup": 11, "supegal": 12}
+
+UNARY_FUNCTIONS = (to_int, to_float, to_bool, float, lambda value: to_int(-value), operator.neg, lambda value: 0 if value else 1)
+TO_INT, TO_FLOAT, TO_BOOL, TO_DOUBLE, NEGATE_INT, NEGATE, NOT = range(7)
+CONVERSIONS = {to_int: TO_INT, to_float: TO_FLOAT, to_bool: TO_BOOL, float: TO_DOUBLE}
+
+PRINT_INT, PRINT_FLOAT, PRINT_STRING = range(3)
+
+# Codes des types C dans un fichier .pcb
+TYPE_CODES = {"int": b"i", "float": b"f", "bool": b"b", "char*": b"s"}
+TYPES_BY_CODE = {code[0]: type for type, code in TYPE_CODES.items()}
+
+
+class Function:
+    """Bytecode of a procedure, a function or the main program, with the layout of its frame.
+
+    The frame has one slot for each parameter, in the order of the parameters, then one for each variable.
+    """
+    __slots__ = ("name", "parameters", "types", "return_type", "code")
+
+    def __init__(self, name, parameters, types, return_type, code):
+        self.name = name
+        self.parameters = parameters        # nombre de paramètres, au début du cadre
+        self.types = types                  # type C de chaque emplacement du cadre
+        self.return_type = return_type      # type C renvoyé, None pour une procédure
+        self.code = code                    # array('i') : chaque code d'instruction suivi de ses arguments
+
+    def initial_values(self):
+        # Valeurs des variables locales à l'entrée de la fonction (en C, leur valeur est indéterminée)
+        return [0.0 if type == "float" else "" if type == "char*" else 0 for type in self.types[self.parameters:]]
+
+    def disassemble(self):
+        lines = []
+        pc = 0
+        while pc < len(self.code):
+            opcode = self.code[pc]
+            arguments = self.code[pc + 1:pc + 1 + ARGUMENTS[opcode]]
+            lines.append(f"{pc:6} {OPCODE_NAMES[opcode]:<16}{' '.join(map(str, arguments))}")
+            pc += 1 + ARGUMENTS[opcode]
+        return "\n".join(lines)
+
+
+class Bytecode:
+    """Compiled program: a constant pool shared by all the functions, and the bytecode of each function."""
+    def __init__(self, constants, functions, main):
+        self.constants = constants          # int, float ou str
+        self.functions = functions          # liste de Function, indicée par l'argument de CALL
+        self.main = main                    # indice du programme principal dans functions
+
+    def save(self, filename):
+        """Write the bytecode in a .pcb file."""
+        with open(filename, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @staticmethod
+    def load(filename):
+        """Read a .pcb file written by save()."""
+        with open(filename, 'rb') as f:
+            return Bytecode.from_bytes(f.read())
+
+    def to_bytes(self):
+        chunks = [MAGIC, struct.pack("<II", len(self.constants), self.main)]
+        for constant in self.constants:
+            if isinstance(constant, str):
+                data = constant.encode()
+                chunks.append(struct.pack("<cI", b"s", len(data)) + data)
+            elif isinstance(constant, float):
+                chunks.append(struct.pack("<cd", b"d", constant))
+            else:
+                chunks.append(struct.pack("<cq", b"q", constant))
+        chunks.append(struct.pack("<I", len(self.functions)))
+        for function in self.functions:
+            name = function.name.encode()
+            types = b"".join(TYPE_CODES[type] for type in function.types)
+            return_type = TYPE_CODES[function.return_type] if function.return_type else b"-"
+            code = array.array('i', function.code)
+            if sys.byteorder == "big":
+                code.byteswap()
+            chunks.append(struct.pack("<I", len(name)) + name)
+            chunks.append(struct.pack("<cII", return_type, function.parameters, len(types)) + types)
+            chunks.append(struct.pack("<I", len(code)) + code.tobytes())
+        return b"".join(chunks)
+
+    @staticmethod
+    def from_bytes(data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a pseudo-code bytecode file")
+        position = len(MAGIC)
+
+        def unpack(format):
+            nonlocal position
+            values = struct.unpack_from(format, data, position)
+            position += struct.calcsize(format)
+            return values
+
+        def take(length):
+            nonlocal position
+            position += length
+            return data[position - length:position]
+
+        count, main = unpack("<II")
+        constants = []
+        for _ in range(count):
+            tag, = unpack("<c")
+            if tag == b"s":
+                length, = unpack("<I")
+                constants.append(take(length).decode())
+            elif tag == b"d":
+                constants.append(unpack("<d")[0])
+            else:
+                constants.append(unpack("<q")[0])
+
+        functions = []
+        for _ in range(unpack("<I")[0]):
+            name = take(unpack("<I")[0]).decode()
+            return_type, parameters, length = unpack("<cII")
+            types = [TYPES_BY_CODE[code] for code in take(length)]
+            code = array.array('i')
+            code.frombytes(take(unpack("<I")[0] * code.itemsize))
+            if sys.byteorder == "big":
+                code.byteswap()
+            functions.append(Function(name, parameters, types, None if return_type == b"-" else TYPES_BY_CODE[return_type[0]], code))
+        return Bytecode(constants, functions, main)
+
+
+def superinstructions(code):
+    """Code where the sequences of PATTERNS are replaced by their superinstruction, the jump targets being moved.
+
+    code has only instructions of one argument. A sequence is not replaced if a jump lands inside it.
+    """
+    instructions = [(code[position], code[position + 1]) for position in range(0, len(code), 2)]
+    labels = {argument for opcode, argument in instructions if opcode in JUMPS}
+    fused = []          # (code, arguments) des instructions du nouveau code
+    positions = {}      # position d'une instruction dans code -> position dans le nouveau code
+    size = index = 0
+    while index < len(instructions):
+        opcode, arguments, length = instructions[index][0], [instructions[index][1]], 1
+        for pattern, superinstruction in PATTERNS:
+            sequence = instructions[index:index + len(pattern)]
+            if (tuple(opcode for opcode, argument in sequence) == pattern
+                    and not any(2 * (index + offset) in labels for offset in range(1, len(pattern)))):
+                operation = next(offset for offset, opcode in enumerate(pattern) if opcode in (BINARY, BINARY_INT))
+                arguments = [sequence[operation][1]] + [argument for offset, (opcode, argument) in enumerate(sequence) if offset != operation]
+                opcode, length = superinstruction, len(pattern)
+                break
+        positions[2 * index] = size
+        fused.append((opcode, arguments))
+        size += 1 + len(arguments)
+        index += length
+    positions[2 * index] = size
+
+    result = array.array('i')
+    for opcode, arguments in fused:
+        if opcode in JUMPS:
+            arguments[-1] = positions[arguments[-1]]
+        result.append(opcode)
+        result.extend(arguments)
+    return result
+
+
+def frame_layout(symbol_table, scope):
+    """Symbol table entries of the slots of a frame: the parameters in their order, then the local variables."""
+    parameters = []
+    if scope != "global":
+        parameters = symbol_table.lookup(scope, "global").args
+    variables = [entry for entry in symbol_table.entries
+                 if entry.scope == scope and entry.role == "variable" and all(entry is not parameter for parameter in parameters)]
+    return parameters + variables
+
+
+class BytecodeGenerator:
+    """Compile the syntax tree of a program into stack bytecode.
+
+    The frame layouts come from the symbol table, the values computed are the ones of the C code
+    of the program (see src.interpreter for the C semantics reproduced).
+    """
+    def __init__(self, symbol_table):
+        self.symbol_table = symbol_table
+        self.constants = []
+        self.constant_index = {}    # (type Python, repr de la valeur) -> indice dans constants
+        self.function_index = {}    # nom -> indice dans functions
+        self.signatures = {}        # nom -> (type C renvoyé, types C des paramètres)
+        self.code = None            # code de la fonction en cours de compilation
+        self.slots = None           # nom -> indice du cadre de la fonction en cours de compilation
+        self.types = None
+        self.return_type = None
+
+    def generate(self, program):
+        """Bytecode of the program, its main program being the last function."""
+        for index, definition in enumerate(program.definitions):
+            self.function_index[definition.name] = index
+            self.signatures[definition.name] = (C_TYPES[definition.type] if definition.type else None,
+                                                [C_TYPES[parameter.type] for parameter in definition.parameters])
+        functions = [self.generate_function(definition.name, definition.body, len(definition.parameters), self.signatures[definition.name][0])
+                     for definition in program.definitions]
+        functions.append(self.generate_function("global", program.body, 0, "int"))
+        functions[-1].name = program.name
+        return Bytecode(self.constants, functions, len(functions) - 1)
+
+    def generate_function(self, scope, body, parameters, return_type):
+        layout = frame_layout(self.symbol_table, scope)
+        self.slots = {entry.name: index for index, entry in enumerate(layout)}
+        self.types = [C_TYPES[entry.type] for entry in layout]
+        self.return_type = return_type
+        self.code = array.array('i')
+        self.generate_instructions(body)
+        # Fin de la fonction sans "Renvoyer" : 0 comme valeur par défaut
+        self.emit(LOAD_CONST, self.constant(0.0 if return_type == "float" else 0))
+        self.emit(RETURN)
+        return Function(scope, parameters, self.types, return_type, superinstructions(self.code))
+
+    def emit(self, opcode, argument=0):
+        self.code.append(opcode)
+        self.code.append(argument)
+        return len(self.code) - 1       # position de l'argument, pour les sauts complétés plus tard
+
+    def patch(self, position, target=None):
+        # Saut vers target, ou vers la prochaine instruction émise
+        self.code[position] = len(self.code) if target is None else target
+
+    def constant(self, value):
+        # repr() distingue 0.0 de -0.0, que printf n'affiche pas de la même façon
+        key = (type(value), repr(value))
+        if key not in self.constant_index:
+            self.constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return self.constant_index[key]
+
+    def slot(self, name):
+        if name not in self.slots:
+            raise InterpreterError(f"Variable '{name}' is not declared in this function")
+        return self.slots[name]
+
+    def convert(self, target, source):
+        conversion = converter(target, source)
+        if conversion is not None:
+            self.emit(UNARY, CONVERSIONS[conversion])
+
+    def generate_instructions(self, instructions):
+        for instruction in instructions:
+            self.generate_instruction(instruction)
+
+    def generate_instruction(self, instruction):
+        if isinstance(instruction, Assignment):
+            slot = self.slot(instruction.name)
+            self.convert(self.types[slot], self.generate_expression(instruction.expression))
+            self.emit(STORE, slot)
+        elif isinstance(instruction, ProcedureCall):
+            self.generate_call(instruction.name, instruction.arguments)
+            self.emit(POP)
+        elif isinstance(instruction, Print):
+            self.generate_expression(instruction.expression)
+            type = instruction.expression.type
+            self.emit(PRINT, PRINT_STRING if type == "chaine" else PRINT_FLOAT if type == "flottant" else PRINT_INT)
+        elif isinstance(instruction, Read):
+            self.emit(READ, self.slot(instruction.name))
+        elif isinstance(instruction, Return):
+            self.convert(self.return_type or "int", self.generate_expression(instruction.expression))
+            self.emit(RETURN)
+        elif isinstance(instruction, While):
+            start = len(self.code)
+            self.generate_expression(instruction.condition)
+            exit = self.emit(JUMP_IF_FALSE)
+            self.generate_instructions(instruction.body)
+            self.emit(JUMP, start)
+            self.patch(exit)
+        elif isinstance(instruction, If):
+            self.generate_expression(instruction.condition)
+            otherwise = self.emit(JUMP_IF_FALSE)
+            self.generate_instructions(instruction.then_body)
+            if instruction.else_body is None:
+                self.patch(otherwise)
+            else:
+                end = self.emit(JUMP)
+                self.patch(otherwise)
+                self.generate_instructions(instruction.else_body)
+                self.patch(end)
+        else:
+            raise TypeError(f"Unknown instruction node: {instruction!r}")
+
+    def generate_call(self, name, arguments):
+        if name not in self.signatures:
+            raise InterpreterError(f"'{name}' is declared but not defined")
+        for argument, parameter_type in zip(arguments, self.signatures[name][1]):
+            self.convert(parameter_type, self.generate_expression(argument))
+        self.emit(CALL, self.function_index[name])
+        return self.signatures[name][0]
+
+    def generate_expression(self, expression):
+        """Emit the code pushing the value of an expression. Returns the C type of this value."""
+        if isinstance(expression, Constant):
+            if expression.type == "booleen":
+                self.emit(LOAD_CONST, self.constant(to_bool(expression.value)))
+                return "int"
+            if expression.type == "flottant":
+                self.emit(LOAD_CONST, self.constant(float(expression.value)))
+                return "double"
+            self.emit(LOAD_CONST, self.constant(expression.value))
+            return C_TYPES[expression.type]
+        if isinstance(expression, Variable):
+            slot = self.slot(expression.name)
+            self.emit(LOAD, slot)
+            return self.types[slot]
+        if isinstance(expression, Call):
+            return self.generate_call(expression.name, expression.arguments)
+        if isinstance(expression, Parenthesis):
+            return self.generate_expression(expression.expression)
+        if isinstance(expression, Unary):
+            type = self.generate_expression(expression.operand)
+            if expression.operator == "non":
+                self.emit(UNARY, NOT)
+                return "int"
+            type = "int" if type == "bool" else type
+            if expression.operator == "-":
+                self.emit(UNARY, NEGATE_INT if type == "int" else NEGATE)
+            return type
+        if isinstance(expression, Binary) and expression.operator in ("et", "ou"):
+            return self.generate_logical(expression)
+        if isinstance(expression, Binary):
+            if is_comparison(expression) and (is_comparison(expression.left) or is_comparison(expression.right)):
+                expression = c_precedence(expression)
+            # Les suites "a + b + c ..." sont profondes à gauche : la branche gauche est parcourue en boucle
+            spine = []
+            while isinstance(expression, Binary) and expression.operator not in ("et", "ou"):
+                spine.append(expression)
+                expression = expression.left
+            type = self.generate_expression(expression)
+            for node in reversed(spine):
+                type = self.generate_operation(node, type)
+            return type
+        raise TypeError(f"Unknown expression node: {expression!r}")
+
+    def generate_operation(self, node, left_type):
+        # L'opérande gauche est déjà sur la pile : sa conversion, connue après le type de l'opérande droit, se fait sous le sommet
+        right_type = self.generate_expression(node.right)
+        type = arithmetic_type(left_type, right_type)
+        conversion = converter(type, left_type)
+        if conversion is not None:
+            self.emit(UNARY_UNDER, CONVERSIONS[conversion])
+        self.convert(type, right_type)
+        if node.operator in COMPARISON_OPERATIONS:
+            self.emit(BINARY, COMPARISON_OPERATIONS[node.operator])
+            return "int"
+        if node.operator not in INT_OPERATIONS:
+            raise InterpreterError(f"Operator '{node.operator}' has no C equivalent")
+        if type == "int":
+            self.emit(BINARY_INT, INT_OPERATIONS[node.operator])
+        else:
+            self.emit(BINARY, FLOAT_OPERATIONS[node.operator])
+            if type == "float":
+                self.emit(UNARY, TO_FLOAT)
+        return type
+
+    def generate_logical(self, expression):
+        # "a ou b ou c" : les opérandes sont évalués de gauche à droite jusqu'au premier décisif, comme en C
+        operands = []
+        node = expression
+        while isinstance(node, Binary) and node.operator == expression.operator:
+            operands.append(node.right)
+            node = node.left
+        operands.append(node)
+        decisive = JUMP_IF_TRUE if expression.operator == "ou" else JUMP_IF_FALSE
+        jumps = []
+        for operand in reversed(operands):
+            self.generate_expression(operand)
+            jumps.append(self.emit(decisive))
+        self.emit(LOAD_CONST, self.constant(0 if expression.operator == "ou" else 1))
+        end = self.emit(JUMP)
+        for jump in jumps:
+            self.patch(jump)
+        self.emit(LOAD_CONST, self.constant(1 if expression.operator == "ou" else 0))
+        self.patch(end)
+        return "int"
@@ -0,0 +1,151 @@
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Fichiers stockés pour chaque compilation mise en cache
+C_CODE_FILE = "code.c"
+SYMBOL_TABLE_FILE = "symbol_table.txt"
+BINARY_FILE = "program.out"
+
+# Extension des fichiers stockant la compilation d'une seule définition
+FRAGMENT_EXTENSION = ".fragment"
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Cache directory: $XDG_CACHE_HOME/pcode, or ~/.cache/pcode."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pcode")
+
+
+def compiler_version():
+    """Hash of the compiler sources, so that any change of the compiler invalidates the cache."""
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(src_dir)):
+        if name.endswith(".py"):
+            digest.update(name.encode())
+            with open(os.path.join(src_dir, name), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+class CompilationCache:
+    """On-disk cache of compilations, keyed on the hash of the source, the compiler and the options.
+
+    Each entry is a directory holding the generated C code, the symbol table dump and the
+    compiled binary. The cache also keeps one fragment file per procedure or function definition,
+    so that only the modified definitions of a file are parsed again. Only the result of the parsing
+    is reused: the file is still lexed, and the whole program is folded and its C code generated again.
+    The least recently used entries are removed when the cache grows over max_size bytes.
+    """
+    def __init__(self, cache_dir=None, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = os.path.abspath(cache_dir or default_cache_dir())
+        self.max_size = max_size
+        self.version = compiler_version()
+
+    def key(self, input_filename, options=None):
+        digest = hashlib.sha256()
+        digest.update(self.version.encode())
+        digest.update(repr(sorted((options or {}).items())).encode())
+        with open(input_filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def entry_path(self, key, name=None):
+        if name is None:
+            return os.path.join(self.cache_dir, key)
+        return os.path.join(self.cache_dir, key, name)
+
+    def get(self, key):
+        """Returns the directory of the entry, or None on a cache miss."""
+        path = self.entry_path(key)
+        if not os.path.isfile(os.path.join(path, BINARY_FILE)):
+            return None
+        os.utime(path) # Marque l'entrée comme récemment utilisée
+        return path
+
+    def put(self, key, c_code, symbol_table, binary_filename):
+        """Stores a compilation. The entry is written aside then renamed, so a concurrent reader never sees it incomplete."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=".tmp", dir=self.cache_dir)
+        try:
+            with open(os.path.join(tmp_path, C_CODE_FILE), 'w') as f:
+                f.write(c_code)
+            with open(os.path.join(tmp_path, SYMBOL_TABLE_FILE), 'w') as f:
+                f.write(symbol_table)
+            shutil.copy2(binary_filename, os.path.join(tmp_path, BINARY_FILE))
+            os.replace(tmp_path, self.entry_path(key))
+        except OSError as e:
+            # Une autre compilation a pu stocker la même entrée entre-temps
+            logger.debug("Cache entry '%s' not stored: %s", key, e)
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+        self.evict()
+
+    def fragment_key(self, *fingerprints):
+        digest = hashlib.sha256()
+        digest.update(self.version.encode())
+        for fingerprint in fingerprints:
+            digest.update(fingerprint.encode())
+        return digest.hexdigest()
+
+    def get_fragment(self, key):
+        """Returns the syntax tree and the symbol table entries of a definition, or None on a cache miss."""
+        path = self.entry_path(key + FRAGMENT_EXTENSION)
+        try:
+            with open(path, 'rb') as f:
+                fragment = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+        os.utime(path)
+        return fragment
+
+    def put_fragment(self, key, definition, entries):
+        """Stores the syntax tree and the symbol table entries of one definition (procedure or function)."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp", dir=self.cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((definition, entries), f)
+        os.replace(tmp_path, self.entry_path(key + FRAGMENT_EXTENSION))
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits in max_size."""
+        entries = []
+        total_size = 0
+        for key in os.listdir(self.cache_dir):
+            path = self.entry_path(key)
+            if key.startswith(".tmp"):
+                continue
+            try:
+                if os.path.isdir(path):
+                    size = sum(entry.stat().st_size for entry in os.scandir(path))
+                else:
+                    size = os.path.getsize(path)
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                # Entrée supprimée entre-temps par une autre compilation (-j)
+                continue
+            entries.append((mtime, size, path))
+            total_size += size
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total_size -= size
+            logger.debug("Evicted cache entry '%s'", path)
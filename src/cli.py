@@ -0,0 +1,214 @@
+import os
+import sys
+import glob
+import json
+import shutil
+import socket
+import logging
+import argparse
+import tempfile
+import subprocess
+
+# Ligne de commande du compilateur et client du serveur de compilation (--connect).
+# Ce module n'importe aucun module du compilateur : le client démarre sans les charger.
+
+
+def default_socket_path():
+    """Socket of the compile server: in $XDG_RUNTIME_DIR if it is set, else in the temporary directory."""
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, f"pcode-{os.getuid()}.sock")
+
+
+def expand_inputs(inputs):
+    """List the files to compile: directories give their .pcode files, glob patterns are expanded."""
+    input_files = []
+    for name in inputs:
+        if os.path.isdir(name):
+            input_files.extend(sorted(glob.glob(os.path.join(name, "*.pcode"))))
+        elif any(c in name for c in "*?["):
+            input_files.extend(sorted(glob.glob(name, recursive=True)))
+        else:
+            input_files.append(name)
+    return input_files
+
+
+def input_root(input_files):
+    """Deepest directory holding all the input files: batch outputs keep their path relative to it."""
+    return os.path.commonpath([os.path.dirname(os.path.abspath(input_file)) for input_file in input_files])
+
+
+def batch_output(directory, input_file, extension, root):
+    """Path of the output of an input file in batch mode, or None if this output is not wanted.
+    The path of the input file relative to root (see input_root()) is kept under directory,
+    so that files with the same name in different directories don't overwrite each other's outputs."""
+    if not directory:
+        return None
+    name = os.path.relpath(os.path.abspath(input_file), root)
+    output_file = os.path.join(directory, os.path.splitext(name)[0] + extension)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    return output_file
+
+
+def check_exit_code(exit_code):
+    """Whether a program exited successfully, the error is logged if it didn't."""
+    if exit_code:
+        logging.error("Error: the program exited with code %s", exit_code)
+    return not exit_code
+
+
+def replay_records(records):
+    """Log again messages collected in another process."""
+    for level, name, message in records:
+        logging.getLogger(name).log(level, message)
+
+
+def main_client(socket_path, input_file, symbol_table_file=None, lexical_analysis_file=None, c_code_file=None, output_file=None, compiler_options=None):
+    """Forward the compilation of a file to the compile server, then write the outputs and run the program here.
+    Returns True if the compilation succeeded and the program exited with code 0.
+    compiler_options holds the fields of the CompilerOptions used by the server (see compiler_options())."""
+    try:
+        with open(os.path.abspath(input_file), 'r') as f:
+            source = f.read()
+    except FileNotFoundError:
+        logging.error("Error: can't open input file '%s'!", os.path.abspath(input_file))
+        return False
+
+    request = {"source": source, "lexical_analysis": bool(lexical_analysis_file), "binary": True}
+    if compiler_options is not None:
+        request["compiler_options"] = compiler_options
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(json.dumps(request).encode())
+            client.shutdown(socket.SHUT_WR)
+            with client.makefile('rb') as f:
+                response = json.loads(f.read())
+    except OSError as e:
+        logging.error("Error: can't reach compile server '%s': %s", socket_path, e)
+        return False
+
+    replay_records(response["diagnostics"])
+    if not response["success"]:
+        return False
+
+    outputs = ((lexical_analysis_file, "lexical_analysis"), (symbol_table_file, "symbol_table"), (c_code_file, "c_code"))
+    for filename, field in outputs:
+        if filename:
+            with open(os.path.abspath(filename), 'w') as f:
+                f.write(response[field])
+
+    binary_filename = response["binary"]
+    try:
+        if output_file:
+            shutil.copy2(binary_filename, os.path.abspath(output_file))
+        sys.stdout.flush()
+        exit_code = subprocess.run([binary_filename]).returncode
+    finally:
+        shutil.rmtree(os.path.dirname(binary_filename), ignore_errors=True)
+    return check_exit_code(exit_code)
+
+
+def compiler_options(args):
+    """Fields of the CompilerOptions (see src.codegenerator) chosen on the command line, as sent to the compile server."""
+    if args.release:
+        # Comme CompilerOptions.release()
+        return {"compiler": args.cc, "optimisation": 3, "native": True, "lto": True}
+    return {"compiler": args.cc, "optimisation": args.optimisation, "native": args.march_native, "lto": args.lto}
+
+
+def main_connect(args):
+    """Send the compilation of every input file to the compile server. Returns the exit status of the process."""
+    input_files = expand_inputs(args.input_files)
+    single_input = len(args.input_files) == 1 and input_files == args.input_files
+    root = input_root(input_files) if input_files else None
+    failures = []
+    for input_file in input_files:
+        if single_input:
+            outputs = (args.symbol_table, args.lexical_analysis, args.c_code, args.output_file)
+        else:
+            outputs = (
+                batch_output(args.symbol_table, input_file, ".st.txt", root),
+                batch_output(args.lexical_analysis, input_file, ".al.txt", root),
+                batch_output(args.c_code, input_file, ".c", root),
+                batch_output(args.output_file, input_file, ".out", root)
+            )
+        if not main_client(args.connect, input_file, *outputs, compiler_options=compiler_options(args)):
+            failures.append(input_file)
+    return 1 if failures else 0
+
+
+def parse_arguments():
+    """Arguments of the command line, checked, with the logging configured from them."""
+    args = parser.parse_args()
+
+    logging.basicConfig()
+    if args.verbose:
+        logging.getLogger().setLevel(logging.INFO)
+    else:
+        logging.getLogger().setLevel(logging.WARNING)
+    if args.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    if (args.interpret or args.vm) and (args.serve or args.connect):
+        parser.error("--interpret and --vm run the program in this process, they can't be used with --serve or --connect")
+    if args.bytecode and (args.serve or args.connect):
+        parser.error("--bytecode can't be used with --serve or --connect")
+    if not args.serve and not args.input_files:
+        parser.error("the following arguments are required: input_file")
+    return args
+
+
+parser = argparse.ArgumentParser(description="Pseudo-code compiler")
+parser.add_argument("input_files", nargs="*", metavar="input_file", help="Input files containing pseudo code (files, directories or glob patterns)")
+
+# -al to choose the output file for the lexical analyser
+parser.add_argument("-al", "--lexical_analysis", help="Output file for the lexical analyser, binary token stream if it ends with .pct (directory when several files are compiled)")
+
+# -st to choose the output file for the symbol table
+parser.add_argument("-st", "--symbol_table", help="Output file for the symbol table (directory when several files are compiled)")
+
+# -c to choose the output file for the c code
+parser.add_argument("-c", "--c_code", help="Output file for the C code (directory when several files are compiled)")
+
+# -o to choose output file
+parser.add_argument("-o", "--output_file", help="Output file for the compiled code (directory when several files are compiled)")
+
+# -v for verbose output
+parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose output", default=False)
+
+# -s to run the lexical analysis on demand while parsing
+parser.add_argument("-s", "--stream", action="store_true", help="Read the lexical units while parsing instead of lexing the whole file first", default=False)
+
+# -j to compile the files in parallel
+parser.add_argument("-j", "--jobs", type=int, nargs="?", const=os.cpu_count(), default=1, help="Number of worker processes when several files are compiled (default: 1, alone: one per core)")
+
+# --no-cache to always compile, --cache-dir to choose where compilations are cached
+parser.add_argument("--no-cache", action="store_true", help="Do not use the compilation cache", default=False)
+parser.add_argument("--cache-dir", help="Directory of the compilation cache (default: ~/.cache/pcode)")
+
+# --serve to start a resident compile server, --connect to send the compilation to it
+parser.add_argument("--serve", nargs="?", const=default_socket_path(), metavar="SOCKET", help="Run a compile server listening on a Unix socket")
+parser.add_argument("--connect", nargs="?", const=default_socket_path(), metavar="SOCKET", help="Send the compilation to a compile server")
+
+# -O, --march-native, --lto and --cc to choose how the generated C code is compiled
+parser.add_argument("-O", dest="optimisation", type=int, choices=range(4), help="Optimisation level of the C compiler (0 to 3)")
+parser.add_argument("--march-native", action="store_true", help="Tune the program for the processor of this machine", default=False)
+parser.add_argument("--lto", action="store_true", help="Enable link-time optimisation", default=False)
+parser.add_argument("--cc", default="gcc", metavar="COMPILER", help="C compiler used to build the program (default: gcc)")
+
+# --release for the fastest program: -O3 --march-native --lto
+parser.add_argument("--release", action="store_true", help="Same as -O3 --march-native --lto", default=False)
+
+# --interpret to run the program in this process instead of compiling it with the C compiler
+parser.add_argument("--interpret", action="store_true", help="Run the program with the built-in interpreter instead of building it with the C compiler", default=False)
+
+# --vm to run the program with the bytecode virtual machine, -b to write its bytecode in a .pcb file that can be run again without analysis
+parser.add_argument("--vm", action="store_true", help="Run the program with the bytecode virtual machine instead of building it with the C compiler", default=False)
+parser.add_argument("-b", "--bytecode", help="Output file for the bytecode (directory when several files are compiled), a .pcb input file is run by the virtual machine")
+
+# --time-report to print the time and memory used by each phase, --profile to profile the compiler
+parser.add_argument("--time-report", nargs="?", const="table", choices=("table", "json"), help="Print the wall time, CPU time and peak memory of each phase (as a table, or as one JSON line per file)")
+parser.add_argument("--profile", nargs="?", const="pcode.pstats", metavar="FILE", help="Profile the compiler with cProfile and write the statistics to FILE (default: pcode.pstats)")
+
+# -d for debug output
+parser.add_argument("-d", "--debug", action="store_true", help="Enable debug output", default=False)
@@ -1,16 +1,73 @@
-from src.analex import LexicalAnalyser
+from src.expression import Constant, Variable, Call, Unary, Binary, Parenthesis
+from src.syntaxtree import Assignment, ProcedureCall, Print, Read, Return, While, If
 
 import os
+import sys
+import time
+import shutil
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+
+class CompilationError(Exception):
+    """Exception raised when the C compiler rejects the generated code."""
+    def __init__(self, message, diagnostics=""):
+        super().__init__(message)
+        self.message = message
+        self.diagnostics = diagnostics
+
+    def __str__(self):
+        return self.message
+
+
+class CompilerOptions:
+    """C compiler used to build the generated code and its optimisation settings."""
+    def __init__(self, compiler="gcc", optimisation=None, native=False, lto=False):
+        self.compiler = compiler            # gcc, clang, cc...
+        self.optimisation = optimisation    # niveau d'optimisation (0 à 3), None pour celui par défaut du compilateur
+        self.native = native                # -march=native
+        self.lto = lto                      # optimisation à l'édition de liens (-flto)
+
+    @staticmethod
+    def release(compiler="gcc"):
+        # Réglages les plus rapides pour le programme produit
+        return CompilerOptions(compiler, optimisation=3, native=True, lto=True)
+
+    def flags(self):
+        flags = ["-Wall"]
+        if self.optimisation is not None:
+            flags.append(f"-O{self.optimisation}")
+        if self.native:
+            flags.append("-march=native")
+        if self.lto:
+            flags.append("-flto")
+        return flags
+
+    def as_dict(self):
+        return {"compiler": self.compiler, "optimisation": self.optimisation, "native": self.native, "lto": self.lto}
+
+    def __str__(self):
+        return " ".join([self.compiler] + self.flags())
+
 
 class CodeGenerator:
     
-    def __init__(self, output_file):
+    def __init__(self, output_file, compiler_options=None):
         self.output_file = os.path.abspath(output_file)
+        self.compiler_options = compiler_options or CompilerOptions()
 
         self.number_of_tabs = 0
 
-        with open(self.output_file, 'w') as f:
-            f.write("")
+        # Le code est accumulé en mémoire puis transmis en une seule fois au compilateur C
+        self.fragments = []
+        self.last_car = ""
+
+        # Durée (en secondes) de chaque étape après la génération : "gcc" (compilateur C), "execution"
+        self.timings = {}
+        # Messages du compilateur C lors de la dernière compilation
+        self.diagnostics = ""
 
     def write(self, text):
         
@@ -31,8 +88,8 @@ class CodeGenerator:
         if self.is_new_line():
             text = "\t" * self.number_of_tabs + text
 
-        with open(self.output_file, 'a') as f:
-            f.write(text)
+        self.fragments.append(text)
+        self.last_car = text[-1]
 
 
     def is_new_line(self):
@@ -40,11 +97,12 @@ class CodeGenerator:
         return last_car == "\n"
 
     def get_last_car(self):
-        with open(self.output_file, 'r') as f:
-            lines = f.readlines()
-            if lines:
-                return lines[-1][-1]
-        return ""
+        return self.last_car
+
+    def get_code(self):
+        code = "".join(self.fragments)
+        self.fragments = [code]
+        return code
     
     def association_keyword(self, value):
         
@@ -65,6 +123,9 @@ class CodeGenerator:
             "ou" : "||",
             "non" : "!",
             "modulo" : "%",
+
+            "Vrai" : "true",
+            "Faux" : "false",
             
             "entree" : "",
             "entree sortie": "*",
@@ -79,24 +140,167 @@ class CodeGenerator:
             return keywords[value]
         return value
     
+    def write_program(self, program):
+        # Parcours de l'arbre syntaxique (voir src.syntaxtree) : prototypes, définitions puis programme principal
+        for prototype in program.prototypes:
+            self.write_signature(prototype)
+            self.write(");")
+        for definition in program.definitions:
+            self.write_signature(definition)
+            self.write(") {")
+            self.write_declarations(definition.variables)
+            self.write_instructions(definition.body)
+            self.write("}")
+
+        self.write("int main() {")
+        self.write_declarations(program.variables)
+        self.write_instructions(program.body)
+        self.write("return 0;")
+        self.write("}")
+
+    def write_signature(self, operation):
+        # Début de l'en-tête d'une procédure ou d'une fonction, jusqu'à ses paramètres inclus
+        cg_type = self.association_keyword(operation.type or "vide")
+        self.write(f"{cg_type} {operation.name}(")
+        for index, parameter in enumerate(operation.parameters):
+            if index > 0:
+                self.write(", ")
+            cg_type = self.association_keyword(parameter.type)
+            cg_mode = self.association_keyword(parameter.mode)
+            self.write(f"{cg_type}{cg_mode} {parameter.name}")
+
+    def write_declarations(self, declarations):
+        for declaration in declarations:
+            cg_type = self.association_keyword(declaration.type)
+            for name in declaration.names:
+                self.write(f"{cg_type} {name};")
+
+    def write_instructions(self, instructions):
+        for instruction in instructions:
+            self.write_instruction(instruction)
+
+    def write_instruction(self, instruction):
+        if isinstance(instruction, Assignment):
+            self.write(f"{instruction.name} = ")
+            self.write(self.expression_code(instruction.expression))
+            self.write(";")
+        elif isinstance(instruction, ProcedureCall):
+            self.write(f"{instruction.name}(")
+            if instruction.arguments:
+                self.write(", ".join(self.expression_code(argument) for argument in instruction.arguments))
+            self.write(");")
+        elif isinstance(instruction, Print):
+            self.write("printf(")
+            self.write("\"")
+            self.write(self.association_keyword("print_" + instruction.expression.type))
+            self.write("\\n")
+            self.write("\",")
+            self.write(self.expression_code(instruction.expression))
+            self.write(");")
+        elif isinstance(instruction, Read):
+            cg_type = self.association_keyword("print_" + instruction.type)
+            self.write(f"scanf(\"{cg_type}\", &{instruction.name});")
+        elif isinstance(instruction, Return):
+            self.write("return ")
+            self.write(self.expression_code(instruction.expression))
+            self.write(";")
+        elif isinstance(instruction, While):
+            self.write("while (")
+            self.write(self.expression_code(instruction.condition))
+            self.write(") {")
+            self.write_instructions(instruction.body)
+            self.write("}")
+        elif isinstance(instruction, If):
+            self.write("if (")
+            self.write(self.expression_code(instruction.condition))
+            self.write(") {")
+            self.write_instructions(instruction.then_body)
+            self.write("}")
+            if instruction.else_body is not None:
+                self.write("else {")
+                self.write_instructions(instruction.else_body)
+                self.write("}")
+        else:
+            raise TypeError(f"Unknown instruction node: {instruction!r}")
+
+    def expression_code(self, expression, first=True):
+        # Code C d'un arbre d'expression (voir src.expression)
+        # first : l'expression commence le code produit, ou suit une parenthèse ou une virgule
+        if isinstance(expression, Constant):
+            if expression.type == "booleen":
+                return self.association_keyword("Vrai" if expression.value else "Faux")
+            if expression.type == "chaine":
+                return f'"{expression.value}"'
+            if not first and str(expression.value).startswith("-"):
+                # Constante négative issue d'un calcul après un opérateur : "a-(-3)" et non "a--3"
+                return f"({expression.value})"
+            return str(expression.value)
+        if isinstance(expression, Variable):
+            return expression.name
+        if isinstance(expression, Call):
+            arguments = ", ".join(self.expression_code(argument) for argument in expression.arguments)
+            return f"{expression.name}({arguments})"
+        if isinstance(expression, Parenthesis):
+            return f"({self.expression_code(expression.expression)})"
+        if isinstance(expression, Unary):
+            return self.association_keyword(expression.operator) + self.expression_code(expression.operand, False)
+        if isinstance(expression, Binary):
+            # Les suites "a + b + c ..." sont profondes à gauche : la branche gauche est parcourue en boucle
+            spine = []
+            while isinstance(expression, Binary):
+                spine.append(expression)
+                expression = expression.left
+            code = [self.expression_code(expression, first)]
+            for node in reversed(spine):
+                code.append(self.association_keyword(node.operator))
+                code.append(self.expression_code(node.right, False))
+            return "".join(code)
+        raise TypeError(f"Unknown expression node: {expression!r}")
+
     def delete_file(self):
-        os.remove(self.output_file)
+        if os.path.exists(self.output_file):
+            os.remove(self.output_file)
 
     def set_output_file(self, output_file):
         self.output_file = os.path.abspath(output_file)
-        with open(self.output_file, 'w') as f:
-            f.write("")
+        self.fragments = []
+        self.last_car = ""
 
     def compile_file(self):
-        os.system(f"gcc {self.output_file} -o {self.output_file}.out -Wall")
-        os.remove(self.output_file)
+        # Le code C est transmis au compilateur sur son entrée standard : aucun fichier .c intermédiaire
+        binary = f"{self.output_file}.out"
+        compiler = self.compiler_options.compiler
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(
+                [compiler, "-x", "c", "-", "-o", binary] + self.compiler_options.flags(),
+                input=self.get_code(), capture_output=True, text=True
+            )
+        except FileNotFoundError:
+            raise CompilationError(f"C compiler '{compiler}' not found")
+        self.timings["gcc"] = time.perf_counter() - start
+        self.diagnostics = result.stderr
+        if result.returncode != 0:
+            raise CompilationError(f"C compilation failed ({compiler} exit code {result.returncode}):\n{result.stderr}", result.stderr)
+        if result.stderr:
+            logger.warning("C compiler diagnostics:\n%s", result.stderr)
+        logger.info("C compilation (%s) completed in %.1f ms.", self.compiler_options, self.timings['gcc'] * 1000)
 
     def execute_file(self):
-        os.system(f"{self.output_file}.out")
-        os.remove(f"{self.output_file}.out")
+        binary = f"{self.output_file}.out"
+        sys.stdout.flush()
+        start = time.perf_counter()
+        try:
+            result = subprocess.run([binary])
+        finally:
+            self.timings["execution"] = time.perf_counter() - start
+            os.remove(binary)
+        logger.info("Execution completed in %.1f ms (exit code %s).", self.timings['execution'] * 1000, result.returncode)
+        return result.returncode
 
     def copy_c_file(self, dest):
-        os.system(f"cp {self.output_file} {dest}")
+        with open(dest, 'w') as f:
+            f.write(self.get_code())
 
     def copy_bin_file(self, dest):
-        os.system(f"cp {self.output_file}.out {dest}")
\ No newline at end of file
+        shutil.copy2(f"{self.output_file}.out", dest)
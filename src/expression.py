@@ -0,0 +1,89 @@
+class Expression:
+    """Node of the typed expression tree built by the syntax analyser.
+
+    type is the pseudo-code type of the value ('entier', 'flottant', 'booleen', 'chaine').
+    Operators are kept as written in the pseudo-code ('+', 'modulo', 'egal', 'et', 'non'...),
+    the code generator translates them to C.
+    """
+    __slots__ = ("type",)
+
+    def __init__(self, type):
+        self.type = type
+
+
+class Constant(Expression):
+    __slots__ = ("value",)
+
+    def __init__(self, type, value):
+        super().__init__(type)
+        self.value = value          # int, float, bool, ou le texte de la chaîne sans ses guillemets
+
+    def __str__(self):
+        return f"{self.value!r} ({self.type})"
+
+
+class Variable(Expression):
+    __slots__ = ("name",)
+
+    def __init__(self, type, name):
+        super().__init__(type)
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class Call(Expression):
+    __slots__ = ("name", "arguments")
+
+    def __init__(self, type, name, arguments):
+        super().__init__(type)
+        self.name = name
+        self.arguments = arguments  # liste d'expressions
+
+    def __str__(self):
+        return f"{self.name}({', '.join(str(argument) for argument in self.arguments)})"
+
+
+class Unary(Expression):
+    __slots__ = ("operator", "operand")
+
+    def __init__(self, type, operator, operand):
+        super().__init__(type)
+        self.operator = operator
+        self.operand = operand
+
+    def __str__(self):
+        return f"({self.operator} {self.operand})"
+
+
+class Binary(Expression):
+    __slots__ = ("operator", "left", "right")
+
+    def __init__(self, type, operator, left, right):
+        super().__init__(type)
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+    def __str__(self):
+        return f"({self.left} {self.operator} {self.right})"
+
+
+class Parenthesis(Expression):
+    """Parentheses written in the source, kept so that the C code has the same grouping."""
+    __slots__ = ("expression",)
+
+    def __init__(self, expression):
+        super().__init__(expression.type)
+        self.expression = expression
+
+    def __str__(self):
+        return str(self.expression)
+
+
+COMPARISON_OPERATORS = frozenset(("egal", "diff", "inf", "infegal", "sup", "supegal"))
+
+
+def is_comparison(expression):
+    return isinstance(expression, Binary) and expression.operator in COMPARISON_OPERATORS
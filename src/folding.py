@@ -0,0 +1,263 @@
+import math
+import logging
+
+from src.expression import Constant, Variable, Call, Unary, Binary, Parenthesis, is_comparison
+from src.syntaxtree import Assignment, ProcedureCall, Print, Return, While, If
+
+logger = logging.getLogger(__name__)
+
+# Bornes d'un int C : un calcul qui en sort n'est pas évalué (dépassement indéfini en C)
+INT_MIN = -2**31
+INT_MAX = 2**31 - 1
+
+
+def fold_program(program):
+    """Fold the expressions of a program and remove the branches that can never run.
+
+    The bodies of the main program and of the definitions are replaced by their folded instructions.
+    """
+    for definition in program.definitions:
+        definition.body = fold_instructions(definition.body)
+    program.body = fold_instructions(program.body)
+
+
+def fold_instructions(instructions):
+    folded = []
+    for instruction in instructions:
+        if isinstance(instruction, Assignment):
+            folded.append(Assignment(instruction.name, fold(instruction.expression)))
+        elif isinstance(instruction, ProcedureCall):
+            folded.append(ProcedureCall(instruction.name, [fold(argument) for argument in instruction.arguments]))
+        elif isinstance(instruction, Print):
+            folded.append(Print(fold(instruction.expression)))
+        elif isinstance(instruction, Return):
+            folded.append(Return(fold(instruction.expression)))
+        elif isinstance(instruction, While):
+            condition = fold(instruction.condition)
+            # "Tant que Faux" : la boucle n'est jamais exécutée
+            if truth_value(condition) is not False:
+                folded.append(While(condition, fold_instructions(instruction.body)))
+        elif isinstance(instruction, If):
+            condition = fold(instruction.condition)
+            branch = truth_value(condition)
+            # Condition connue à la compilation : seule la branche prise est gardée, sans "if"
+            if branch is True:
+                folded.extend(fold_instructions(instruction.then_body))
+            elif branch is False:
+                folded.extend(fold_instructions(instruction.else_body or []))
+            else:
+                else_body = fold_instructions(instruction.else_body) if instruction.else_body is not None else None
+                folded.append(If(condition, fold_instructions(instruction.then_body), else_body))
+        else:
+            folded.append(instruction)
+    return folded
+
+
+def fold(expression):
+    """Evaluate the constant subexpressions and simplify the identities of an expression tree.
+
+    The result computes the same value as the C code of the original expression:
+    integer division and modulo truncate like in C, and an operation whose result
+    is undefined or not representable (overflow, division by zero) is left to the program.
+    """
+    if isinstance(expression, (Constant, Variable)):
+        return expression
+    if isinstance(expression, Parenthesis):
+        inner = fold(expression.expression)
+        if isinstance(inner, (Constant, Variable, Call, Parenthesis)):
+            return inner
+        return Parenthesis(inner)
+    if isinstance(expression, Call):
+        return Call(expression.type, expression.name, [fold(argument) for argument in expression.arguments])
+    if isinstance(expression, Unary):
+        return fold_unary(Unary(expression.type, expression.operator, fold(expression.operand)))
+    if is_comparison_chain(expression):
+        # "a inf b egal c" est typé a inf (b egal c) mais se lit (a < b) == c en C :
+        # seuls les opérandes d'une telle suite de comparaisons sont simplifiés
+        return fold_comparison_chain(expression)
+
+    # Une suite "a + b + c ..." donne un arbre profond à gauche : il est parcouru en boucle
+    spine = []
+    while isinstance(expression, Binary) and not is_comparison_chain(expression):
+        spine.append(expression)
+        expression = expression.left
+    folded = fold(expression)
+    for node in reversed(spine):
+        folded = fold_binary(Binary(node.type, node.operator, folded, fold(node.right)))
+    return folded
+
+
+def is_comparison_chain(expression):
+    return is_comparison(expression) and (is_comparison(expression.left) or is_comparison(expression.right))
+
+
+def truth_value(expression):
+    """True or False if the expression is a constant condition, None otherwise."""
+    if isinstance(expression, Constant) and expression.type != "chaine":
+        return bool(expression.value)
+    return None
+
+
+def is_pure(expression):
+    """An expression without function call: removing it does not change what the program does."""
+    pending = [expression]
+    while pending:
+        expression = pending.pop()
+        if isinstance(expression, Call):
+            return False
+        if isinstance(expression, Parenthesis):
+            pending.append(expression.expression)
+        elif isinstance(expression, Unary):
+            pending.append(expression.operand)
+        elif isinstance(expression, Binary):
+            pending.append(expression.left)
+            pending.append(expression.right)
+    return True
+
+
+def constant(type, value):
+    """Constant of the given type, or None if C could not hold the value."""
+    if type == "entier":
+        if not isinstance(value, int) or not INT_MIN < value <= INT_MAX:
+            return None
+    elif type == "flottant":
+        value = float(value)
+        if not math.isfinite(value):
+            return None
+    elif type == "booleen":
+        value = bool(value)
+    return Constant(type, value)
+
+
+def fold_comparison_chain(expression):
+    # Les opérandes et les opérateurs de la suite sont relevés en boucle, puis la suite est reconstruite profonde à gauche
+    operands, operators = [], []
+    pending = [expression]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, str):
+            operators.append(node)
+        elif is_comparison(node):
+            pending += [node.right, node.operator, node.left]
+        else:
+            operands.append(fold(node))
+    folded = operands[0]
+    for operator, right in zip(operators, operands[1:]):
+        folded = Binary(expression.type, operator, folded, right)
+    return folded
+
+
+def fold_unary(expression):
+    operand = expression.operand
+    if expression.operator == "+" and operand.type in ("entier", "flottant"):
+        return operand
+    if not isinstance(operand, Constant):
+        return expression
+    if expression.operator == "-" and operand.type in ("entier", "flottant"):
+        return constant(operand.type, -operand.value) or expression
+    if expression.operator == "non" and operand.type == "booleen":
+        return Constant("booleen", not operand.value)
+    return expression
+
+
+def c_division(a, b):
+    quotient = abs(a) // abs(b)
+    return quotient if (a < 0) == (b < 0) else -quotient
+
+
+def evaluate(operator, a, b):
+    """Value of a binary operation on two constants as computed in C, None if it is not evaluated here."""
+    integers = isinstance(a, int) and isinstance(b, int)
+    if operator == "+":
+        return a + b
+    if operator == "-":
+        return a - b
+    if operator == "*":
+        return a * b
+    if operator == "/":
+        if b == 0:
+            return None
+        return c_division(a, b) if integers else a / b
+    if operator == "modulo":
+        if not integers or b == 0:
+            return None
+        return a - b * c_division(a, b)
+    if operator == "egal":
+        return a == b
+    if operator == "diff":
+        return a != b
+    if operator == "inf":
+        return a < b
+    if operator == "infegal":
+        return a <= b
+    if operator == "sup":
+        return a > b
+    if operator == "supegal":
+        return a >= b
+    if operator == "et":
+        return a and b
+    if operator == "ou":
+        return a or b
+    # "//" n'a pas d'équivalent C : l'expression est laissée telle quelle
+    return None
+
+
+def fold_binary(expression):
+    operator, left, right = expression.operator, expression.left, expression.right
+
+    if isinstance(left, Constant) and isinstance(right, Constant) and "chaine" not in (left.type, right.type):
+        value = evaluate(operator, left.value, right.value)
+        if value is not None:
+            folded = constant(expression.type, value)
+            if folded is not None:
+                logger.debug("Folded %s into %s", expression, folded)
+                return folded
+        return expression
+
+    if operator in ("et", "ou"):
+        return simplify_logical(expression)
+    return simplify_arithmetic(expression)
+
+
+def simplify_logical(expression):
+    # Le court-circuit de C est respecté : l'opérande de gauche est toujours évalué le premier
+    operator, left, right = expression.operator, expression.left, expression.right
+    absorbing = operator == "ou"  # Vrai pour "ou", Faux pour "et"
+    if truth_value(left) == absorbing:
+        return Constant("booleen", absorbing)
+    if truth_value(left) == (not absorbing):
+        return right
+    if truth_value(right) == (not absorbing):
+        return left
+    if truth_value(right) == absorbing and is_pure(left):
+        return Constant("booleen", absorbing)
+    return expression
+
+
+def is_number(expression, value):
+    return isinstance(expression, Constant) and expression.type in ("entier", "flottant") and expression.value == value
+
+
+def simplify_arithmetic(expression):
+    # Une simplification n'est faite que si elle garde le type de l'expression (affichage avec %d ou %f)
+    operator, left, right = expression.operator, expression.left, expression.right
+    same_type = lambda kept: kept.type == expression.type
+    if operator == "+" and expression.type == "entier":
+        if is_number(right, 0) and same_type(left):
+            return left
+        if is_number(left, 0) and same_type(right):
+            return right
+    elif operator == "-":
+        if is_number(right, 0) and same_type(left):
+            return left
+    elif operator == "*":
+        if is_number(right, 1) and same_type(left):
+            return left
+        if is_number(left, 1) and same_type(right):
+            return right
+        if expression.type == "entier" and ((is_number(right, 0) and is_pure(left)) or (is_number(left, 0) and is_pure(right))):
+            return Constant("entier", 0)
+    elif operator == "/":
+        if is_number(right, 1) and same_type(left):
+            return left
+    return expression
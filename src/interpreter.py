@@ -0,0 +1,474 @@
+import re
+import sys
+import math
+import struct
+import operator
+
+from src.expression import Constant, Variable, Call, Unary, Binary, Parenthesis, is_comparison
+from src.syntaxtree import Assignment, ProcedureCall, Print, Read, Return, While, If
+
+# Type C des valeurs : celui du code produit par le générateur de code
+C_TYPES = {"entier": "int", "flottant": "float", "booleen": "bool", "chaine": "char*"}
+
+# Comparaisons de même priorité en C : les relations avant les égalités
+RELATIONS = ("inf", "infegal", "sup", "supegal")
+
+FLOAT = struct.Struct("f")
+
+# Champ lu par scanf pour chaque type : entier, flottant, mot
+SCANF_PATTERNS = {
+    "int": re.compile(r"[+-]?\d+"),
+    "bool": re.compile(r"[+-]?\d+"),
+    "float": re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?|[+-]?(inf(inity)?|nan)", re.IGNORECASE),
+    "char*": re.compile(r"\S+")
+}
+
+# Séquences d'échappement des chaînes C, interprétées par printf
+ESCAPES = re.compile(r"\\(.)")
+ESCAPED = {"n": "\n", "t": "\t", "\\": "\\", "\"": "\"", "'": "'", "0": "\0"}
+
+
+class InterpreterError(Exception):
+    """Exception raised when the interpreted program fails (division by zero, recursion too deep)."""
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+def to_int(value):
+    # Un int C fait 32 bits : le résultat qui en sort reboucle comme avec gcc
+    value = int(value)
+    if -2147483648 <= value <= 2147483647:
+        return value
+    return (value + 2147483648) % 4294967296 - 2147483648
+
+
+def to_float(value):
+    # Un float C est en simple précision
+    try:
+        return FLOAT.unpack(FLOAT.pack(value))[0]
+    except OverflowError:
+        return math.copysign(math.inf, value)
+
+
+def to_bool(value):
+    return 1 if value else 0
+
+
+def converter(target, source):
+    """Function converting a value of the C type source to the C type target, None if there is nothing to do."""
+    if target == source or target == "char*":
+        return None
+    if target == "int":
+        return to_int if source in ("float", "double") else None
+    if target == "float":
+        return to_float
+    if target == "double":
+        return float
+    if target == "bool":
+        return to_bool
+    return None
+
+
+def converted(value, conversion):
+    """Closure converting the result of the closure value."""
+    return lambda frame: conversion(value(frame))
+
+
+def arithmetic_type(left, right):
+    """C type of an arithmetic operation (usual arithmetic conversions)."""
+    if "double" in (left, right):
+        return "double"
+    if "float" in (left, right):
+        return "float"
+    return "int"
+
+
+def int_division(a, b):
+    # Division entière de C : le quotient est tronqué vers 0
+    if b == 0:
+        raise InterpreterError("Division by zero")
+    quotient = a // b
+    if quotient < 0 and quotient * b != a:
+        quotient += 1
+    return quotient
+
+
+def int_modulo(a, b):
+    # Le reste a le signe du dividende, comme en C
+    if b == 0:
+        raise InterpreterError("Division by zero")
+    remainder = a % b
+    if remainder and (a < 0) != (b < 0):
+        remainder -= b
+    return remainder
+
+
+def float_division(a, b):
+    if b == 0:
+        raise InterpreterError("Division by zero")
+    return a / b
+
+
+def float_modulo(a, b):
+    if b == 0:
+        raise InterpreterError("Division by zero")
+    return math.fmod(a, b)
+
+
+INT_ARITHMETIC = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": int_division, "modulo": int_modulo}
+FLOAT_ARITHMETIC = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": float_division, "modulo": float_modulo}
+
+# Les comparaisons donnent True ou False, qui valent 1 et 0 comme en C
+COMPARISONS = {"egal": operator.eq, "diff": operator.ne, "inf": operator.lt, "infegal": operator.le, "sup": operator.gt, "supegal": operator.ge}
+
+# Conversion d'un champ lu par lire() dans le type de la variable
+READERS = {"int": lambda text: to_int(int(text)), "bool": lambda text: to_bool(int(text)), "float": lambda text: to_float(float(text)), "char*": str}
+
+
+def c_precedence(expression):
+    """Tree of a chain of comparisons as C computes its code.
+
+    The syntax analyser types "a inf b egal c" as a inf (b egal c), but the C code a<b==c
+    compares first, from left to right, the relations, then the equalities: (a<b)==c.
+    """
+    operands, operators = [], []
+    pending = [expression]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, str):
+            operators.append(node)
+        elif is_comparison(node):
+            pending += [node.right, node.operator, node.left]
+        else:
+            operands.append(node)
+
+    groups, equalities = [operands[0]], []
+    for name, operand in zip(operators, operands[1:]):
+        if name in RELATIONS:
+            groups[-1] = Binary("booleen", name, groups[-1], operand)
+        else:
+            equalities.append(name)
+            groups.append(operand)
+    tree = groups[0]
+    for name, group in zip(equalities, groups[1:]):
+        tree = Binary("booleen", name, tree, group)
+    return tree
+
+
+class Scope:
+    """Frame layout of a procedure, a function or the main program: a slot of the frame for each parameter and variable."""
+    def __init__(self, parameters, declarations, return_type="int"):
+        self.slots = {}         # nom -> indice dans le cadre
+        self.types = []         # type C de chaque emplacement
+        self.return_type = return_type
+        for parameter in parameters:
+            self.add(parameter.name, parameter.type)
+        for declaration in declarations:
+            for name in declaration.names:
+                self.add(name, declaration.type)
+
+    def add(self, name, type):
+        self.slots[name] = len(self.types)
+        self.types.append(C_TYPES[type])
+
+    def index(self, name):
+        # Comme en C, une fonction ne voit pas les variables du programme principal
+        if name not in self.slots:
+            raise InterpreterError(f"Variable '{name}' is not declared in this function")
+        return self.slots[name]
+
+    def initial_values(self, start=0):
+        # Les variables non initialisées valent 0 (en C, leur valeur est indéterminée)
+        return [0.0 if type == "float" else "" if type == "char*" else 0 for type in self.types[start:]]
+
+
+class Interpreter:
+    """Run a program from its syntax tree, in this process, without C compiler.
+
+    The tree is compiled once into Python closures, one for each instruction and expression node,
+    that compute the values the C code of the program would compute: 32-bit int wrapping around,
+    float variables in single precision, constants in double precision, truncated integer division.
+    As in the generated C code, the parameters are passed by value.
+    """
+    def __init__(self, program, input=None, output=None):
+        self.program = program
+        self.input = input      # sys.stdin si None
+        self.output = output    # sys.stdout si None
+        self.functions = {}     # nom -> fonction Python appelée avec la liste des valeurs des paramètres
+        self.signatures = {}    # nom -> (type C renvoyé ou None pour une procédure, types C des paramètres)
+        self.pending = ""       # reste de la ligne lue par lire() et pas encore utilisé
+        self.main = None
+
+    def compile(self):
+        """Compile the tree into closures. Done once, run() can then be called several times."""
+        for definition in self.program.definitions:
+            return_type = C_TYPES[definition.type] if definition.type else None
+            self.signatures[definition.name] = (return_type, [C_TYPES[parameter.type] for parameter in definition.parameters])
+        for definition in self.program.definitions:
+            self.functions[definition.name] = self.compile_definition(definition)
+        scope = Scope([], self.program.variables)
+        body = self.compile_block(self.program.body, scope)
+
+        def main():
+            result = body(scope.initial_values())
+            return 0 if result is None else result
+        self.main = main
+
+    def run(self):
+        """Run the program. Returns its exit code, as the one of the C program."""
+        if self.main is None:
+            self.compile()
+        output = self.output or sys.stdout
+        self.write = output.write
+        self.pending = ""
+        try:
+            return self.main()
+        except RecursionError:
+            raise InterpreterError("Recursion too deep")
+        finally:
+            output.flush()
+
+    def compile_definition(self, definition):
+        return_type = self.signatures[definition.name][0]
+        scope = Scope(definition.parameters, definition.variables, return_type)
+        body = self.compile_block(definition.body, scope)
+        # Les paramètres occupent le début du cadre, les variables locales la suite
+        variables = scope.initial_values(len(definition.parameters))
+        default = 0.0 if return_type == "float" else 0
+
+        def call(arguments):
+            result = body(arguments + variables)
+            return default if result is None else result
+        return call
+
+    def compile_arguments(self, name, arguments, scope):
+        """Closures of the arguments of a call, converted to the types of the parameters."""
+        if name not in self.signatures:
+            raise InterpreterError(f"'{name}' is declared but not defined")
+        compiled = []
+        for argument, parameter_type in zip(arguments, self.signatures[name][1]):
+            value, type = self.compile_expression(argument, scope)
+            conversion = converter(parameter_type, type)
+            compiled.append(converted(value, conversion) if conversion else value)
+        return compiled
+
+    def compile_block(self, instructions, scope):
+        statements = [self.compile_instruction(instruction, scope) for instruction in instructions]
+        if len(statements) == 1:
+            return statements[0]
+
+        # Une instruction renvoie None, sauf "Renvoyer" qui renvoie la valeur de la fonction
+        def block(frame):
+            for statement in statements:
+                result = statement(frame)
+                if result is not None:
+                    return result
+        return block
+
+    def compile_instruction(self, instruction, scope):
+        if isinstance(instruction, Assignment):
+            index = scope.index(instruction.name)
+            value, type = self.compile_expression(instruction.expression, scope)
+            conversion = converter(scope.types[index], type)
+            if conversion is None:
+                def assignment(frame):
+                    frame[index] = value(frame)
+            else:
+                def assignment(frame):
+                    frame[index] = conversion(value(frame))
+            return assignment
+
+        if isinstance(instruction, ProcedureCall):
+            arguments = self.compile_arguments(instruction.name, instruction.arguments, scope)
+            functions, name = self.functions, instruction.name
+
+            def procedure_call(frame):
+                functions[name]([argument(frame) for argument in arguments])
+            return procedure_call
+
+        if isinstance(instruction, Print):
+            value, type = self.compile_expression(instruction.expression, scope)
+            if instruction.expression.type == "chaine":
+                format = lambda text: ESCAPES.sub(lambda match: ESCAPED.get(match.group(1), match.group(1)), text) + "\n"
+            elif instruction.expression.type == "flottant":
+                format = lambda number: "%f\n" % number
+            else:
+                format = lambda number: "%d\n" % number
+
+            def print_value(frame):
+                self.write(format(value(frame)))
+            return print_value
+
+        if isinstance(instruction, Read):
+            index = scope.index(instruction.name)
+            pattern, reader = SCANF_PATTERNS[scope.types[index]], READERS[scope.types[index]]
+
+            def read(frame):
+                text = self.scan(pattern)
+                # Comme scanf, la variable garde sa valeur si l'entrée ne contient pas de valeur du bon type
+                if text is not None:
+                    frame[index] = reader(text)
+            return read
+
+        if isinstance(instruction, Return):
+            # La valeur renvoyée n'est jamais None, même 0 ou Faux : elle arrête le bloc qui l'exécute
+            value, type = self.compile_expression(instruction.expression, scope)
+            conversion = converter(scope.return_type or "int", type)
+            return converted(value, conversion) if conversion else value
+
+        if isinstance(instruction, While):
+            condition = self.compile_expression(instruction.condition, scope)[0]
+            body = self.compile_block(instruction.body, scope)
+
+            def loop(frame):
+                while condition(frame):
+                    result = body(frame)
+                    if result is not None:
+                        return result
+            return loop
+
+        if isinstance(instruction, If):
+            condition = self.compile_expression(instruction.condition, scope)[0]
+            then_body = self.compile_block(instruction.then_body, scope)
+            if instruction.else_body is None:
+                def alternative(frame):
+                    if condition(frame):
+                        return then_body(frame)
+            else:
+                else_body = self.compile_block(instruction.else_body, scope)
+
+                def alternative(frame):
+                    if condition(frame):
+                        return then_body(frame)
+                    return else_body(frame)
+            return alternative
+
+        raise TypeError(f"Unknown instruction node: {instruction!r}")
+
+    def compile_expression(self, expression, scope):
+        """Closure computing the value of an expression in a frame, and the C type of this value."""
+        if isinstance(expression, Constant):
+            value = expression.value
+            if expression.type == "booleen":
+                value = to_bool(value)
+            type = "double" if expression.type == "flottant" else C_TYPES[expression.type]
+            return (lambda frame: value), type
+
+        if isinstance(expression, Variable):
+            index = scope.index(expression.name)
+            return operator.itemgetter(index), scope.types[index]
+
+        if isinstance(expression, Call):
+            arguments = self.compile_arguments(expression.name, expression.arguments, scope)
+            functions, name = self.functions, expression.name
+            return (lambda frame: functions[name]([argument(frame) for argument in arguments])), self.signatures[name][0]
+
+        if isinstance(expression, Parenthesis):
+            return self.compile_expression(expression.expression, scope)
+
+        if isinstance(expression, Unary):
+            operand, type = self.compile_expression(expression.operand, scope)
+            if expression.operator == "non":
+                return (lambda frame: 0 if operand(frame) else 1), "int"
+            type = "int" if type == "bool" else type
+            if expression.operator == "-":
+                return ((lambda frame: to_int(-operand(frame))) if type == "int" else (lambda frame: -operand(frame))), type
+            return operand, type
+
+        if isinstance(expression, Binary) and expression.operator in ("et", "ou"):
+            # Une suite "a ou b ou c ..." est évaluée en boucle, de gauche à droite, jusqu'à la première valeur décisive
+            operands = []
+            node = expression
+            while isinstance(node, Binary) and node.operator == expression.operator:
+                operands.append(self.compile_expression(node.right, scope)[0])
+                node = node.left
+            operands.append(self.compile_expression(node, scope)[0])
+            operands.reverse()
+            if expression.operator == "et":
+                def conjunction(frame):
+                    for operand in operands:
+                        if not operand(frame):
+                            return 0
+                    return 1
+                return conjunction, "int"
+
+            def disjunction(frame):
+                for operand in operands:
+                    if operand(frame):
+                        return 1
+                return 0
+            return disjunction, "int"
+
+        if isinstance(expression, Binary):
+            if is_comparison(expression) and (is_comparison(expression.left) or is_comparison(expression.right)):
+                expression = c_precedence(expression)
+            # Les suites "a + b + c ..." sont profondes à gauche : la branche gauche est parcourue en boucle
+            spine = []
+            while isinstance(expression, Binary) and expression.operator not in ("et", "ou"):
+                spine.append(expression)
+                expression = expression.left
+            value, type = self.compile_expression(expression, scope)
+            for node in reversed(spine):
+                right, right_type = self.compile_expression(node.right, scope)
+                constant = node.right.value if isinstance(node.right, Constant) and node.right.type in ("entier", "flottant") else None
+                value, type = self.compile_operation(node.operator, value, type, right, right_type, constant)
+            return value, type
+
+        raise TypeError(f"Unknown expression node: {expression!r}")
+
+    def compile_operation(self, name, left, left_type, right, right_type, constant=None):
+        """Closure of a binary operation on two compiled operands, and the C type of its result.
+        constant is the value of the right operand if it is a number known at compile time."""
+        if name not in INT_ARITHMETIC and name not in COMPARISONS:
+            raise InterpreterError(f"Operator '{name}' has no C equivalent")
+        type = arithmetic_type(left_type, right_type)
+        convert_left, convert_right = converter(type, left_type), converter(type, right_type)
+        if convert_left:
+            left = converted(left, convert_left)
+        if convert_right:
+            right = converted(right, convert_right)
+            constant = convert_right(constant) if constant is not None else None
+
+        if name in COMPARISONS:
+            operation = COMPARISONS[name]
+            if constant is not None:
+                return (lambda frame: operation(left(frame), constant)), "int"
+            return (lambda frame: operation(left(frame), right(frame))), "int"
+
+        if type != "int":
+            operation = FLOAT_ARITHMETIC[name]
+        if type == "float":
+            return (lambda frame: to_float(operation(left(frame), right(frame)))), type
+        if type == "double":
+            return (lambda frame: operation(left(frame), right(frame))), type
+
+        # Opération sur des int : seul un résultat hors des 32 bits est ramené dans l'intervalle
+        operation = INT_ARITHMETIC[name]
+        if constant is not None:
+            def operation_constant(frame):
+                value = operation(left(frame), constant)
+                return value if -2147483648 <= value <= 2147483647 else to_int(value)
+            return operation_constant, type
+
+        def operation_int(frame):
+            value = operation(left(frame), right(frame))
+            return value if -2147483648 <= value <= 2147483647 else to_int(value)
+        return operation_int, type
+
+    def scan(self, pattern):
+        """Next field of the input matching pattern, as scanf: None at the end of the input or if the field does not match."""
+        while not self.pending.strip():
+            line = (self.input or sys.stdin).readline()
+            if not line:
+                return None
+            self.pending = line
+        self.pending = self.pending.lstrip()
+        match = pattern.match(self.pending)
+        if match is None:
+            return None
+        self.pending = self.pending[match.end():]
+        return match.group()
@@ -1,15 +1,16 @@
+from sys import intern
+
 ########################################################################				 	
 #### LexicalUnit classes					    ####				 	
 ########################################################################
 
 ## Class LexicalUnit
 #
-# Root class for the hierarchy of Lexical Units
+# Root class for the hierarchy of Lexical Units.
+# Units are stored in __slots__ (no instance __dict__) since a source file
+# produces a large number of them.
 class LexicalUnit(object):
-	line_index = -1
-	col_index = -1	
-	length = 0
-	value = None
+	__slots__ = ("line_index", "col_index", "length", "value")
 	
 	## The constructor
 	def __init__(self, l, c, ln, value):
@@ -60,23 +61,16 @@ class LexicalUnit(object):
         # @return A lexical unit (instance of a child class)
 	@staticmethod
 	def extract_from_line(line):
-		fields = line.split('\t')
-		if fields[0] == Identifier.__class__.__name__:
-			return Identifier(fields[1], fields[2], fields[3], fields[4])
-		elif fields[0] == Keyword.__class__.__name__:
-			return Keyword(fields[1], fields[2], fields[3], fields[4])
-		elif fields[0] == Character.__class__.__name__:
-			return Character(fields[1], fields[2], fields[3], fields[4])
-		elif fields[0] == Symbol.__class__.__name__:
-			return Symbol(fields[1], fields[2], fields[3], fields[4])
-		elif fields[0] == Fel.__class__.__name__:
-			return Fel(fields[1], fields[2], fields[3], fields[4])
-		elif fields[0] == Integer.__class__.__name__:
-			return Integer(fields[1], fields[2], fields[3], fields[4])
-		elif fields[0] == String.__class__.__name__:
-			return String(fields[1], fields[2], fields[3], fields[4])
-		elif fields[0] == Float.__class__.__name__:
-			return Float(fields[1], fields[2], fields[3], fields[4])
+		fields = line.rstrip('\r\n').split('\t', 4) # a string value may contain tabulations
+		unit_class = UNIT_CLASSES[fields[0]]
+		value = fields[4]
+		if unit_class is Integer:
+			value = int(value)
+		elif unit_class is Float:
+			value = float(value)
+		elif unit_class is Identifier or unit_class is Keyword:
+			value = intern(value)
+		return unit_class(int(fields[1]), int(fields[2]), int(fields[3]), value)
 	
         ## Returns the object as a formatted string
 	def __str__(self):
@@ -87,9 +81,7 @@ class LexicalUnit(object):
 #
 # This class inherits from LexicalUnit.
 class Identifier(LexicalUnit):
-        ## The constructor
-	def __init__(self, l, c, ln, v):
-		super(Identifier, self).__init__(l, c, ln, v)
+	__slots__ = ()
 
 	## Return true since it is an Identifier
 	def is_identifier(self):
@@ -99,9 +91,7 @@ class Identifier(LexicalUnit):
 #
 # This class inherits from LexicalUnit.		
 class Keyword(LexicalUnit):
-	## The constructor
-	def __init__(self, l, c, ln, v):
-		super(Keyword, self).__init__(l, c, ln, v)
+	__slots__ = ()
 		
         ## Return true since it is a keyword
 	def is_keyword(self, keyword):
@@ -111,9 +101,7 @@ class Keyword(LexicalUnit):
 #
 # This class inherits from LexicalUnit.			
 class Character(LexicalUnit):
-        ## The constructor
-	def __init__(self, l, c, ln, v):
-		super(Character, self).__init__(l, c, ln, v)
+	__slots__ = ()
 
         ## Return true since it is a character
 	def is_character(self, c):
@@ -123,9 +111,7 @@ class Character(LexicalUnit):
 #
 # This class inherits from LexicalUnit.		
 class Symbol(LexicalUnit):
-        ## The constructor
-	def __init__(self, l, c, ln, v):
-		super(Symbol, self).__init__(l, c, ln, v)
+	__slots__ = ()
 
         ## Return true since it is a symbol
 	def is_symbol(self, s):
@@ -135,9 +121,7 @@ class Symbol(LexicalUnit):
 #
 # This class inherits from LexicalUnit.		
 class Integer(LexicalUnit):
-        ## The constructor
-	def __init__(self, l, c, ln, v):
-		super(Integer, self).__init__(l, c, ln, v)
+	__slots__ = ()
 	
         ## Return true since it is an integer
 	def is_integer(self):
@@ -147,9 +131,7 @@ class Integer(LexicalUnit):
 #
 # This class inherits from LexicalUnit.			
 class Fel(LexicalUnit):
-        ## The constructor
-	def __init__(self, l, c, ln, v):
-		super(Fel, self).__init__(l, c, ln, v)
+	__slots__ = ()
 
         ## Return true since it is a Fel instance
 	def is_fel(self):
@@ -160,9 +142,7 @@ class Fel(LexicalUnit):
 #
 # This class inherits from LexicalUnit.
 class String(LexicalUnit):
-	## The constructor
-	def __init__(self, l, c, ln, v):
-		super(String, self).__init__(l, c, ln, v)
+	__slots__ = ()
 
 	## Return true since it is a string
 	def is_string(self):
@@ -173,10 +153,11 @@ class String(LexicalUnit):
 #
 # This class inherits from LexicalUnit.
 class Float(LexicalUnit):
-	## The constructor
-	def __init__(self, l, c, ln, v):
-		super(Float, self).__init__(l, c, ln, v)
+	__slots__ = ()
 
 	## Return true since it is a float
 	def is_float(self):
-		return True
\ No newline at end of file
+		return True
+
+## Classes of the lexical units by name, as written by LexicalUnit.__str__
+UNIT_CLASSES = {unit_class.__name__: unit_class for unit_class in (Identifier, Keyword, Character, Symbol, Integer, Fel, String, Float)}
@@ -1,6 +1,5 @@
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -35,21 +34,26 @@ class SymbolTableEntry:
 
 class SymbolTable:
     def __init__(self):
-        self.entries = []       # Stocke les entrées de la table des symboles
-        self.current_scope = "global"   # Scope où se trouve actuellement la table
+        self.entries = []       # Stocke les entrées de la table des symboles (ordre de déclaration)
+        self.index = {}         # Accès direct aux entrées par (portée, nom)
+        self.scopes = ["global"]    # Pile des portées, la portée courante est au sommet
         self.mode_prototype = False  # Indique si on est dans un prototype de fonction ou de procédure
 
+    @property
+    def current_scope(self):
+        return self.scopes[-1]
 
     def enter_scope(self, scope_name):
-        self.current_scope = scope_name
+        self.scopes.append(scope_name)
     
     
     def leave_scope(self):
-        self.current_scope = "global"
+        if len(self.scopes) > 1:
+            self.scopes.pop()
     
     def add_entry(self, name, symbol_type, role, args, mode=None):
-        if self.lookup(name, self.current_scope):
-            logger.error(f"Duplicate declaration of '{name}' in scope '{self.current_scope}'")
+        if (self.current_scope, name) in self.index:
+            logger.error("Duplicate declaration of '%s' in scope '%s'", name, self.current_scope)
             raise SymbolTableError(f"Duplicate declaration of '{name}' in scope '{self.current_scope}'")
         if role == "variable":
             try:
@@ -62,22 +66,29 @@ class SymbolTable:
             except Exception as e:
                 raise SymbolTableError(f"Error adding function '{name}': {e}")
         self.entries.append(entry)
+        self.index[(entry.scope, name)] = entry
         
+    def restore_entries(self, entries):
+        # Ajoute des entrées créées lors d'une compilation précédente, avec leur propre portée
+        for entry in entries:
+            if (entry.scope, entry.name) in self.index:
+                raise SymbolTableError(f"Duplicate declaration of '{entry.name}' in scope '{entry.scope}'")
+            self.entries.append(entry)
+            self.index[(entry.scope, entry.name)] = entry
+
     def lookup(self, name, scope=None):
         if scope is None:
             scope = self.current_scope
-        for entry in self.entries:
-            if entry.name == name and entry.scope == scope:
-                return entry
-        return None
+        return self.index.get((scope, name))
 
     def verify_ident(self, ident, type):
-        if self.lookup(ident):
-            if self.lookup(ident).type == type:
+        entry = self.lookup(ident)
+        if entry:
+            if entry.type == type:
                 print(f"'{ident}' is declared in scope '{self.current_scope}' with type '{type}'")
                 return True
             else:
-                raise Exception(f"Type mismatch for '{ident}' in scope '{self.current_scope}' expected '{self.lookup(ident).type}' found '{type}'")
+                raise Exception(f"Type mismatch for '{ident}' in scope '{self.current_scope}' expected '{entry.type}' found '{type}'")
         else:
             raise Exception(f"'{ident}' is not declared in scope '{self.current_scope}'")
 
@@ -0,0 +1,126 @@
+class Program:
+    """Root of the typed syntax tree built by the syntax analyser.
+
+    The expressions of the instructions are trees of src.expression.
+    The code generator walks the tree once the whole program is parsed and checked.
+    """
+    __slots__ = ("name", "prototypes", "definitions", "variables", "body")
+
+    def __init__(self, name, prototypes, definitions, variables, body):
+        self.name = name
+        self.prototypes = prototypes        # liste de Prototype
+        self.definitions = definitions      # liste de Definition
+        self.variables = variables          # liste de VariableDeclaration du programme principal
+        self.body = body                    # liste d'instructions du programme principal
+
+
+class Parameter:
+    __slots__ = ("name", "type", "mode")
+
+    def __init__(self, name, type, mode):
+        self.name = name
+        self.type = type
+        self.mode = mode                    # "", "entree" ou "entreeSortie"
+
+
+class Prototype:
+    __slots__ = ("name", "type", "parameters")
+
+    def __init__(self, name, type, parameters):
+        self.name = name
+        self.type = type                    # type de retour, None pour une procédure
+        self.parameters = parameters        # liste de Parameter
+
+
+class Definition:
+    """Procedure or function definition."""
+    __slots__ = ("name", "type", "parameters", "variables", "body")
+
+    def __init__(self, name, type, parameters, variables, body):
+        self.name = name
+        self.type = type                    # type de retour, None pour une procédure
+        self.parameters = parameters
+        self.variables = variables
+        self.body = body
+
+
+class VariableDeclaration:
+    __slots__ = ("names", "type")
+
+    def __init__(self, names, type):
+        self.names = names
+        self.type = type
+
+
+class Assignment:
+    __slots__ = ("name", "expression")
+
+    def __init__(self, name, expression):
+        self.name = name
+        self.expression = expression
+
+
+class ProcedureCall:
+    __slots__ = ("name", "arguments")
+
+    def __init__(self, name, arguments):
+        self.name = name
+        self.arguments = arguments          # liste d'expressions
+
+
+class Print:
+    """afficher(expression)"""
+    __slots__ = ("expression",)
+
+    def __init__(self, expression):
+        self.expression = expression
+
+
+class Read:
+    """lire(variable)"""
+    __slots__ = ("name", "type")
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+
+class Return:
+    __slots__ = ("expression",)
+
+    def __init__(self, expression):
+        self.expression = expression
+
+
+class While:
+    __slots__ = ("condition", "body")
+
+    def __init__(self, condition, body):
+        self.condition = condition
+        self.body = body
+
+
+class If:
+    __slots__ = ("condition", "then_body", "else_body")
+
+    def __init__(self, condition, then_body, else_body=None):
+        self.condition = condition
+        self.then_body = then_body
+        self.else_body = else_body          # None s'il n'y a pas de "Sinon"
+
+
+def count_instructions(program):
+    """Number of instructions of a program, those of the loops and conditions included."""
+    count = 0
+    pending = [program.body] + [definition.body for definition in program.definitions]
+    while pending:
+        instructions = pending.pop()
+        count += len(instructions)
+        for instruction in instructions:
+            if isinstance(instruction, While):
+                pending.append(instruction.body)
+            elif isinstance(instruction, If):
+                pending.append(instruction.then_body)
+                if instruction.else_body is not None:
+                    pending.append(instruction.else_body)
+    return count
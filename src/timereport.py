@@ -0,0 +1,104 @@
+import json
+import time
+import resource
+import contextlib
+import tracemalloc
+
+
+# Phases d'une compilation, dans l'ordre où elles sont affichées
+PHASES = ("lexing", "parsing", "emission", "bytecode", "gcc", "execution")
+
+# Quantités produites par une compilation
+COUNTS = ("tokens", "symbols", "statements", "bytes")
+
+
+def cpu_time():
+    """CPU time (user and system) used by this process and by its children that have ended."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def max_rss(children=False):
+    """Peak resident memory in bytes of this process, or of the largest of its children that have ended."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    return usage.ru_maxrss * 1024   # ru_maxrss est en Ko sous Linux
+
+
+def reset_max_rss():
+    """Restart the peak resident memory of this process from its current size. Returns False where it can't be done.
+    Only Linux allows it (/proc/self/clear_refs), ru_maxrss then gives the peak since the reset."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class TimeReport:
+    """Wall time, CPU time and peak memory of the phases of one compilation, and what they produced.
+
+    The phases run in this process (lexing, parsing, emission, bytecode) report their own peak memory: the peak
+    resident memory of the process is reset when the phase starts. Where it can't be reset, the peak of the memory
+    allocated by Python during the phase is traced with tracemalloc, which slows the phase down.
+    The phases run by a child process (gcc, execution) report the peak memory of the largest child so far.
+    """
+    def __init__(self, input_file):
+        self.input_file = input_file
+        self.phases = {}        # nom de la phase -> {"wall", "cpu", "max_rss"}
+        self.counts = {}        # tokens, symbols, statements, bytes
+
+    @contextlib.contextmanager
+    def phase(self, name, children=False):
+        """Measure the block as the phase name. children tells that the phase runs in a child process."""
+        # Sans remise à zéro du pic de mémoire, le pic de la phase est mesuré par tracemalloc
+        traced = not children and not reset_max_rss()
+        if traced:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start_wall = time.perf_counter()
+        start_cpu = cpu_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = cpu_time() - start_cpu
+            if traced:
+                peak = tracemalloc.get_traced_memory()[1] - start_memory
+                if started:
+                    tracemalloc.stop()
+            else:
+                peak = max_rss(children)
+            self.phases[name] = {"wall": wall, "cpu": cpu, "max_rss": peak}
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def as_dict(self):
+        return {"input_file": self.input_file, "phases": self.phases, "counts": self.counts}
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
+
+    def to_table(self):
+        lines = [f"Time report for '{self.input_file}'", f"{'phase':<12}{'wall (ms)':>12}{'cpu (ms)':>12}{'max rss (MB)':>14}"]
+        total_wall = total_cpu = 0
+        for name in PHASES:
+            if name not in self.phases:
+                continue
+            phase = self.phases[name]
+            total_wall += phase["wall"]
+            total_cpu += phase["cpu"]
+            lines.append(f"{name:<12}{phase['wall'] * 1000:>12.2f}{phase['cpu'] * 1000:>12.2f}{phase['max_rss'] / 2**20:>14.1f}")
+        lines.append(f"{'total':<12}{total_wall * 1000:>12.2f}{total_cpu * 1000:>12.2f}")
+        if self.counts:
+            lines.append(", ".join(f"{self.counts[name]} {name}" for name in COUNTS if name in self.counts))
+        return "\n".join(lines)
+
+    def format(self, format="table"):
+        """The report as a table to read, or as one line of JSON ("json") for other tools."""
+        return self.to_json() if format == "json" else self.to_table()
@@ -0,0 +1,151 @@
+import sys
+import mmap
+import array
+import struct
+from sys import intern
+
+from src.lexicalunit import Identifier, Keyword, Character, Symbol, Integer, Fel, String, Float
+
+# Extension des fichiers d'unités lexicales binaires
+EXTENSION = ".pct"
+
+# En-tête : signature, nombre d'unités, nombre de chaînes de la table des chaînes
+MAGIC = b"PCT\x01"
+HEADER = struct.Struct("<4sII")
+
+# Nature d'une unité : indice de sa classe dans KIND_CLASSES
+KIND_CLASSES = (Identifier, Keyword, Character, Symbol, Integer, Fel, String, Float, Integer)
+INTEGER, FLOAT, BIG_INTEGER = 4, 7, 8      # BIG_INTEGER : entier hors de 64 bits, écrit dans la table des chaînes
+KIND_OF_CLASS = {unit_class: kind for kind, unit_class in enumerate(KIND_CLASSES[:BIG_INTEGER])}
+
+# Les unités sont construites par blocs, plus vite qu'une à une
+BLOCK = 1024
+
+# Colonnes du fichier, dans l'ordre : nom, code de type d'array
+COLUMNS = (("kinds", "B"), ("lines", "i"), ("columns", "i"), ("lengths", "i"), ("values", "q"))
+
+
+def padding(size):
+    # Chaque colonne commence sur 8 octets pour pouvoir être lue en place dans le fichier projeté en mémoire
+    return -size % 8
+
+
+class TokenStream:
+    """Lexical units stored column by column: kind, line, column, length and value of each unit.
+
+    The values that are not integers are indices in a table of strings, so a stream is a few arrays
+    that are written and read as they are in memory. load() maps the file in memory without copying it,
+    and the LexicalUnit objects are only built, BLOCK units at a time, when one of them is read.
+    """
+    def __init__(self, kinds, lines, columns, lengths, values, strings):
+        self.kinds = kinds
+        self.lines = lines
+        self.columns = columns
+        self.lengths = lengths
+        self.values = values        # entier, ou indice dans strings
+        self.strings = strings
+        self.units = [None] * len(kinds)    # unités déjà construites
+
+    @staticmethod
+    def from_units(units):
+        """Stream of a list of lexical units."""
+        columns = {name: array.array(code) for name, code in COLUMNS}
+        strings = []
+        string_index = {}
+        for unit in units:
+            kind = KIND_OF_CLASS[unit.__class__]
+            value = unit.value
+            if kind != INTEGER or not -2**63 <= value < 2**63:
+                if kind == INTEGER:
+                    kind = BIG_INTEGER
+                text = repr(value) if kind == FLOAT else str(value)
+                if text not in string_index:
+                    string_index[text] = len(strings)
+                    strings.append(text)
+                value = string_index[text]
+            columns["kinds"].append(kind)
+            columns["lines"].append(unit.line_index)
+            columns["columns"].append(unit.col_index)
+            columns["lengths"].append(unit.length)
+            columns["values"].append(value)
+        return TokenStream(*(columns[name] for name, code in COLUMNS), strings)
+
+    def __len__(self):
+        return len(self.units)
+
+    def __getitem__(self, index):
+        unit = self.units[index]
+        if unit is None:
+            self.build(index % len(self.units) // BLOCK * BLOCK)
+            unit = self.units[index]
+        return unit
+
+    def __iter__(self):
+        for index in range(len(self.units)):
+            yield self[index]
+
+    def build(self, start):
+        """Build the units of the block starting at the index start."""
+        end = min(start + BLOCK, len(self.units))
+        strings = self.strings
+        block = []
+        for kind, line, column, length, value in zip(self.kinds[start:end], self.lines[start:end], self.columns[start:end],
+                                                     self.lengths[start:end], self.values[start:end]):
+            if kind == FLOAT:
+                value = float(strings[value])
+            elif kind == BIG_INTEGER:
+                value = int(strings[value])
+            elif kind != INTEGER:
+                value = strings[value]
+            block.append(KIND_CLASSES[kind](line, column, length, value))
+        self.units[start:end] = block
+
+    def to_bytes(self):
+        text = "".join(self.strings)
+        offsets = array.array('I', [0])
+        for string in self.strings:
+            offsets.append(offsets[-1] + len(string))
+        chunks = [HEADER.pack(MAGIC, len(self), len(self.strings))]
+        size = HEADER.size
+        for column in [array.array(code, getattr(self, name)) for name, code in COLUMNS] + [offsets]:
+            if sys.byteorder == "big":
+                column.byteswap()
+            data = column.tobytes()
+            chunks += [b"\0" * padding(size), data]
+            size += padding(size) + len(data)
+        chunks.append(text.encode())
+        return b"".join(chunks)
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @staticmethod
+    def from_buffer(data):
+        """Stream read from the bytes written by to_bytes(). The columns are views of data, not copies."""
+        magic, count, string_count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a lexical unit stream file")
+        view = memoryview(data)
+        position = HEADER.size
+        columns = []
+        for name, code in COLUMNS + (("offsets", "I"),):
+            position += padding(position)
+            length = (string_count + 1 if name == "offsets" else count) * array.array(code).itemsize
+            if sys.byteorder == "big":
+                column = array.array(code, view[position:position + length].tobytes())
+                column.byteswap()
+            else:
+                column = view[position:position + length].cast(code)
+            columns.append(column)
+            position += length
+        offsets = columns.pop()
+        text = bytes(view[position:]).decode()
+        strings = [intern(text[offsets[index]:offsets[index + 1]]) for index in range(string_count)]
+        return TokenStream(*columns, strings)
+
+    @staticmethod
+    def load(filename):
+        """Stream of a file written by save(), mapped in memory."""
+        with open(filename, 'rb') as f:
+            return TokenStream.from_buffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
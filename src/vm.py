@@ -0,0 +1,174 @@
+import sys
+
+from src.bytecode import (LOAD, LOAD_CONST, STORE, BINARY_INT, BINARY, UNARY, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, CALL,
+                          RETURN, POP, PRINT, READ, UNARY_UNDER, BINARY_INT_VC, BINARY_INT_VV, ASSIGN_INT_VC, ASSIGN_INT_VV,
+                          COMPARE_JUMP, COMPARE_JUMP_C, COMPARE_JUMP_VC, COMPARE_JUMP_VV, BINARY_INT_C, BINARY_INT_CV,
+                          OPERANDS, BINARY_FUNCTIONS, UNARY_FUNCTIONS, PRINT_STRING, PRINT_FLOAT)
+from src.interpreter import Interpreter, InterpreterError, SCANF_PATTERNS, READERS, ESCAPES, ESCAPED, to_int
+
+# Profondeur d'appel au-delà de laquelle le programme C aurait épuisé sa pile
+MAX_DEPTH = 100000
+
+
+def decode(code, constants):
+    """Instructions of code as tuples (opcode, argument, argument, argument, argument), with their operands resolved:
+    the operations and constants are the Python objects, the jump targets the index of an instruction in the list."""
+    starts = {}         # position dans code -> indice de l'instruction
+    instructions = []
+    pc = 0
+    while pc < len(code):
+        opcode = code[pc]
+        starts[pc] = len(instructions)
+        instructions.append((opcode, code[pc + 1:pc + 1 + len(OPERANDS[opcode])]))
+        pc += 1 + len(OPERANDS[opcode])
+    starts[pc] = len(instructions)
+
+    decoded = []
+    for opcode, arguments in instructions:
+        operands = []
+        for kind, argument in zip(OPERANDS[opcode], arguments):
+            if kind == "k":
+                operands.append(constants[argument])
+            elif kind == "b":
+                operands.append(BINARY_FUNCTIONS[argument])
+            elif kind == "u":
+                operands.append(UNARY_FUNCTIONS[argument])
+            elif kind == "t":
+                operands.append(starts[argument])
+            else:
+                operands.append(argument)
+        decoded.append(tuple([opcode] + operands + [None] * (4 - len(operands))))
+    return decoded
+
+
+class VirtualMachine:
+    """Run the bytecode of a program (see src.bytecode) with a stack machine.
+
+    The code of each function is decoded once in a list of tuples, the dispatch loop then reads one tuple
+    per instruction. The calls do not use the Python stack: the frame and the return position of the callers
+    are kept in a list, so a recursive pseudo-code function is only limited by MAX_DEPTH.
+    """
+    def __init__(self, bytecode, input=None, output=None):
+        self.bytecode = bytecode
+        self.input = input      # sys.stdin si None
+        self.output = output    # sys.stdout si None
+        self.pending = ""       # reste de la ligne lue par lire() et pas encore utilisé
+        self.codes = [decode(function.code, bytecode.constants) for function in bytecode.functions]
+        self.variables = [function.initial_values() for function in bytecode.functions]
+
+    def run(self):
+        """Run the program. Returns its exit code, as the one of the C program."""
+        output = self.output or sys.stdout
+        self.pending = ""
+        try:
+            return self.execute(output.write)
+        finally:
+            output.flush()
+
+    def execute(self, write):
+        functions, codes, variables = self.bytecode.functions, self.codes, self.variables
+        function = functions[self.bytecode.main]
+        code = codes[self.bytecode.main]
+        frame = variables[self.bytecode.main][:]
+        stack = []
+        calls = []      # (fonction, code, indice de retour, cadre) de chaque appelant
+        push, pop = stack.append, stack.pop
+        pc = 0
+
+        # Les instructions les plus fréquentes dans une boucle sont testées en premier
+        while True:
+            opcode, a, b, c, d = code[pc]
+            pc += 1
+            if opcode == COMPARE_JUMP_VC:
+                if not a(frame[b], c):
+                    pc = d
+            elif opcode == ASSIGN_INT_VC:
+                value = a(frame[b], c)
+                frame[d] = value if -2147483648 <= value <= 2147483647 else to_int(value)
+            elif opcode == JUMP:
+                pc = a
+            elif opcode == BINARY_INT_VC:
+                value = a(frame[b], c)
+                push(value if -2147483648 <= value <= 2147483647 else to_int(value))
+            elif opcode == COMPARE_JUMP_C:
+                if not a(pop(), b):
+                    pc = c
+            elif opcode == LOAD:
+                push(frame[a])
+            elif opcode == LOAD_CONST:
+                push(a)
+            elif opcode == STORE:
+                frame[a] = pop()
+            elif opcode == BINARY_INT_C:
+                value = a(stack[-1], b)
+                stack[-1] = value if -2147483648 <= value <= 2147483647 else to_int(value)
+            elif opcode == BINARY_INT_CV:
+                value = a(b, frame[c])
+                push(value if -2147483648 <= value <= 2147483647 else to_int(value))
+            elif opcode == COMPARE_JUMP_VV:
+                if not a(frame[b], frame[c]):
+                    pc = d
+            elif opcode == ASSIGN_INT_VV:
+                value = a(frame[b], frame[c])
+                frame[d] = value if -2147483648 <= value <= 2147483647 else to_int(value)
+            elif opcode == BINARY_INT_VV:
+                value = a(frame[b], frame[c])
+                push(value if -2147483648 <= value <= 2147483647 else to_int(value))
+            elif opcode == BINARY_INT:
+                right = pop()
+                value = a(stack[-1], right)
+                stack[-1] = value if -2147483648 <= value <= 2147483647 else to_int(value)
+            elif opcode == COMPARE_JUMP:
+                right = pop()
+                if not a(pop(), right):
+                    pc = b
+            elif opcode == BINARY:
+                right = pop()
+                stack[-1] = a(stack[-1], right)
+            elif opcode == UNARY:
+                stack[-1] = a(stack[-1])
+            elif opcode == JUMP_IF_FALSE:
+                if not pop():
+                    pc = a
+            elif opcode == JUMP_IF_TRUE:
+                if pop():
+                    pc = a
+            elif opcode == CALL:
+                if len(calls) == MAX_DEPTH:
+                    raise InterpreterError("Recursion too deep")
+                calls.append((function, code, pc, frame))
+                function = functions[a]
+                code = codes[a]
+                count = function.parameters
+                if count:
+                    frame = stack[-count:] + variables[a]
+                    del stack[-count:]
+                else:
+                    frame = variables[a][:]
+                pc = 0
+            elif opcode == RETURN:
+                # La valeur renvoyée reste au sommet de la pile pour l'appelant
+                if not calls:
+                    return pop()
+                function, code, pc, frame = calls.pop()
+            elif opcode == POP:
+                pop()
+            elif opcode == PRINT:
+                value = pop()
+                if a == PRINT_STRING:
+                    write(ESCAPES.sub(lambda match: ESCAPED.get(match.group(1), match.group(1)), value) + "\n")
+                else:
+                    write(("%f\n" if a == PRINT_FLOAT else "%d\n") % value)
+            elif opcode == READ:
+                type = function.types[a]
+                text = self.scan(SCANF_PATTERNS[type])
+                # Comme scanf, la variable garde sa valeur si l'entrée ne contient pas de valeur du bon type
+                if text is not None:
+                    frame[a] = READERS[type](text)
+            elif opcode == UNARY_UNDER:
+                stack[-2] = a(stack[-2])
+            else:
+                raise InterpreterError(f"Unknown opcode {opcode} in '{function.name}'")
+
+    # lire() lit l'entrée comme l'interpréteur
+    scan = Interpreter.scan